@@ -6,16 +6,21 @@
 - 生成回测报告
 """
 
+import io
+import os
+import multiprocessing
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 import config
-from strategy import GridStrategy, TradePlan
+from strategy import GridStrategy, TradePlan, ZONE_NAMES
 from indicators import calculate_indicators
 from data_manager import get_data_manager
 from logger import get_logger
+from numba_utils import njit, prange
 
 
 @dataclass
@@ -30,6 +35,60 @@ class TradeRecord:
     reason: str = ""
 
 
+class TradeLog:
+    """
+    交易记录 (列式存储)
+    
+    每个字段是一个等长的 NumPy 数组，回测内核按下标直接写入：
+    - bar_idx: K线下标 (int64)
+    - date: 交易日期 (datetime64[D])
+    - direction: 方向 (uint8, 0=BUY 1=SELL)
+    - price / value: 成交价 / 成交金额 (float32)
+    - volume: 成交股数 (int32)
+    - reason_idx: 原因编号 (int16, 对应 _REASONS)
+    """
+    
+    def __init__(self, code: str = "", capacity: int = 0):
+        self.code = code
+        self.n = 0
+        self.bar_idx = np.empty(capacity, dtype=np.int64)
+        self.date = np.empty(capacity, dtype='datetime64[D]')
+        self.direction = np.empty(capacity, dtype=np.uint8)
+        self.price = np.empty(capacity, dtype=np.float32)
+        self.volume = np.empty(capacity, dtype=np.int32)
+        self.value = np.empty(capacity, dtype=np.float32)
+        self.reason_idx = np.empty(capacity, dtype=np.int16)
+    
+    def __len__(self) -> int:
+        return self.n
+    
+    def finalize(self, n: int, bar_dates: np.ndarray):
+        """截断到实际交易笔数，并按 bar_idx 填充日期"""
+        self.n = n
+        self.bar_idx = self.bar_idx[:n]
+        self.direction = self.direction[:n]
+        self.price = self.price[:n]
+        self.volume = self.volume[:n]
+        self.value = self.value[:n]
+        self.reason_idx = self.reason_idx[:n]
+        self.date = bar_dates[self.bar_idx]
+    
+    def records(self, start: Optional[int] = None, stop: Optional[int] = None) -> List[TradeRecord]:
+        """按切片范围返回 TradeRecord 视图 (仅用于报告展示)"""
+        return [
+            TradeRecord(
+                date=self.date[k].item(),
+                code=self.code,
+                direction=_DIRECTIONS[self.direction[k]],
+                price=float(self.price[k]),
+                volume=int(self.volume[k]),
+                value=float(self.value[k]),
+                reason=_REASONS[self.reason_idx[k]]
+            )
+            for k in range(*slice(start, stop).indices(self.n))
+        ]
+
+
 @dataclass
 class BacktestResult:
     """回测结果"""
@@ -48,8 +107,87 @@ class BacktestResult:
     win_rate: float = 0.0            # 胜率 (%)
     
     # 资金曲线
-    equity_curve: List[float] = field(default_factory=list)
-    trades: List[TradeRecord] = field(default_factory=list)
+    equity_curve: np.ndarray = field(default_factory=lambda: np.empty(0))
+    trades: TradeLog = field(default_factory=TradeLog)
+    
+    @property
+    def final_equity(self) -> float:
+        """期末资金 (资金曲线为空时为 0)"""
+        return float(self.equity_curve[-1]) if len(self.equity_curve) else 0.0
+
+
+# 回测报告模板 (Markdown)
+_REPORT_HEADER = """# 回测报告: {code}
+
+## 基本信息
+- **回测周期**: {start_date} ~ {end_date}
+- **初始资金**: ¥{initial_capital:,.0f}
+- **期末资金**: ¥{final_equity:,.0f}
+
+## 收益指标
+| 指标 | 数值 |
+|------|------|
+| 总收益率 | {total_return:+.2f}% |
+| 年化收益 | {annual_return:+.2f}% |
+| 最大回撤 | {max_drawdown:.2f}% |
+
+## 交易统计
+- **交易次数**: {trade_count}
+- **胜率**: {win_rate:.1f}%
+
+## 交易记录
+| 日期 | 方向 | 价格 | 数量 | 金额 | 原因 |
+|------|------|------|------|------|------|
+"""
+_REPORT_ROW = "| {date} | {direction} | {price:.3f} | {volume} | ¥{value:.0f} | {reason} |\n"
+_REPORT_FOOTER = "\n*报告生成时间: {now:%Y-%m-%d %H:%M:%S}*\n"
+
+
+# 进程内指标缓存: (代码, 最后日期, 行数, 内容哈希) -> 带指标的 DataFrame，按最近使用淘汰
+_INDICATOR_MEMO: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_INDICATOR_MEMO_SIZE = 32
+
+
+def _cached_indicators(code: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    带指标的历史数据 (进程内按 代码 + 最后日期 + 行数 + 内容哈希 缓存)
+    
+    直接使用调用方已获取的行情，不再重新请求；盘中最后一根K线变化时哈希不同，不会复用旧结果
+    重复回测与参数扫描直接复用，返回的是共享对象，调用方不要原地修改
+    """
+    digest = int(pd.util.hash_pandas_object(df[['high', 'low', 'close']]).sum())
+    key = (code, pd.Timestamp(df.index[-1]), len(df), digest)
+    cached = _INDICATOR_MEMO.get(key)
+    if cached is not None:
+        _INDICATOR_MEMO.move_to_end(key)
+        return cached
+    
+    result = _get_indicators(code, df, digest)
+    _INDICATOR_MEMO[key] = result
+    if len(_INDICATOR_MEMO) > _INDICATOR_MEMO_SIZE:
+        _INDICATOR_MEMO.popitem(last=False)
+    return result
+
+
+def _get_indicators(code: str, df: pd.DataFrame, digest: int) -> pd.DataFrame:
+    """
+    计算指标 (结果按 代码 + 写入日期 + 行数 + 内容哈希 缓存到磁盘；模拟数据不缓存)
+    
+    文件名与历史行情缓存一样以当天日期开头，往日文件在写入时清理
+    """
+    if df.attrs.get('mock'):
+        return calculate_indicators(df)
+    
+    data_manager = get_data_manager()
+    key = f"indicators/{code}_{datetime.now():%Y%m%d}_{len(df)}_{digest:016x}"
+    
+    cached = data_manager.read_disk_cache(key)
+    if cached is not None:
+        return cached
+    
+    df = calculate_indicators(df)
+    data_manager.write_disk_cache(key, df)
+    return df
 
 
 class GridBacktest:
@@ -67,53 +205,25 @@ class GridBacktest:
         self.data_manager = get_data_manager()
         self.logger = get_logger()
     
-    def run(self, code: str, days: int = 252) -> BacktestResult:
+    def run(self, code: str, days: int = 252, verbose: bool = True) -> BacktestResult:
         """
         运行回测
         
         Args:
             code: ETF代码 (sh510050 格式)
             days: 回测天数 (默认252个交易日约1年)
+            verbose: 是否打印标题和结果摘要 (进程池中运行时关闭，由主进程统一打印)
         
         Returns:
             回测结果
         """
-        print(f"\n📊 开始回测 {code}，周期: {days} 天")
-        print("=" * 50)
-        
-        # 获取历史数据 (尝试获取更多)
-        request_count = min(days + 100, 800)  # mootdx 最多返回约800条
-        df = self.data_manager.get_history(code, count=request_count)
-        
-        if df is None or df.empty:
-            print(f"❌ 无法获取数据")
-            return BacktestResult(code=code, start_date="", end_date="")
-        
-        # 计算指标
-        df = calculate_indicators(df)
-        df = df.dropna()  # 删除NaN行
+        if verbose:
+            self._print_header(code, days)
         
-        # 检查数据量，自动调整回测天数
-        available_days = len(df) - 25  # 需要预留25天计算指标
-        if available_days < 30:
-            print(f"❌ 数据不足 (仅 {len(df)} 条，需要至少 55 条)")
+        df = self._load_data(code, days)
+        if df is None:
             return BacktestResult(code=code, start_date="", end_date="")
         
-        actual_days = min(days, available_days)
-        if actual_days < days:
-            print(f"⚠️ 数据不足 {days} 天，自动调整为 {actual_days} 天")
-        
-        # 取回测数据
-        df = df.tail(actual_days + 25)  # 多取25天用于指标计算
-        
-        # 初始化状态
-        cash = self.initial_capital
-        position = 0  # 持仓股数
-        avg_cost = 0.0  # 平均成本
-        
-        equity_curve = []
-        trades = []
-        
         # 获取日期范围
         try:
             start_date = df.index[25].strftime("%Y-%m-%d") if hasattr(df.index[25], 'strftime') else str(df.index[25])[:10]
@@ -122,79 +232,125 @@ class GridBacktest:
             start_date = str(df.index[25])[:10] if len(df) > 25 else ""
             end_date = str(df.index[-1])[:10] if len(df) > 0 else ""
         
-        # 逐日回测
-        for i in range(20, len(df)):  # 从第20天开始(需要足够数据计算指标)
-            current_date = df.index[i]
-            current_df = df.iloc[:i+1]  # 截止当日的数据
-            
-            current_price = current_df['close'].iloc[-1]
-            
-            # 构建持仓信息
-            holdings = {
-                'volume': position,
-                'available': position,
-                'avg_cost': avg_cost
-            }
-            
-            # 策略分析
-            plan = self.strategy.analyze(code, current_df, holdings)
-            
-            # 执行交易信号
-            for order in plan.suggested_orders:
-                if order.direction == 'BUY':
-                    # 买入
-                    buy_value = order.price * order.amount
-                    if cash >= buy_value:
-                        # 更新平均成本
-                        total_value = avg_cost * position + order.price * order.amount
-                        position += order.amount
-                        avg_cost = total_value / position if position > 0 else 0
-                        cash -= buy_value
-                        
-                        trades.append(TradeRecord(
-                            date=current_date,
-                            code=code,
-                            direction='BUY',
-                            price=order.price,
-                            volume=order.amount,
-                            value=buy_value,
-                            reason=order.desc
-                        ))
-                
-                elif order.direction == 'SELL':
-                    # 卖出
-                    if position >= order.amount:
-                        sell_value = order.price * order.amount
-                        position -= order.amount
-                        cash += sell_value
-                        
-                        trades.append(TradeRecord(
-                            date=current_date,
-                            code=code,
-                            direction='SELL',
-                            price=order.price,
-                            volume=order.amount,
-                            value=sell_value,
-                            reason=order.desc
-                        ))
-            
-            # 计算当日权益
-            equity = cash + position * current_price
-            equity_curve.append(equity)
+        # 逐日回测 (从第20天开始，需要足够数据计算指标)
+        close, ma_5, bias, atr, rsi, high_20 = _prepare_arrays(df)
+        params = _build_params(self.strategy.conf)
+        zone = _classify_zones(bias, params)
+        trades = TradeLog(code, capacity=2 * (len(df) - 20))  # 每日最多 2 笔
+        equity, n_trades = _run_loop(
+            close, ma_5, bias, atr, rsi, high_20, zone,
+            params, float(self.initial_capital), 20,
+            trades.bar_idx, trades.direction, trades.price,
+            trades.volume, trades.value, trades.reason_idx
+        )
+        trades.finalize(n_trades, pd.to_datetime(df.index).values.astype('datetime64[D]'))
         
         # 计算统计指标
         result = self._calculate_metrics(
             code, start_date, end_date,
-            equity_curve, trades
+            equity, trades
         )
         
         # 打印结果摘要
-        self._print_summary(result)
+        if verbose:
+            self._print_summary(result)
         
         return result
     
+    def run_sweep(self, code: str, grids: List[Dict[str, float]], days: int = 252) -> np.ndarray:
+        """
+        参数扫描: 数据和指标只准备一次，在同一份数据上批量回测多组参数
+        
+        Args:
+            code: ETF代码 (sh510050 格式)
+            grids: 参数组合列表，每组覆盖 config 中的部分参数，
+                   如 [{'DEEP_DIP': -8.0}, {'DEEP_DIP': -6.0, 'MIN_PROFIT_PCT': 0.015}]
+                   可用参数名见 SWEEP_PARAMS
+            days: 回测天数
+        
+        Returns:
+            shape (K,) 的总收益率数组 (%)，与 grids 一一对应
+        """
+        df = self._load_data(code, days)
+        if df is None or not grids:
+            return np.full(len(grids), np.nan)
+        
+        base = _build_params(self.strategy.conf)
+        params_mat = np.tile(base, (len(grids), 1))
+        for k, grid in enumerate(grids):
+            for name, value in grid.items():
+                if name not in SWEEP_PARAMS:
+                    raise ValueError(f"未知的扫描参数: {name}")
+                params_mat[k, SWEEP_PARAMS[name]] = value
+        
+        close, ma_5, bias, atr, rsi, high_20 = _prepare_arrays(df)
+        final = _sweep(close, ma_5, bias, atr, rsi, high_20,
+                       params_mat, float(self.initial_capital), 20)
+        return (final - self.initial_capital) / self.initial_capital * 100
+    
+    def run_batch(self, codes: List[str], days: int = 252) -> Dict[str, float]:
+        """
+        多标的批量回测: 各标的数据按公共长度对齐后堆叠为二维数组，在多核上并行运行
+        
+        Args:
+            codes: ETF代码列表 (sh510050 格式)
+            days: 回测天数 (各标的截取到公共的最短长度)
+        
+        Returns:
+            {代码: 总收益率(%)}，数据不足的标的为 NaN
+        """
+        frames = {code: self._load_data(code, days) for code in codes}
+        valid = [code for code, df in frames.items() if df is not None]
+        returns = {code: float('nan') for code in codes}
+        if not valid:
+            return returns
+        
+        # 按公共尾部长度堆叠 (标的 × K线)
+        n_bars = min(len(frames[code]) for code in valid)
+        arrays = [_prepare_arrays(frames[code].tail(n_bars)) for code in valid]
+        close, ma_5, bias, atr, rsi, high_20 = (np.stack(cols) for cols in zip(*arrays))
+        
+        params = _build_params(self.strategy.conf)
+        final = _run_all(close, ma_5, bias, atr, rsi, high_20,
+                         params, float(self.initial_capital), 20)
+        for code, equity in zip(valid, final):
+            returns[code] = (equity - self.initial_capital) / self.initial_capital * 100
+        return returns
+    
+    def _load_data(self, code: str, days: int) -> Optional[pd.DataFrame]:
+        """
+        获取历史数据并计算指标，截取回测区间
+        
+        Returns:
+            回测用 DataFrame (前25行用于指标预热)，数据不足时返回 None
+        """
+        # 获取历史数据 (尝试获取更多)
+        request_count = min(days + 100, 800)  # mootdx 最多返回约800条
+        df = self.data_manager.get_history(code, count=request_count, use_disk_cache=True)
+        
+        if df is None or df.empty:
+            print(f"❌ 无法获取数据")
+            return None
+        
+        # 计算指标 (同一会话内按 代码 + 最后日期 + 行数 + 内容哈希 复用)
+        df = _cached_indicators(code, df)
+        df = df.dropna()  # 删除NaN行
+        
+        # 检查数据量，自动调整回测天数
+        available_days = len(df) - 25  # 需要预留25天计算指标
+        if available_days < 30:
+            print(f"❌ 数据不足 (仅 {len(df)} 条，需要至少 55 条)")
+            return None
+        
+        actual_days = min(days, available_days)
+        if actual_days < days:
+            print(f"⚠️ 数据不足 {days} 天，自动调整为 {actual_days} 天")
+        
+        # 取回测数据
+        return df.tail(actual_days + 25)  # 多取25天用于指标计算
+    
     def _calculate_metrics(self, code: str, start_date: str, end_date: str,
-                          equity_curve: List[float], trades: List[TradeRecord]) -> BacktestResult:
+                          equity_curve: np.ndarray, trades: TradeLog) -> BacktestResult:
         """计算回测统计指标"""
         result = BacktestResult(
             code=code,
@@ -204,7 +360,7 @@ class GridBacktest:
             trades=trades
         )
         
-        if not equity_curve:
+        if len(equity_curve) == 0:
             return result
         
         # 总收益率
@@ -219,29 +375,32 @@ class GridBacktest:
             result.annual_return = ((final / initial) ** (1 / years) - 1) * 100
         
         # 最大回撤
-        equity_arr = np.array(equity_curve)
-        running_max = np.maximum.accumulate(equity_arr)
-        drawdown = (running_max - equity_arr) / running_max * 100
-        result.max_drawdown = np.max(drawdown)
+        result.max_drawdown = float((1.0 - equity_curve / np.maximum.accumulate(equity_curve)).max() * 100)
         
         # 交易统计
         result.trade_count = len(trades)
         
         # 计算胜率 (基于卖出盈亏)
-        sell_trades = [t for t in trades if t.direction == 'SELL']
-        if sell_trades:
+        sells = trades.direction == _SELL
+        sell_count = int(sells.sum())
+        if sell_count:
             # 简化: 假设卖出价高于平均成本即为盈利
-            result.win_count = sum(1 for t in sell_trades if t.price > 0)  # 简化处理
-            result.win_rate = len(sell_trades) / len(trades) * 100 if trades else 0
+            result.win_count = int((trades.price[sells] > 0).sum())  # 简化处理
+            result.win_rate = sell_count / len(trades) * 100
         
         return result
     
+    def _print_header(self, code: str, days: int):
+        """打印回测标题"""
+        print(f"\n📊 开始回测 {code}，周期: {days} 天")
+        print("=" * 50)
+    
     def _print_summary(self, result: BacktestResult):
         """打印回测结果摘要"""
         print(f"\n📈 回测结果: {result.code}")
         print(f"   周期: {result.start_date} ~ {result.end_date}")
         print(f"   初始资金: ¥{self.initial_capital:,.0f}")
-        print(f"   期末资金: ¥{result.equity_curve[-1]:,.0f}" if result.equity_curve else "   期末资金: N/A")
+        print(f"   期末资金: ¥{result.final_equity:,.0f}")
         print()
         print(f"   📊 收益指标:")
         print(f"      总收益率: {result.total_return:+.2f}%")
@@ -254,34 +413,430 @@ class GridBacktest:
     
     def report(self, result: BacktestResult) -> str:
         """生成回测报告 (Markdown格式)"""
-        report = f"""# 回测报告: {result.code}
+        buf = io.StringIO()
+        buf.write(_REPORT_HEADER.format(
+            initial_capital=self.initial_capital,
+            final_equity=result.final_equity,
+            **vars(result)
+        ))
+        
+        # 最近20笔: 直接读取列数组，日期整列格式化
+        trades = result.trades
+        recent = slice(-20, None)
+        dates = pd.to_datetime(trades.date[recent]).strftime("%Y-%m-%d")
+        for date_str, direction, price, volume, value, reason in zip(
+            dates, trades.direction[recent], trades.price[recent],
+            trades.volume[recent], trades.value[recent], trades.reason_idx[recent]
+        ):
+            buf.write(_REPORT_ROW.format(
+                date=date_str, direction=_DIRECTIONS[direction], price=price,
+                volume=volume, value=value, reason=_REASONS[reason][:15]
+            ))
+        
+        buf.write(_REPORT_FOOTER.format(now=datetime.now()))
+        return buf.getvalue()
 
-## 基本信息
-- **回测周期**: {result.start_date} ~ {result.end_date}
-- **初始资金**: ¥{self.initial_capital:,.0f}
-- **期末资金**: ¥{result.equity_curve[-1]:,.0f if result.equity_curve else 0}
 
-## 收益指标
-| 指标 | 数值 |
-|------|------|
-| 总收益率 | {result.total_return:+.2f}% |
-| 年化收益 | {result.annual_return:+.2f}% |
-| 最大回撤 | {result.max_drawdown:.2f}% |
+# ============================================
+# 回测内核 (Numba 可用时编译为机器码)
+# ============================================
 
-## 交易统计
-- **交易次数**: {result.trade_count}
-- **胜率**: {result.win_rate:.1f}%
+_DIRECTIONS = ('BUY', 'SELL')
+_BUY, _SELL = 0, 1
 
-## 交易记录
-| 日期 | 方向 | 价格 | 数量 | 金额 | 原因 |
-|------|------|------|------|------|------|
-"""
-        for trade in result.trades[-20:]:  # 最近20笔
-            date_str = trade.date.strftime("%Y-%m-%d") if hasattr(trade.date, 'strftime') else str(trade.date)[:10]
-            report += f"| {date_str} | {trade.direction} | {trade.price:.3f} | {trade.volume} | ¥{trade.value:.0f} | {trade.reason[:15]} |\n"
+_REASONS = ('ATR移动止损', '再平衡补仓', '深坑网格买1', '深坑网格买2', '减持网格卖1', '网格买1', '网格卖1')
+_R_ATR_STOP, _R_REBALANCE, _R_DEEP_BUY1, _R_DEEP_BUY2, _R_REDUCE_SELL, _R_GRID_BUY, _R_GRID_SELL = range(7)
+
+# 区间编号 (与 strategy.ZONE_NAMES 下标一致): 深坑 / 黄金 / 震荡 / 减持 / 逃亡
+_Z_DEEP_DIP, _Z_GOLD_ZONE, _Z_OSCILLATION, _Z_REDUCE_ZONE, _Z_ESCAPE_ZONE = range(5)
+
+# 策略参数向量下标 (由 _build_params 从 config 生成)
+_P_DEEP_DIP = 0
+_P_GOLD_UPPER = 1
+_P_OSC_UPPER = 2
+_P_REDUCE_UPPER = 3
+_P_ESCAPE_HIGH = 4
+_P_TREND_REVERSAL = 5
+_P_TARGET_POS = 6        # 6~10: 各区间目标仓位
+_P_GRID_COEF = 11        # 11~15: 各区间网格系数
+_P_LOW_VOL_ATR = 16
+_P_HIGH_VOL_ATR = 17
+_P_LOW_VOL_MULT = 18
+_P_HIGH_VOL_MULT = 19
+_P_MIN_PROFIT = 20
+_P_HIGH_VOL_PCT = 21
+_P_HIGH_PROFIT = 22
+_P_LOW_VOL_PCT = 23
+_P_LOW_PROFIT = 24
+_P_TREND_DAYS = 25
+_P_TREND_THRESHOLD = 26
+_P_MAX_DD_LIMIT = 27
+_P_CAPITAL = 28
+_P_LOT_SIZE = 29
+_P_RSI_LIMIT = 30
+_N_PARAMS = 31
+
+# 参数扫描可覆盖的参数名 -> 参数向量下标
+SWEEP_PARAMS = {
+    'DEEP_DIP': _P_DEEP_DIP,
+    'GOLD_ZONE_UPPER': _P_GOLD_UPPER,
+    'OSCILLATION_UPPER': _P_OSC_UPPER,
+    'REDUCE_ZONE_UPPER': _P_REDUCE_UPPER,
+    'ESCAPE_TOP_HIGH': _P_ESCAPE_HIGH,
+    'TREND_REVERSAL': _P_TREND_REVERSAL,
+    'LOW_VOL_MULTIPLIER': _P_LOW_VOL_MULT,
+    'HIGH_VOL_MULTIPLIER': _P_HIGH_VOL_MULT,
+    'MIN_PROFIT_PCT': _P_MIN_PROFIT,
+    'TREND_THRESHOLD': _P_TREND_THRESHOLD,
+    'MAX_DRAWDOWN_LIMIT': _P_MAX_DD_LIMIT,
+    'RSI_LIMIT': _P_RSI_LIMIT,
+}
+
+
+def _build_params(conf) -> np.ndarray:
+    """把 config 中的策略参数打包为 float64 向量 (可选配置缺失时取中性值)"""
+    params = np.zeros(_N_PARAMS, dtype=np.float64)
+    th = conf.BIAS_THRESHOLDS
+    params[_P_DEEP_DIP] = th.DEEP_DIP
+    params[_P_GOLD_UPPER] = th.GOLD_ZONE_UPPER
+    params[_P_OSC_UPPER] = th.OSCILLATION_UPPER
+    params[_P_REDUCE_UPPER] = th.REDUCE_ZONE_UPPER
+    params[_P_ESCAPE_HIGH] = th.ESCAPE_TOP_HIGH
+    params[_P_TREND_REVERSAL] = th.TREND_REVERSAL
+    
+    for z, name in enumerate(ZONE_NAMES):
+        params[_P_TARGET_POS + z] = getattr(conf.TARGET_POSITION, name)
+        params[_P_GRID_COEF + z] = conf.GRID_COEFFICIENT.get(name, 1.0)
+    
+    dg = getattr(conf, 'DYNAMIC_GRID', None)
+    if dg:
+        params[_P_LOW_VOL_ATR] = dg.LOW_VOLATILITY_ATR
+        params[_P_HIGH_VOL_ATR] = dg.HIGH_VOLATILITY_ATR
+        params[_P_LOW_VOL_MULT] = dg.LOW_VOL_MULTIPLIER
+        params[_P_HIGH_VOL_MULT] = dg.HIGH_VOL_MULTIPLIER
+    else:
+        params[_P_LOW_VOL_ATR] = -np.inf
+        params[_P_HIGH_VOL_ATR] = np.inf
+        params[_P_LOW_VOL_MULT] = params[_P_HIGH_VOL_MULT] = 1.0
+    
+    params[_P_MIN_PROFIT] = getattr(conf, 'MIN_PROFIT_PCT', 0.012)
+    dp_conf = getattr(conf, 'DYNAMIC_PROFIT_CONFIG', None)
+    if dp_conf:
+        params[_P_HIGH_VOL_PCT] = dp_conf.HIGH_VOLATILITY_PCT
+        params[_P_HIGH_PROFIT] = dp_conf.HIGH_PROFIT_TARGET
+        params[_P_LOW_VOL_PCT] = dp_conf.LOW_VOLATILITY_PCT
+        params[_P_LOW_PROFIT] = dp_conf.LOW_PROFIT_TARGET
+    else:
+        params[_P_HIGH_VOL_PCT] = np.inf
+        params[_P_LOW_VOL_PCT] = -np.inf
+    
+    tt = getattr(conf, 'TREND_TRACKING', None)
+    if tt:
+        params[_P_TREND_DAYS] = tt.LOOKBACK_DAYS
+        params[_P_TREND_THRESHOLD] = tt.TREND_THRESHOLD
+    
+    params[_P_MAX_DD_LIMIT] = conf.MAX_DRAWDOWN_LIMIT
+    params[_P_CAPITAL] = conf.CAPITAL_PER_ETF
+    params[_P_LOT_SIZE] = conf.LOT_SIZE
+    params[_P_RSI_LIMIT] = 75.0  # 与 GridStrategy.analyze 中的 RSI 过滤一致
+    return params
+
+
+def _prepare_arrays(df: pd.DataFrame) -> tuple:
+    """
+    提取回测所需的指标数组 (按整数下标访问)
+    
+    Returns:
+        (close, ma_5, bias_20, atr_14, rsi_14, high_20)
+        high_20 为近20日最高价 (阻力位 / 移动止损基准)
+    """
+    close, ma_5, bias, atr, rsi = df[
+        ['close', 'ma_5', 'bias_20', 'atr_14', 'rsi_14']
+    ].to_numpy(dtype=np.float64).T
+    high_20 = df['high'].rolling(window=20).max().to_numpy(dtype=np.float64)
+    return (np.ascontiguousarray(close), np.ascontiguousarray(ma_5), np.ascontiguousarray(bias),
+            np.ascontiguousarray(atr), np.ascontiguousarray(rsi), high_20)
+
+
+@njit(cache=True)
+def _classify_zones(bias, params):
+    """
+    按 BIAS 阈值整列划分区间 (0=深坑 1=黄金 2=震荡 3=减持 4=逃亡)
+    
+    阈值在参数向量中连续存放且升序，side='right' 与 `bias < 阈值` 的判断一致
+    """
+    return np.searchsorted(params[_P_DEEP_DIP:_P_REDUCE_UPPER + 1], bias, side='right')
+
+
+@njit(cache=True)
+def _round_to_lot(amount, lot_size):
+    """向下取整到最近的整手"""
+    return int(amount // lot_size * lot_size)
+
+
+@njit(cache=True)
+def _analyze_bar(i, close, ma_5, bias_arr, atr_arr, rsi_arr, high_20, zone_arr,
+                 position, avg_cost, params, o_dir, o_price, o_vol, o_reason):
+    """
+    单日策略分析 (GridStrategy.analyze 的数组版本)
+    
+    只读取第 i 根K线及其之前的预计算指标，建议订单写入 o_* 缓冲区。
+    回测中没有真实的网格配对记录，因此不包含配对止盈逻辑。
+    
+    Returns:
+        订单数量 (0~2)
+    """
+    price = close[i]
+    bias = bias_arr[i]
+    atr = atr_arr[i]
+    rsi = rsi_arr[i]
+    if np.isnan(bias) or np.isnan(atr):
+        return 0
+    
+    lot_size = params[_P_LOT_SIZE]
+    
+    # 状态判定 (区间编号已由 _classify_zones 预先计算)
+    zone = zone_arr[i]
+    
+    # 模式切换: BIAS 从上方跌破 TREND_REVERSAL
+    reversal = params[_P_TREND_REVERSAL]
+    if bias_arr[i - 1] > reversal and bias <= reversal and zone != _Z_DEEP_DIP:
+        zone = _Z_OSCILLATION
+    
+    target_pos_pct = params[_P_TARGET_POS + zone]
+    if bias > params[_P_ESCAPE_HIGH]:
+        target_pos_pct = 0.0
+    
+    # 锚定价格
+    if zone == _Z_DEEP_DIP or np.isnan(ma_5[i]):
+        anchor_price = price
+    else:
+        anchor_price = ma_5[i]
+    
+    # 阴跌熔断
+    risk_triggered = False
+    if position > 0 and avg_cost > 0:
+        if (price - avg_cost) / avg_cost < params[_P_MAX_DD_LIMIT]:
+            risk_triggered = True
+    
+    # 趋势追踪
+    is_uptrend = False
+    is_downtrend = False
+    days = int(params[_P_TREND_DAYS])
+    if days > 0 and i >= days:
+        threshold = params[_P_TREND_THRESHOLD]
+        is_uptrend = True
+        is_downtrend = True
+        for j in range(i - days + 1, i + 1):
+            change = bias_arr[j] - bias_arr[j - 1]
+            if not change > threshold:
+                is_uptrend = False
+            if not change < -threshold:
+                is_downtrend = False
+    
+    # ATR 移动止损
+    if high_20[i] - price > 3 * atr and position > 0:
+        risk_triggered = True
+        sell_vol = _round_to_lot(max(100, int(position * 0.5)), lot_size)
+        if sell_vol > 0:
+            o_dir[0] = _SELL
+            o_price[0] = price
+            o_vol[0] = min(sell_vol, position)
+            o_reason[0] = _R_ATR_STOP
+            return 1
+    
+    # 再平衡
+    total_assets = params[_P_CAPITAL]
+    current_pos_pct = price * position / total_assets if total_assets > 0 else 0.0
+    pos_deviation = target_pos_pct - current_pos_pct
+    if pos_deviation > 0.15 and not risk_triggered and zone <= _Z_GOLD_ZONE:
+        buy_amount = _round_to_lot(total_assets * pos_deviation * 0.5 / price, lot_size)
+        if buy_amount > 0:
+            o_dir[0] = _BUY
+            o_price[0] = price
+            o_vol[0] = buy_amount
+            o_reason[0] = _R_REBALANCE
+            return 1
+    
+    # 网格间距 (与 GridStrategy._calc_dynamic_step 一致)
+    base_step = atr * params[_P_GRID_COEF + zone]
+    atr_pct = atr / anchor_price
+    if atr_pct < params[_P_LOW_VOL_ATR]:
+        base_step *= params[_P_LOW_VOL_MULT]
+    elif atr_pct > params[_P_HIGH_VOL_ATR]:
+        base_step *= params[_P_HIGH_VOL_MULT]
+    min_profit_pct = params[_P_MIN_PROFIT]
+    if atr_pct > params[_P_HIGH_VOL_PCT]:
+        min_profit_pct = params[_P_HIGH_PROFIT]
+    elif atr_pct < params[_P_LOW_VOL_PCT]:
+        min_profit_pct = params[_P_LOW_PROFIT]
+    step_price = max(base_step, anchor_price * min_profit_pct)
+    
+    lot_amount = max(_round_to_lot(total_assets * 0.05 / anchor_price, lot_size), int(lot_size))
+    rsi_limit = params[_P_RSI_LIMIT]
+    
+    n = 0
+    if zone == _Z_DEEP_DIP:
+        if not risk_triggered and not rsi > rsi_limit:
+            o_dir[0] = _BUY
+            o_price[0] = anchor_price - step_price
+            o_vol[0] = int(lot_amount * 1.5)
+            o_reason[0] = _R_DEEP_BUY1
+            o_dir[1] = _BUY
+            o_price[1] = anchor_price - 2 * step_price
+            o_vol[1] = int(lot_amount * 1.5)
+            o_reason[1] = _R_DEEP_BUY2
+            n = 2
+    elif zone >= _Z_REDUCE_ZONE:
+        if position > 0 and not is_downtrend:
+            o_dir[0] = _SELL
+            o_price[0] = anchor_price + step_price
+            o_vol[0] = min(position, int(lot_amount * 1.5))
+            o_reason[0] = _R_REDUCE_SELL
+            n = 1
+    else:
+        if not risk_triggered and not is_uptrend and rsi < rsi_limit:
+            o_dir[n] = _BUY
+            o_price[n] = anchor_price - step_price
+            o_vol[n] = lot_amount
+            o_reason[n] = _R_GRID_BUY
+            n += 1
+        if position > 0 and not is_downtrend:
+            o_dir[n] = _SELL
+            o_price[n] = anchor_price + step_price
+            o_vol[n] = min(position, lot_amount)
+            o_reason[n] = _R_GRID_SELL
+            n += 1
+    return n
+
+
+@njit(cache=True)
+def _run_loop(close, ma_5, bias, atr, rsi, high_20, zone, params, initial_capital, start,
+              t_idx, t_dir, t_price, t_vol, t_value, t_reason):
+    """
+    回测主循环: 逐日分析 + 撮合 + 记账
+    
+    交易事件直接写入调用方预分配的 t_* 数组 (见 TradeLog)，容量需 >= 2 * 回测天数。
+    
+    Returns:
+        (equity, n_trades) equity 为每日权益
+    """
+    n = close.shape[0]
+    n_bars = max(n - start, 0)
+    equity = np.empty(n_bars, dtype=np.float64)
+    n_trades = 0
+    
+    o_dir = np.empty(2, dtype=np.int64)
+    o_price = np.empty(2, dtype=np.float64)
+    o_vol = np.empty(2, dtype=np.int64)
+    o_reason = np.empty(2, dtype=np.int64)
+    
+    cash = initial_capital
+    position = 0     # 持仓股数
+    avg_cost = 0.0   # 平均成本
+    
+    for i in range(start, n):
+        n_orders = _analyze_bar(i, close, ma_5, bias, atr, rsi, high_20, zone,
+                                position, avg_cost, params, o_dir, o_price, o_vol, o_reason)
+        
+        # 执行交易信号
+        for k in range(n_orders):
+            price = o_price[k]
+            amount = o_vol[k]
+            value = price * amount
+            if o_dir[k] == _BUY:
+                if cash < value:
+                    continue
+                # 更新平均成本
+                avg_cost = (avg_cost * position + value) / (position + amount)
+                position += amount
+                cash -= value
+            else:
+                if position < amount:
+                    continue
+                position -= amount
+                cash += value
+            
+            t_idx[n_trades] = i
+            t_dir[n_trades] = o_dir[k]
+            t_price[n_trades] = price
+            t_vol[n_trades] = amount
+            t_value[n_trades] = value
+            t_reason[n_trades] = o_reason[k]
+            n_trades += 1
         
-        report += f"\n*报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n"
-        return report
+        # 计算当日权益
+        equity[i - start] = cash + position * close[i]
+    
+    return equity, n_trades
+
+
+@njit(cache=True, parallel=True)
+def _sweep(close, ma_5, bias, atr, rsi, high_20, params_mat, initial_capital, start):
+    """
+    参数扫描内核: 对 params_mat 的每一行 (一组参数) 运行一次 _run_loop
+    
+    Returns:
+        shape (K,) 的期末权益
+    """
+    n_sets = params_mat.shape[0]
+    capacity = 2 * max(close.shape[0] - start, 0)
+    final = np.empty(n_sets, dtype=np.float64)
+    
+    # 交易缓冲区按 (参数组, 容量) 一次性分配，每组写自己的一行，互不干扰
+    t_idx = np.empty((n_sets, capacity), dtype=np.int64)
+    t_dir = np.empty((n_sets, capacity), dtype=np.uint8)
+    t_price = np.empty((n_sets, capacity), dtype=np.float32)
+    t_vol = np.empty((n_sets, capacity), dtype=np.int32)
+    t_value = np.empty((n_sets, capacity), dtype=np.float32)
+    t_reason = np.empty((n_sets, capacity), dtype=np.int16)
+    
+    for k in prange(n_sets):
+        params = params_mat[k]
+        zone = _classify_zones(bias, params)
+        equity, _ = _run_loop(
+            close, ma_5, bias, atr, rsi, high_20, zone,
+            params, initial_capital, start,
+            t_idx[k], t_dir[k], t_price[k], t_vol[k], t_value[k], t_reason[k]
+        )
+        final[k] = equity[-1] if equity.shape[0] > 0 else initial_capital
+    return final
+
+
+@njit(cache=True, parallel=True)
+def _run_all(close, ma_5, bias, atr, rsi, high_20, params, initial_capital, start):
+    """
+    多标的内核: 输入为 (标的, K线) 二维数组，对每个标的 (每一行) 运行一次 _run_loop
+    
+    Returns:
+        shape (N,) 的期末权益
+    """
+    n_codes = close.shape[0]
+    capacity = 2 * max(close.shape[1] - start, 0)
+    final = np.empty(n_codes, dtype=np.float64)
+    
+    # 交易缓冲区按 (标的, 容量) 一次性分配
+    t_idx = np.empty((n_codes, capacity), dtype=np.int64)
+    t_dir = np.empty((n_codes, capacity), dtype=np.uint8)
+    t_price = np.empty((n_codes, capacity), dtype=np.float32)
+    t_vol = np.empty((n_codes, capacity), dtype=np.int32)
+    t_value = np.empty((n_codes, capacity), dtype=np.float32)
+    t_reason = np.empty((n_codes, capacity), dtype=np.int16)
+    
+    for k in prange(n_codes):
+        zone = _classify_zones(bias[k], params)
+        equity, _ = _run_loop(
+            close[k], ma_5[k], bias[k], atr[k], rsi[k], high_20[k], zone,
+            params, initial_capital, start,
+            t_idx[k], t_dir[k], t_price[k], t_vol[k], t_value[k], t_reason[k]
+        )
+        final[k] = equity[-1] if equity.shape[0] > 0 else initial_capital
+    return final
+
+
+def _run_one(code: str, days: int) -> BacktestResult:
+    """单只ETF回测 (模块级函数，供进程池调用；不打印，结果由主进程按顺序输出)"""
+    return GridBacktest().run(code, days, verbose=False)
 
 
 def run_backtest_menu():
@@ -303,14 +858,19 @@ def run_backtest_menu():
     days = int(days_input) if days_input.isdigit() else 252
     
     # 执行回测
-    backtest = GridBacktest()
-    
     if choice == '0':
-        # 全部回测
-        for code in config.ETF_LIST:
-            result = backtest.run(code, days)
+        # 全部回测 (各ETF互不依赖，多进程并行；结果按 ETF_LIST 顺序在主进程打印，避免输出交错)
+        processes = min(len(config.ETF_LIST), os.cpu_count() or 1)
+        with multiprocessing.Pool(processes=processes) as pool:
+            results = pool.starmap(_run_one, [(code, days) for code in config.ETF_LIST])
+        printer = GridBacktest()
+        for result in results:
+            printer._print_header(result.code, days)
+            if result.start_date:
+                printer._print_summary(result)
     elif choice.isdigit() and 1 <= int(choice) <= len(config.ETF_LIST):
         code = config.ETF_LIST[int(choice) - 1]
+        backtest = GridBacktest()
         result = backtest.run(code, days)
         
         # 保存报告
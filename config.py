@@ -18,6 +18,7 @@ DATA_CONFIG = {
     'cache_duration': 60,       # 缓存时长(秒)
     'retry_times': 3,          # 请求失败重试次数
     'timeout': 10,             # 请求超时时间(秒)
+    'disk_cache_dir': '.cache', # 磁盘缓存目录 (parquet, 需安装 pyarrow)
 }
 
 # 1. ETF 池 (用户真实持仓)
@@ -7,12 +7,16 @@
 - 数据缓存机制
 """
 
+import re
 import sys
-import math
-import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from cachetools import TTLCache
 import config
 
 # ============================================
@@ -44,15 +48,43 @@ except ImportError:
 except Exception as e:
     print(f"[WARN] Mootdx 初始化失败: {e}")
 
+# 3. 尝试导入 parquet 引擎 (磁盘缓存)
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+    print("[WARN] pyarrow 未安装，磁盘缓存不可用 (pip install pyarrow)")
+
+# 行情列的紧凑 dtype: ETF 价格用 float32 足够 (>6 位有效数字)，成交量(手)用 int32
+_OHLCV_DTYPES = {
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'volume': 'int32',
+}
+_INT32_MAX = np.iinfo(np.int32).max
+
+# 磁盘缓存文件名: {代码}_{YYYYMMDD}_... (日期为写入当天，用于清理往日文件)
+_DISK_CACHE_DATE_RE = re.compile(r'^[^_]+_(\d{8})')
+
 
 class DataManager:
     """统一数据管理器"""
     
     def __init__(self):
-        self._cache: Dict[str, pd.DataFrame] = {}
-        self._cache_time: Dict[str, datetime] = {}
         self._cache_ttl = 300  # 缓存5分钟
+        # 按 (代码, 条数) 缓存，过期与淘汰由 TTLCache 处理
+        self._cache = TTLCache(maxsize=64, ttl=self._cache_ttl)
+        # TTLCache 不是线程安全的 (get_history 会被多个线程并发调用)，读写 / 清理都要持锁
+        self._cache_lock = threading.Lock()
+        self._disk_cache_dir = Path(config.DATA_CONFIG.get('disk_cache_dir', '.cache'))
+        self._pruned_dirs = set()  # 当天已清理过的 (目录, 日期)
         self._mootdx_client = None
+        # 实时行情线程池: 每个工作线程持有独立的 mootdx 连接
+        self._realtime_executor: Optional[ThreadPoolExecutor] = None
+        self._thread_local = threading.local()
         
         # 初始化 mootdx 客户端
         if HAS_MOOTDX:
@@ -64,11 +96,17 @@ class DataManager:
     @staticmethod
     def convert_code(code: str) -> str:
         """转换代码格式: sh510050 -> 510050.SH"""
+        meta = _CODE_META.get(code)
+        if meta:
+            return meta[0]
         return code[2:] + '.' + code[:2].upper()
     
     @staticmethod
     def reverse_convert_code(symbol: str) -> str:
         """反向转换代码格式: 510050.SH -> sh510050"""
+        code = _SYMBOL_TO_CODE.get(symbol)
+        if code:
+            return code
         parts = symbol.split('.')
         if len(parts) == 2:
             return parts[1].lower() + parts[0]
@@ -77,23 +115,60 @@ class DataManager:
     @staticmethod
     def get_mootdx_market(code: str) -> int:
         """获取 mootdx 市场代码: sh -> 1, sz -> 0"""
+        meta = _CODE_META.get(code)
+        if meta:
+            return meta[1]
         return 1 if code.startswith('sh') else 0
     
     @staticmethod
     def get_mootdx_symbol(code: str) -> str:
         """获取 mootdx 股票代码: sh510050 -> 510050"""
+        meta = _CODE_META.get(code)
+        if meta:
+            return meta[2]
         return code[2:]
     
-    def _is_cache_valid(self, code: str) -> bool:
-        """检查缓存是否有效"""
-        if code not in self._cache:
-            return False
-        cache_time = self._cache_time.get(code)
-        if not cache_time:
-            return False
-        return (datetime.now() - cache_time).total_seconds() < self._cache_ttl
+    def read_disk_cache(self, key: str) -> Optional[pd.DataFrame]:
+        """读取磁盘缓存 (key 为缓存目录下的相对路径，不含扩展名)"""
+        if not HAS_PARQUET:
+            return None
+        path = self._disk_cache_dir / f"{key}.parquet"
+        if not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"读取磁盘缓存失败 {path}: {e}")
+            return None
+    
+    def write_disk_cache(self, key: str, df: pd.DataFrame):
+        """写入磁盘缓存"""
+        if not HAS_PARQUET:
+            return
+        path = self._disk_cache_dir / f"{key}.parquet"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._prune_disk_cache(path.parent)
+            df.to_parquet(path)
+        except Exception as e:
+            print(f"写入磁盘缓存失败 {path}: {e}")
+    
+    def _prune_disk_cache(self, directory: Path):
+        """删除目录中往日写入的缓存文件 (每个目录每天只检查一次)"""
+        today = f"{datetime.now():%Y%m%d}"
+        if (directory, today) in self._pruned_dirs:
+            return
+        self._pruned_dirs.add((directory, today))
+        for path in directory.glob('*.parquet'):
+            m = _DISK_CACHE_DATE_RE.match(path.stem)
+            if m and m.group(1) != today:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
     
-    def get_history(self, code: str, count: int = 200, use_cache: bool = True) -> pd.DataFrame:
+    def get_history(self, code: str, count: int = 200, use_cache: bool = True,
+                    use_disk_cache: bool = False) -> pd.DataFrame:
         """
         获取历史数据
         
@@ -103,13 +178,28 @@ class DataManager:
             code: ETF代码 (sh510050 格式)
             count: 获取的数据条数
             use_cache: 是否使用缓存
+            use_disk_cache: 是否使用当日的磁盘缓存 (适合回测等不要求盘中实时的场景)
         
         Returns:
             包含 OHLCV 数据的 DataFrame
         """
         # 检查缓存
-        if use_cache and self._is_cache_valid(code):
-            return self._cache[code].tail(count)
+        key = (code, count)
+        if use_cache:
+            with self._cache_lock:
+                df = self._cache.get(key)
+            if df is not None:
+                return df
+        
+        # 检查磁盘缓存 (按代码 + 获取日期)
+        disk_key = f"history/{code}_{datetime.now():%Y%m%d}"
+        if use_disk_cache:
+            df = self.read_disk_cache(disk_key)
+            if df is not None and len(df) >= count:
+                df = df.tail(count)
+                with self._cache_lock:
+                    self._cache[key] = df
+                return df
         
         df = None
         
@@ -121,16 +211,33 @@ class DataManager:
         if (df is None or df.empty) and HAS_MOOTDX and self._mootdx_client:
             df = self._get_from_mootdx(code, count)
         
-        # 3. Fallback: Mock 数据
+        # 3. Fallback: Mock 数据 (不写入磁盘缓存；标记来源，下游据此跳过派生数据的磁盘缓存)
         if df is None or df.empty:
-            df = self._generate_mock_data(code, count)
+            df = self._compact_dtypes(self._generate_mock_data(code, count))
+            df.attrs['mock'] = True
+        else:
+            df = self._compact_dtypes(df)
+            if use_disk_cache:
+                self.write_disk_cache(disk_key, df)
         
         # 更新缓存
-        self._cache[code] = df
-        self._cache_time[code] = datetime.now()
+        with self._cache_lock:
+            self._cache[key] = df
         
         return df
     
+    @staticmethod
+    def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """将 OHLCV 列压缩为 float32 / int32 (只处理存在的列)"""
+        dtypes = {col: dt for col, dt in _OHLCV_DTYPES.items() if col in df.columns}
+        if 'volume' in dtypes:
+            volume = df['volume'].fillna(0)
+            # 超出 int32 范围时保留 int64，避免溢出
+            if volume.max() > _INT32_MAX:
+                dtypes['volume'] = 'int64'
+            df = df.assign(volume=volume)
+        return df.astype(dtypes, copy=False)
+    
     def _get_from_qmt(self, code: str, count: int) -> Optional[pd.DataFrame]:
         """从 QMT 获取数据"""
         try:
@@ -164,8 +271,12 @@ class DataManager:
             market = self.get_mootdx_market(code)
             symbol = self.get_mootdx_symbol(code)
             
-            # 获取日K线数据
-            df = self._mootdx_client.bars(
+            # 获取日K线数据 (主线程用共享连接，线程池中的调用各用本线程的连接)
+            if threading.current_thread() is threading.main_thread():
+                client = self._mootdx_client
+            else:
+                client = self._thread_mootdx_client()
+            df = client.bars(
                 symbol=symbol,
                 frequency=9,  # 9=日K线
                 market=market,
@@ -198,6 +309,24 @@ class DataManager:
         
         return None
     
+    def _thread_mootdx_client(self):
+        """获取当前线程的 mootdx 客户端 (连接不跨线程共享)"""
+        client = getattr(self._thread_local, 'client', None)
+        if client is None:
+            client = Quotes.factory(market='std')
+            self._thread_local.client = client
+        return client
+    
+    def _fetch_one_realtime(self, code: str) -> Tuple[str, Optional[pd.DataFrame]]:
+        """通过 mootdx 获取单只ETF最新K线作为实时价格"""
+        df = self._thread_mootdx_client().bars(
+            symbol=self.get_mootdx_symbol(code),
+            frequency=9,
+            market=self.get_mootdx_market(code),
+            offset=1
+        )
+        return code, df
+    
     def get_realtime(self, codes: List[str]) -> Dict[str, Dict]:
         """
         获取实时行情
@@ -236,18 +365,12 @@ class DataManager:
         # 2. 尝试 mootdx 实时行情
         if HAS_MOOTDX and self._mootdx_client:
             try:
-                for code in codes:
-                    market = self.get_mootdx_market(code)
-                    symbol = self.get_mootdx_symbol(code)
-                    
-                    # 获取最新K线作为实时价格
-                    df = self._mootdx_client.bars(
-                        symbol=symbol,
-                        frequency=9,
-                        market=market,
-                        offset=1
+                # 每只ETF一次网络往返，并发请求
+                if self._realtime_executor is None:
+                    self._realtime_executor = ThreadPoolExecutor(
+                        max_workers=8, thread_name_prefix='mootdx-realtime'
                     )
-                    
+                for code, df in self._realtime_executor.map(self._fetch_one_realtime, codes):
                     if df is not None and not df.empty:
                         last = df.iloc[-1]
                         result[code] = {
@@ -288,34 +411,30 @@ class DataManager:
         dates = pd.date_range(end=datetime.now(), periods=count)
         base_price = 3.0
         
-        data = []
-        for i in range(count):
-            noise = random.uniform(-0.02, 0.02)
-            trend = math.sin(i / 10.0) * 0.5
-            price = base_price * (1 + trend + noise)
-            high = price * (1 + random.uniform(0, 0.01))
-            low = price * (1 - random.uniform(0, 0.01))
-            
-            data.append({
-                'open': price * (1 - random.uniform(-0.005, 0.005)),
-                'high': high,
-                'low': low,
-                'close': price,
-                'volume': random.randint(500000, 2000000)
-            })
+        # 一次性生成整段随机序列
+        rng = np.random.default_rng()
+        noise = rng.uniform(-0.02, 0.02, count)
+        trend = np.sin(np.arange(count) / 10.0) * 0.5
+        close = base_price * (1 + trend + noise)
         
-        df = pd.DataFrame(data, index=dates)
+        df = pd.DataFrame({
+            'open': close * (1 - rng.uniform(-0.005, 0.005, count)),
+            'high': close * (1 + rng.uniform(0, 0.01, count)),
+            'low': close * (1 - rng.uniform(0, 0.01, count)),
+            'close': close,
+            'volume': rng.integers(500000, 2000000, count, endpoint=True)
+        }, index=dates)
         df.index.name = 'date'
         return df
     
     def clear_cache(self, code: Optional[str] = None):
         """清除缓存"""
-        if code:
-            self._cache.pop(code, None)
-            self._cache_time.pop(code, None)
-        else:
-            self._cache.clear()
-            self._cache_time.clear()
+        with self._cache_lock:
+            if code:
+                for key in [k for k in self._cache if k[0] == code]:
+                    self._cache.pop(key, None)
+            else:
+                self._cache.clear()
     
     def is_connected(self) -> bool:
         """检查是否连接到真实数据源"""
@@ -331,6 +450,15 @@ class DataManager:
             return "Mock"
 
 
+# ETF池代码格式预计算: code -> (QMT代码, mootdx市场, mootdx代码)
+_CODE_META = {
+    c: (c[2:] + '.' + c[:2].upper(), 1 if c.startswith('sh') else 0, c[2:])
+    for c in config.ETF_LIST
+}
+# 反查表: QMT代码 -> code
+_SYMBOL_TO_CODE = {meta[0]: c for c, meta in _CODE_META.items()}
+
+
 # 全局数据管理器实例
 _data_manager: Optional[DataManager] = None
 
@@ -1,5 +1,6 @@
 
 import sqlite3
+from datetime import date, timedelta
 
 def clean_trades():
     db_path = 'd:\\BIAS-ATR-Grid-Trader\\grid_state.db'
@@ -28,22 +29,29 @@ def clean_trades():
         {'code': 'sh510500', 'price': 2.880, 'volume': 800,  'ts_fragment': '2025-12-14'}
     ]
     
-    deleted_count = 0
+    # Index on (code, timestamp) so each DELETE is a lookup, not a full scan
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trade_code_ts ON trade_history(code, timestamp)")
     
+    # Match code, price (approx), volume and the day of the ISO timestamp;
+    # the day is a range [day, next day) so the index serves both code and timestamp
+    # (a LIKE '%...%' pattern could only use the code column).
+    # All targets are deleted in one executemany inside a single transaction
+    sql = """
+        DELETE FROM trade_history 
+        WHERE code=? 
+        AND timestamp >= ? AND timestamp < ?
+        AND abs(price - ?) < 0.001 
+        AND volume=?
+    """
+    params = []
     for t in targets:
-        # Construct query to be flexible with timestamp exact match vs partial
-        # We match code, price (approx), and volume
-        sql = """
-            DELETE FROM trade_history 
-            WHERE code=? 
-            AND abs(price - ?) < 0.001 
-            AND volume=?
-            AND timestamp LIKE ?
-        """
-        cursor.execute(sql, (t['code'], t['price'], t['volume'], f"%{t['ts_fragment']}%"))
-        deleted_count += cursor.rowcount
-        
-    conn.commit()
+        day = date.fromisoformat(t['ts_fragment'])
+        params.append((t['code'], day.isoformat(), (day + timedelta(days=1)).isoformat(),
+                       t['price'], t['volume']))
+    with conn:
+        cursor.executemany(sql, params)
+    deleted_count = cursor.rowcount
+    
     print(f"Total deleted rows: {deleted_count}")
     conn.close()
 
@@ -7,8 +7,32 @@ import os
 import sys
 import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import yaml
+    try:
+        from yaml import CSafeDumper as YamlDumper  # libyaml C 扩展
+    except ImportError:
+        from yaml import SafeDumper as YamlDumper
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+# 生成文件的写缓冲 (整段内容一次 write 写出)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def write_text_file(path, content):
+    """以 UTF-8 一次性写出整段文本，内容未变化时跳过 (返回是否写入)"""
+    data = content.encode('utf-8')
+    target = Path(path)
+    if target.is_file() and target.stat().st_size == len(data) and target.read_bytes() == data:
+        return False
+    with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(data)
+    return True
+
 def check_prerequisites():
     """检查先决条件"""
     print("[INFO] 检查先决条件...")
@@ -21,8 +45,18 @@ def check_prerequisites():
         'templates/index.html'
     ]
 
+    # 每个目录只读取一次列表，再做集合查找 (代替逐个 stat)
+    listings = {}
     for file in required_files:
-        if not Path(file).exists():
+        parent, name = os.path.split(file)
+        parent = parent or '.'
+        if parent not in listings:
+            try:
+                with os.scandir(parent) as entries:
+                    listings[parent] = {entry.name for entry in entries}
+            except FileNotFoundError:
+                listings[parent] = set()
+        if name not in listings[parent]:
             print(f"[ERROR] 缺少文件: {file}")
             return False
         print(f"[OK] 找到文件: {file}")
@@ -30,15 +64,19 @@ def check_prerequisites():
     return True
 
 def initialize_git():
-    """初始化 Git 仓库"""
+    """初始化 Git 仓库 (返回是否新建了仓库)"""
     if Path('.git').exists():
         print("✅ Git 仓库已存在")
-        return True
+        return False
 
     print("📦 初始化 Git 仓库...")
     subprocess.run(['git', 'init'], check=True)
 
-    # 创建 .gitignore
+    print("✅ Git 仓库初始化完成")
+    return True
+
+def create_gitignore():
+    """创建 .gitignore"""
     gitignore = """# Python
 __pycache__/
 *.py[cod]
@@ -93,11 +131,10 @@ node_modules/
 Thumbs.db
 """
 
-    with open('.gitignore', 'w', encoding='utf-8') as f:
-        f.write(gitignore)
-
-    print("✅ Git 仓库初始化完成")
-    return True
+    if write_text_file('.gitignore', gitignore):
+        print("✅ 创建 .gitignore")
+    else:
+        print("✅ .gitignore 已是最新")
 
 def create_github_repo():
     """创建 GitHub 仓库指引"""
@@ -133,7 +170,7 @@ def commit_and_push():
     input("\n推送完成后按回车继续...")
 
 def create_render_config():
-    """创建 Render 配置说明"""
+    """创建 Render 配置说明 (返回是否生成成功)"""
     render_config = {
         "services": [
             {
@@ -153,11 +190,14 @@ def create_render_config():
         ]
     }
 
-    with open('render.yaml', 'w', encoding='utf-8') as f:
-        import yaml
-        yaml.dump(render_config, f, default_flow_style=False)
+    if not HAS_YAML:
+        print("[ERROR] 未生成 render.yaml: 缺少 PyYAML (pip install pyyaml)")
+        return False
+
+    write_text_file('render.yaml', yaml.dump(render_config, Dumper=YamlDumper, default_flow_style=False))
 
     print("✅ 创建 render.yaml 配置文件")
+    return True
 
 def guide_render_deployment():
     """指导 Render 部署"""
@@ -188,12 +228,26 @@ def create_deploy_verification():
 import requests
 import time
 
-def check_deployment(url):
+def wait_until_up(session, url, max_wait=60):
+    \"\"\"轮询主页直到返回 200 (指数退避)，超时返回 False\"\"\"
+    deadline = time.monotonic() + max_wait
+    delay = 1
+    while time.monotonic() < deadline:
+        try:
+            if session.get(url, timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(delay)
+        delay = min(delay * 2, 8)
+    return False
+
+def check_deployment(session, url):
     print(f"🔍 检查部署状态: {url}")
 
     # 检查主页
     try:
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
         if response.status_code == 200:
             print("✅ 主页访问正常")
         else:
@@ -206,7 +260,7 @@ def check_deployment(url):
     # 检查 API
     try:
         api_url = f"{url}/api/status"
-        response = requests.get(api_url, timeout=10)
+        response = session.get(api_url, timeout=10)
         if response.status_code == 200:
             data = response.json()
             print("✅ API 状态正常")
@@ -228,18 +282,20 @@ if __name__ == "__main__":
     if not url.startswith('http'):
         url = f"https://{url}"
 
-    print("\\n⏳ 等待应用启动...")
-    time.sleep(30)  # 等待应用启动
+    # 两次检查共用一个 Session，复用 TCP/TLS 连接
+    with requests.Session() as session:
+        print("\\n⏳ 等待应用启动...")
+        wait_until_up(session, url)
+        ok = check_deployment(session, url)
 
-    if check_deployment(url):
+    if ok:
         print("\\n🎉 部署验证成功！")
         print(f"📱 访问地址: {url}")
     else:
         print("\\n❌ 部署验证失败，请检查日志")
 """
 
-    with open('verify_deployment.py', 'w', encoding='utf-8') as f:
-        f.write(verify_script)
+    write_text_file('verify_deployment.py', verify_script)
 
     print("✅ 创建部署验证脚本: verify_deployment.py")
 
@@ -252,12 +308,17 @@ def main():
     if not check_prerequisites():
         sys.exit(1)
 
-    # 初始化 Git
-    initialize_git()
+    # 初始化 Git (git init 先于其他步骤完成)
+    new_repo = initialize_git()
 
-    # 创建配置文件
-    create_render_config()
-    create_deploy_verification()
+    # 创建配置文件 (互相独立，并行生成)
+    setup_steps = [create_render_config, create_deploy_verification]
+    if new_repo:
+        setup_steps.append(create_gitignore)
+    with ThreadPoolExecutor(max_workers=len(setup_steps)) as pool:
+        results = [future.result() for future in [pool.submit(step) for step in setup_steps]]
+    if False in results:
+        sys.exit(1)
 
     # 指导创建 GitHub 仓库
     create_github_repo()
@@ -3,6 +3,7 @@ from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection, PolyCollection
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -11,6 +12,17 @@ from datetime import datetime
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 重绘合并间隔 (毫秒)，约 30 FPS 上限
+REDRAW_INTERVAL_MS = 33
+
+def _normalize_orders(orders):
+    """将订单统一为 (price, direction, amount) 元组 (order 可能是对象或字典)"""
+    return [
+        (o.price, o.direction, getattr(o, 'amount', None)) if hasattr(o, 'price')
+        else (o.get('price'), o.get('direction'), o.get('amount'))
+        for o in orders
+    ]
+
 class StockChart(ttk.Frame):
     """股票K线图表组件"""
     
@@ -19,100 +31,127 @@ class StockChart(ttk.Frame):
         
         self.figure, self.ax = plt.subplots(figsize=(8, 6), dpi=100)
         self.figure.patch.set_facecolor('#1E1E1E') # 与卡片背景一致
-        self.ax.set_facecolor('#121212') # 深色绘图区
         
         # 调整边距
         plt.subplots_adjust(left=0.1, right=0.95, top=0.95, bottom=0.15)
         
         self.canvas = FigureCanvasTkAgg(self.figure, master=self)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._redraw_pending = False
+        
+        # 坐标轴样式只设置一次，重绘时只替换数据图元
+        self._data_artists = []
+        self._setup_axes()
         
         # 初始化空图表
         self.clear_chart()
         
-    def clear_chart(self):
-        """清空图表"""
-        self.ax.clear()
-        self.ax.set_facecolor('#121212')
-        self.ax.tick_params(colors='white')
-        self.ax.spines['bottom'].set_color('#333333')
-        self.ax.spines['top'].set_color('#333333') 
-        self.ax.spines['left'].set_color('#333333')
-        self.ax.spines['right'].set_color('#333333')
-        self.ax.text(0.5, 0.5, "请选择左侧ETF查看详情", 
-                    transform=self.ax.transAxes, color='#666666', 
-                    ha='center', va='center', fontsize=12)
-        self.canvas.draw()
-
-    def plot_data(self, df, orders=None, current_price=None, holdings=None, grid_pairs=None):
-        """绘制K线数据 - [增强版] 添加网格可视化"""
-        self.ax.clear()
-        self.ax.set_facecolor('#121212')
+    def _setup_axes(self):
+        """设置坐标轴的静态样式"""
+        self.ax.set_facecolor('#121212') # 深色绘图区
         self.ax.grid(True, color='#333333', linestyle='--', alpha=0.5)
         self.ax.tick_params(axis='x', colors='#A0A0A0')
         self.ax.tick_params(axis='y', colors='#A0A0A0')
         
         for spine in self.ax.spines.values():
             spine.set_color('#333333')
+            
+    def _clear_data_artists(self):
+        """移除上一次绘制的数据图元 (保留坐标轴样式)"""
+        for artist in self._data_artists:
+            artist.remove()
+        self._data_artists = []
+        # 下一次添加的图元重新计算数据范围
+        self.ax.ignore_existing_data_limits = True
+        
+    def _show_message(self, text):
+        """在绘图区中央显示提示文字"""
+        self._data_artists.append(self.ax.text(
+            0.5, 0.5, text, transform=self.ax.transAxes, color='#666666',
+            ha='center', va='center', fontsize=12))
+        
+    def clear_chart(self):
+        """清空图表"""
+        self._clear_data_artists()
+        self._show_message("请选择左侧ETF查看详情")
+        self._schedule_draw()
+
+    def _schedule_draw(self):
+        """请求重绘: 短时间内的多次请求合并为一次"""
+        if self._redraw_pending:
+            return
+        self._redraw_pending = True
+        self.after(REDRAW_INTERVAL_MS, self._flush_draw)
+
+    def _flush_draw(self):
+        self._redraw_pending = False
+        self.canvas.draw_idle()
+
+    def plot_data(self, df, orders=None, current_price=None, holdings=None, grid_pairs=None):
+        """绘制K线数据 - [增强版] 添加网格可视化"""
+        self._clear_data_artists()
+        artists = self._data_artists
 
         if df is None or df.empty:
-            self.ax.text(0.5, 0.5, "暂无数据", 
-                        transform=self.ax.transAxes, color='#666666', 
-                        ha='center', va='center', fontsize=12)
-            self.canvas.draw()
+            self._show_message("暂无数据")
+            self._schedule_draw()
             return
 
         # 准备数据 (取最近N条)
         limit = 60
-        data = df.tail(limit).copy()
+        data = df.tail(limit)
         
         # 绘制K线 (简单版：红涨绿跌)
+        # 实体和影线各用一个集合对象批量绘制，避免逐根创建 Rectangle
         width = 0.6
-        width2 = 0.1
         
-        up = data[data.close >= data.open]
-        down = data[data.close < data.open]
+        # 一次取出所需列为 ndarray，后续只做数组运算
+        x = mdates.date2num(data.index)
+        open_, high, low, close_ = data[['open', 'high', 'low', 'close']].to_numpy(dtype=float).T
+        x_last = x[-1]
         
         col_up = '#ef4444' # 红
         col_down = '#10b981' # 绿
-        
-        # 绘制阳线
-        self.ax.bar(up.index, up.close - up.open, width, bottom=up.open, color=col_up)
-        self.ax.bar(up.index, up.high - up.close, width2, bottom=up.close, color=col_up)
-        self.ax.bar(up.index, up.low - up.open, width2, bottom=up.open, color=col_up)
-        
-        # 绘制阴线
-        self.ax.bar(down.index, down.close - down.open, width, bottom=down.open, color=col_down)
-        self.ax.bar(down.index, down.high - down.open, width2, bottom=down.open, color=col_down)
-        self.ax.bar(down.index, down.low - down.close, width2, bottom=down.close, color=col_down)
+        colors = np.where(close_ >= open_, col_up, col_down)
+        
+        # 影线: (N, 2, 2) 线段
+        wicks = np.stack([np.column_stack([x, low]), np.column_stack([x, high])], axis=1)
+        artists.append(self.ax.add_collection(LineCollection(wicks, colors=colors, linewidths=1)))
+        
+        # 实体: (N, 4, 2) 矩形顶点
+        left = x - width / 2
+        right = x + width / 2
+        bodies = np.stack([
+            np.column_stack([left, open_]), np.column_stack([left, close_]),
+            np.column_stack([right, close_]), np.column_stack([right, open_]),
+        ], axis=1)
+        artists.append(self.ax.add_collection(PolyCollection(bodies, facecolors=colors, edgecolors=colors)))
+        self.ax.xaxis_date()
+        self.ax.autoscale_view()
 
         # 绘制均线
         if 'ma_20' in data.columns:
-            self.ax.plot(data.index, data['ma_20'], color='#f59e0b', linewidth=1, label='MA20', alpha=0.7)
+            artists.extend(self.ax.plot(x, data['ma_20'].to_numpy(), color='#f59e0b', linewidth=1, label='MA20', alpha=0.7))
 
         # [NEW] 绘制持仓成本线（紫色实线）
         if holdings and holdings.get('avg_cost', 0) > 0 and holdings.get('volume', 0) > 0:
             cost = holdings['avg_cost']
-            self.ax.axhline(y=cost, color='#a855f7', linestyle='-', linewidth=1.5, alpha=0.8)
-            self.ax.text(data.index[-1], cost, f' 成本 {cost:.3f}', 
-                        color='#a855f7', va='center', fontsize=8, fontweight='bold')
+            artists.append(self.ax.axhline(y=cost, color='#a855f7', linestyle='-', linewidth=1.5, alpha=0.8))
+            artists.append(self.ax.text(x_last, cost, f' 成本 {cost:.3f}', 
+                        color='#a855f7', va='center', fontsize=8, fontweight='bold'))
 
         # [NEW] 绘制网格配对目标卖出价（橙色点线）
         if grid_pairs:
             for pair in grid_pairs:
                 target_price = pair.get('target_sell_price', 0)
                 if target_price > 0:
-                    self.ax.axhline(y=target_price, color='#f97316', linestyle=':', linewidth=1, alpha=0.7)
-                    self.ax.text(data.index[-1], target_price, f' 目标 {target_price:.3f}', 
-                                color='#f97316', va='center', fontsize=7)
+                    artists.append(self.ax.axhline(y=target_price, color='#f97316', linestyle=':', linewidth=1, alpha=0.7))
+                    artists.append(self.ax.text(x_last, target_price, f' 目标 {target_price:.3f}', 
+                                color='#f97316', va='center', fontsize=7))
 
         # 绘制建议订单（买入绿色虚线，卖出红色虚线）
         if orders:
-            for order in orders:
-                # order结构可能不同，需兼容
-                price = order.price if hasattr(order, 'price') else order.get('price')
-                direction = order.direction if hasattr(order, 'direction') else order.get('direction')
-                
+            for price, direction, _ in _normalize_orders(orders):
                 if direction == 'BUY':
                     color = '#10b981'  # 买入绿色
                     label = '买入'
@@ -120,18 +159,18 @@ class StockChart(ttk.Frame):
                     color = '#ef4444'  # 卖出红色
                     label = '卖出'
                 
-                self.ax.axhline(y=price, color=color, linestyle='--', alpha=0.6)
+                artists.append(self.ax.axhline(y=price, color=color, linestyle='--', alpha=0.6))
                 
                 # 标注价格
-                self.ax.text(data.index[-1], price, f' {label} {price:.3f}', 
-                            color=color, va='center', fontsize=8)
+                artists.append(self.ax.text(x_last, price, f' {label} {price:.3f}', 
+                            color=color, va='center', fontsize=8))
 
         # 格式化X轴日期
         self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
         self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
         plt.setp(self.ax.get_xticklabels(), rotation=30, ha='right')
 
-        self.canvas.draw()
+        self._schedule_draw()
 
 class GridVizPanel(ttk.Frame):
     """网格交易可视化面板 (底部详情)"""
@@ -139,6 +178,7 @@ class GridVizPanel(ttk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         self.configure(style='Card.TFrame', padding=10)
+        self._pending_update = None
         
         # 1. 顶部：网格区间条
         self.create_interval_bar()
@@ -166,8 +206,20 @@ class GridVizPanel(ttk.Frame):
         self.orders_container = ttk.Frame(self.blocks_frame, style='Card.TFrame')
         self.orders_container.pack(fill=tk.X)
         
+        # 订单块复用池 (每项保存需要更新的控件)
+        self._block_widgets = []
+        self._empty_label = None
+        
     def update_data(self, current_price, orders, grid_info=None):
-        """更新数据"""
+        """更新数据 (短时间内的多次更新合并，只绘制最新一次)"""
+        scheduled = self._pending_update is not None
+        self._pending_update = (current_price, orders, grid_info)
+        if not scheduled:
+            self.after(REDRAW_INTERVAL_MS, self._flush_update)
+        
+    def _flush_update(self):
+        current_price, orders, grid_info = self._pending_update
+        self._pending_update = None
         self.draw_interval_bar(current_price, grid_info)
         self.draw_order_blocks(orders)
         
@@ -215,38 +267,57 @@ class GridVizPanel(ttk.Frame):
             self.canvas.create_text(pos_x, line_y-15, text=f"现价: {current_price:.3f}", fill='white', font=('Arial', 9, 'bold'))
             
     def draw_order_blocks(self, orders):
-        """绘制可视化订单块"""
-        # 清空
-        for widget in self.orders_container.winfo_children():
-            widget.destroy()
-            
-        if not orders:
-            ttk.Label(self.orders_container, text="暂无建议订单", style='Status.TLabel').pack(anchor=tk.W, pady=10)
-            return
+        """绘制可视化订单块 (复用已有订单块，只更新变化的文字/颜色)"""
+        orders = _normalize_orders(orders) if orders else []
+        
+        # 空状态提示
+        if not orders and self._empty_label is None:
+            self._empty_label = ttk.Label(self.orders_container, text="暂无建议订单", style='Status.TLabel')
+            self._empty_label.pack(anchor=tk.W, pady=10)
+        elif orders and self._empty_label is not None:
+            self._empty_label.destroy()
+            self._empty_label = None
+        
+        # 按订单数量增减订单块
+        while len(self._block_widgets) < len(orders):
+            self._block_widgets.append(self._create_order_block())
+        while len(self._block_widgets) > len(orders):
+            self._block_widgets.pop()['frame'].destroy()
 
         # 横向排列
-        for order in orders:
-            # order可能是对象或字典
-            price = order.price if hasattr(order, 'price') else order.get('price')
-            amount = order.amount if hasattr(order, 'amount') else order.get('amount')
-            direction = order.direction if hasattr(order, 'direction') else order.get('direction')
-            
+        for block, (price, direction, amount) in zip(self._block_widgets, orders):
             bg_color = '#ef4444' if direction == 'SELL' else '#3b82f6' # 卖红买蓝
             type_text = "卖出" if direction == 'SELL' else "买入"
+            state = (bg_color, f"{type_text} {price:.3f}", f"数量: {amount} 股")
+            if bg_color != block['state'][0]:
+                block['bar'].config(bg=bg_color)
+            if state[1] != block['state'][1]:
+                block['title'].config(text=state[1])
+            if state[2] != block['state'][2]:
+                block['detail'].config(text=state[2])
+            block['state'] = state
             
-            # 使用Canvas画自定义块，或者通过Frame模拟
-            frame = tk.Frame(self.orders_container, bg='#2C2C2C', padx=10, pady=5)
-            frame.pack(side=tk.LEFT, padx=(0, 10))
-            
-            # 左侧色条
-            tk.Frame(frame, bg=bg_color, width=4, height=30).pack(side=tk.LEFT, fill=tk.Y, padx=(0, 8))
-            
-            # 内容
-            info_frame = tk.Frame(frame, bg='#2C2C2C')
-            info_frame.pack(side=tk.LEFT)
-            
-            tk.Label(info_frame, text=f"{type_text} {price:.3f}", fg='white', bg='#2C2C2C', font=('Microsoft YaHei', 10, 'bold')).pack(anchor=tk.W)
-            tk.Label(info_frame, text=f"数量: {amount} 股", fg='#AAAAAA', bg='#2C2C2C', font=('Microsoft YaHei', 8)).pack(anchor=tk.W)
+    def _create_order_block(self):
+        """创建一个空的订单块，返回其中需要更新的控件"""
+        # 使用Canvas画自定义块，或者通过Frame模拟
+        frame = tk.Frame(self.orders_container, bg='#2C2C2C', padx=10, pady=5)
+        frame.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # 左侧色条
+        bar = tk.Frame(frame, bg='#2C2C2C', width=4, height=30)
+        bar.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 8))
+        
+        # 内容
+        info_frame = tk.Frame(frame, bg='#2C2C2C')
+        info_frame.pack(side=tk.LEFT)
+        
+        title = tk.Label(info_frame, text="", fg='white', bg='#2C2C2C', font=('Microsoft YaHei', 10, 'bold'))
+        title.pack(anchor=tk.W)
+        detail = tk.Label(info_frame, text="", fg='#AAAAAA', bg='#2C2C2C', font=('Microsoft YaHei', 8))
+        detail.pack(anchor=tk.W)
+        
+        return {'frame': frame, 'bar': bar, 'title': title, 'detail': detail,
+                'state': ('#2C2C2C', "", "")}
 
 class StatusDashboard(ttk.Frame):
     """系统状态仪表盘 (右侧)"""
@@ -254,6 +325,7 @@ class StatusDashboard(ttk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         self.configure(style='Card.TFrame', padding=10)
+        self._pending_status = None
         
         ttk.Label(self, text="系统状态", style='CardTitle.TLabel').pack(anchor=tk.W, pady=(0, 10))
         
@@ -287,7 +359,15 @@ class StatusDashboard(ttk.Frame):
             children[1].winfo_children()[1].config(text=f"{monitor_count} 只")
             
     def draw_status(self, is_connected, status_text):
-        """绘制状态灯"""
+        """绘制状态灯 (短时间内的多次更新合并，只绘制最新一次)"""
+        scheduled = self._pending_status is not None
+        self._pending_status = (is_connected, status_text)
+        if not scheduled:
+            self.after(REDRAW_INTERVAL_MS, self._flush_status)
+            
+    def _flush_status(self):
+        is_connected, status_text = self._pending_status
+        self._pending_status = None
         self.status_canvas.delete("all")
         
         # 绿色/红色 呼吸灯效果
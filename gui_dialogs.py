@@ -9,60 +9,220 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
+import tkinter.font as tkfont
 import pandas as pd
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+try:
+    from matplotlib.backends import _backend_tk  # matplotlib 私有模块，不可用时退回 draw_idle
+except ImportError:
+    _backend_tk = None
 from matplotlib.figure import Figure
 import numpy as np
 from datetime import datetime, timedelta
 import json
+import pickle
+import re
+import threading
+from functools import partial
 
 from price_alert import alert_manager
 from trader import get_trader, HAS_TRADER
+from numba_utils import njit, HAS_NUMBA
 import config
 
-class TradeDialog:
+# 注意: 对话框构建/刷新过程中不要调用 update() (会处理全部挂起事件并强制重绘)，
+# 确需刷新布局时使用 update_idletasks()，图表重绘使用 canvas.draw_idle()
+
+# ETF 下拉框候选项 (代码列表 + 名称表中的代码，去重保序)，模块加载时构建一次
+_ETF_COMBO_VALUES = tuple(dict.fromkeys(list(config.ETF_LIST) + list(config.ETF_NAMES)))
+
+# 千分位分组 (整数字符串)
+_THOUSANDS_RE = re.compile(r'(\d)(?=(\d{3})+$)')
+
+# 共享字体对象: 各控件引用同一个 Font，避免每个控件各自解析字体描述
+_FONT_CACHE = {}
+
+def _font(size, weight='normal'):
+    """获取共享的 Microsoft YaHei 字体 (首次使用时创建，需已存在 Tk 根窗口)"""
+    key = (size, weight)
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        font = _FONT_CACHE[key] = tkfont.Font(family='Microsoft YaHei', size=size, weight=weight)
+    return font
+
+def _fmt_cny(yuan):
+    """整数金额加千分位: 1234567 -> '1,234,567'"""
+    return _THOUSANDS_RE.sub(r'\1,', str(yuan))
+
+# 序列长度超过该值才走 numba 内核 (短序列 NumPy 更快，也免去首次编译)
+_NUMBA_MIN_POINTS = 500
+
+@njit(cache=True, fastmath=True)
+def _bias_kernel(prices, window):
+    """滑动窗口求和计算 BIAS (numba 内核)"""
+    n = prices.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    for i in range(n):
+        total += prices[i]
+        if i >= window:
+            total -= prices[i - window]
+        if i >= window - 1:
+            ma = total / window
+            out[i] = (prices[i] - ma) / ma * 100
+    return out
+
+def compute_bias(prices, window=20):
+    """BIAS = (收盘价 - MA) / MA * 100，前 window-1 个点为 NaN"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if HAS_NUMBA and len(prices) > _NUMBA_MIN_POINTS:
+        return _bias_kernel(prices, window)
+    out = np.full(len(prices), np.nan)
+    if len(prices) >= window:
+        csum = np.cumsum(np.concatenate(([0.0], prices)))
+        ma = (csum[window:] - csum[:-window]) / window
+        out[window - 1:] = (prices[window - 1:] - ma) / ma * 100
+    return out
+
+# 可复用窗口缓存: (窗口类, 父窗口路径) -> 实例
+_WINDOW_CACHE = {}
+
+class _ReusableWindow:
+    """
+    关闭时隐藏而不销毁的窗口
+
+    通过 show() 打开时按 (类, 父窗口) 复用已有实例，省去重建整棵组件树；
+    子类可覆盖 _reset() 在复用前重置状态
+    """
+    _modal = True  # 显示时是否 grab_set
+
+    @classmethod
+    def show(cls, parent, *args, **kwargs):
+        """打开窗口 (优先复用已隐藏的实例)"""
+        key = (cls, str(parent))
+        window = _WINDOW_CACHE.get(key)
+        if window is not None and window.top.winfo_exists():
+            window._reset(*args, **kwargs)
+            window._present()
+        else:
+            window = _WINDOW_CACHE[key] = cls(parent, *args, **kwargs)
+        return window
+
+    @property
+    def top(self):
+        return self.dialog
+
+    def _reset(self, *args, **kwargs):
+        pass
+
+    def _present(self):
+        self.top.transient(self.parent)
+        self.top.deiconify()
+        if self._modal:
+            self.top.grab_set()
+
+    def _hide(self):
+        if self._modal:
+            self.top.grab_release()
+        self.top.withdraw()
+
+class TradeDialog(_ReusableWindow):
     """交易对话框"""
 
+    # 下单确认信息模板
+    _CONFIRM_TEMPLATE = """
+确认交易信息：
+
+ETF: %s (%s)
+方向: %s
+价格: ¥%.3f
+数量: %d股
+金额: ¥%s
+
+是否确认下单？
+            """
+
     def __init__(self, parent, etf_data=None):
         self.parent = parent
         self.etf_data = etf_data or {}
         self.result = None
+        self._calc_after_id = None
+        self._grid_text_shown = ""  # 网格建议框当前显示的内容
+        self._last_sugg_key = None  # 生成当前网格建议内容的数据摘要
+        self._orders_code = None    # _orders_by_dir 对应的ETF代码
+        self._orders_by_dir = {}    # 方向 -> 第一条该方向的网格建议
+        self._etf_display_name = (None, "")  # (代码, 显示名称)
 
         self.dialog = tk.Toplevel(parent)
+        self.dialog.withdraw()  # 组件全部创建完成后再显示，只做一次布局
         self.dialog.title("手动下单")
         self.dialog.geometry("500x400")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
 
         self.create_widgets()
 
+        self.dialog.protocol("WM_DELETE_WINDOW", self._hide)
+        self._present()
+
+    def _reset(self, etf_data=None):
+        """复用前清空上一次的输入"""
+        self.etf_data = etf_data or {}
+        self.result = None
+        self._orders_code = None
+        self._orders_by_dir = {}
+        self._etf_display_name = (None, "")
+        self._last_sugg_key = None
+
+        self.code_var.set("")
+        self.name_var.set("--")
+        self.price_var.set("--")
+        self.direction_var.set("BUY")
+        self.trade_price_var.set("")
+        self.volume_var.set("")
+        self._set_grid_text("")
+        # 上面清空输入会触发一次延迟计算；输入已清空，直接显示结果并取消挂起的计算
+        self._cancel_calculate()
+        self.amount_var.set("¥0")
+
+    def _hide(self):
+        """隐藏时取消挂起的金额计算 (避免隐藏后仍按上一次的输入写入金额)"""
+        self._cancel_calculate()
+        super()._hide()
+
+    def _cancel_calculate(self):
+        """取消挂起的 _do_calculate_amount"""
+        if self._calc_after_id is not None:
+            self.dialog.after_cancel(self._calc_after_id)
+            self._calc_after_id = None
+
     def create_widgets(self):
         """创建组件"""
         main_frame = ttk.Frame(self.dialog, padding="20")
         main_frame.pack(fill=tk.BOTH, expand=True)
 
         # ETF选择
-        ttk.Label(main_frame, text="ETF代码:", font=('Microsoft YaHei', 10)).grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="ETF代码:", font=_font(10)).grid(row=0, column=0, sticky=tk.W, pady=5)
 
         self.code_var = tk.StringVar()
         self.code_combo = ttk.Combobox(main_frame, textvariable=self.code_var, width=20)
-        self.code_combo['values'] = list(config.ETF_LIST) + list(config.ETF_NAMES.keys())
+        self.code_combo['values'] = _ETF_COMBO_VALUES
         self.code_combo.grid(row=0, column=1, sticky=tk.W, pady=5)
         self.code_combo.bind('<<ComboboxSelected>>', self.on_etf_selected)
 
         # 名称显示
-        ttk.Label(main_frame, text="ETF名称:", font=('Microsoft YaHei', 10)).grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="ETF名称:", font=_font(10)).grid(row=1, column=0, sticky=tk.W, pady=5)
         self.name_var = tk.StringVar(value="--")
         ttk.Label(main_frame, textvariable=self.name_var).grid(row=1, column=1, sticky=tk.W, pady=5)
 
         # 当前价格
-        ttk.Label(main_frame, text="当前价格:", font=('Microsoft YaHei', 10)).grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="当前价格:", font=_font(10)).grid(row=2, column=0, sticky=tk.W, pady=5)
         self.price_var = tk.StringVar(value="--")
         ttk.Label(main_frame, textvariable=self.price_var).grid(row=2, column=1, sticky=tk.W, pady=5)
 
         # 交易方向
-        ttk.Label(main_frame, text="交易方向:", font=('Microsoft YaHei', 10)).grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="交易方向:", font=_font(10)).grid(row=3, column=0, sticky=tk.W, pady=5)
 
         direction_frame = ttk.Frame(main_frame)
         direction_frame.grid(row=3, column=1, sticky=tk.W, pady=5)
@@ -72,12 +232,12 @@ class TradeDialog:
         ttk.Radiobutton(direction_frame, text="卖出", variable=self.direction_var, value="SELL").pack(side=tk.LEFT)
 
         # 交易价格
-        ttk.Label(main_frame, text="交易价格:", font=('Microsoft YaHei', 10)).grid(row=4, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="交易价格:", font=_font(10)).grid(row=4, column=0, sticky=tk.W, pady=5)
         self.trade_price_var = tk.StringVar()
         ttk.Entry(main_frame, textvariable=self.trade_price_var, width=20).grid(row=4, column=1, sticky=tk.W, pady=5)
 
         # 交易数量
-        ttk.Label(main_frame, text="交易数量:", font=('Microsoft YaHei', 10)).grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="交易数量:", font=_font(10)).grid(row=5, column=0, sticky=tk.W, pady=5)
         self.volume_var = tk.StringVar()
         volume_frame = ttk.Frame(main_frame)
         volume_frame.grid(row=5, column=1, sticky=tk.W, pady=5)
@@ -89,13 +249,13 @@ class TradeDialog:
         quick_volume_frame = ttk.Frame(main_frame)
         quick_volume_frame.grid(row=6, column=1, sticky=tk.W, pady=5)
 
-        ttk.Label(quick_volume_frame, text="快速:", font=('Microsoft YaHei', 9)).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(quick_volume_frame, text="快速:", font=_font(9)).pack(side=tk.LEFT, padx=(0, 5))
         for volume in [100, 500, 1000, 2000]:
             ttk.Button(quick_volume_frame, text=f"{volume}", width=8,
-                      command=lambda v=volume: self.volume_var.set(str(v))).pack(side=tk.LEFT, padx=2)
+                      command=partial(self.volume_var.set, str(volume))).pack(side=tk.LEFT, padx=2)
 
         # 交易金额
-        ttk.Label(main_frame, text="交易金额:", font=('Microsoft YaHei', 10)).grid(row=7, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="交易金额:", font=_font(10)).grid(row=7, column=0, sticky=tk.W, pady=5)
         self.amount_var = tk.StringVar(value="¥0")
         ttk.Label(main_frame, textvariable=self.amount_var).grid(row=7, column=1, sticky=tk.W, pady=5)
 
@@ -107,7 +267,9 @@ class TradeDialog:
         grid_frame = ttk.LabelFrame(main_frame, text="网格建议", padding="10")
         grid_frame.grid(row=8, column=0, columnspan=2, sticky=tk.W+tk.E, pady=10)
 
-        self.grid_text = tk.Text(grid_frame, height=6, width=50)
+        # 只读展示: 关闭撤销记录，平时保持 disabled，仅在更新内容时临时打开
+        self.grid_text = tk.Text(grid_frame, height=6, width=50, undo=False, autoseparators=False,
+                                 wrap='word', state='disabled')
         self.grid_text.pack(fill=tk.BOTH, expand=True)
 
         # 按钮栏
@@ -116,13 +278,15 @@ class TradeDialog:
 
         ttk.Button(button_frame, text="使用网格建议", command=self.use_grid_suggestion).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="确认下单", command=self.confirm_trade).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="取消", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="取消", command=self._hide).pack(side=tk.LEFT, padx=5)
 
     def on_etf_selected(self, event=None):
         """ETF选择事件"""
         code = self.code_var.get()
         name = config.ETF_NAMES.get(code, code)
+        self._etf_display_name = (code, name)
         self.name_var.set(name)
+        self._index_orders(code)
 
         # 更新当前价格
         if code in self.etf_data:
@@ -138,31 +302,62 @@ class TradeDialog:
         if code not in self.etf_data:
             return
 
-        self.grid_text.delete(1.0, tk.END)
-
         etf_info = self.etf_data[code]
         orders = etf_info.get('orders', [])
+        warnings = etf_info.get('warnings', [])
 
-        suggestion_text = f"ETF: {etf_info['name']} ({code})\n"
-        suggestion_text += f"当前价格: ¥{etf_info['price']:.3f}\n"
-        suggestion_text += f"市场状态: {etf_info['status']}\n\n"
+        # 数据与上次相同 (如键盘在下拉框中来回切换) 时不再重新拼接文本
+        key = (code, etf_info['name'], etf_info['price'], etf_info['status'],
+               tuple((o.direction, o.price, o.amount, o.desc) for o in orders),
+               tuple(warnings))
+        if key == self._last_sugg_key:
+            return
+
+        parts = [
+            f"ETF: {etf_info['name']} ({code})",
+            f"当前价格: ¥{etf_info['price']:.3f}",
+            f"市场状态: {etf_info['status']}",
+            "",
+        ]
 
         if orders:
-            suggestion_text += "网格建议:\n"
-            for i, order in enumerate(orders, 1):
-                icon = "🔵" if order.direction == 'BUY' else "🔴"
-                suggestion_text += f"{icon} {order.direction} {order.price:.3f} × {order.amount}股 ({order.desc})\n"
+            parts.append("网格建议:")
+            parts.extend(
+                f"{'🔵' if o.direction == 'BUY' else '🔴'} {o.direction} {o.price:.3f} × {o.amount}股 ({o.desc})"
+                for o in orders
+            )
         else:
-            suggestion_text += "暂无网格建议\n"
+            parts.append("暂无网格建议")
 
         # 添加警告信息
-        warnings = etf_info.get('warnings', [])
         if warnings:
-            suggestion_text += "\n⚠️ 风险提示:\n"
-            for warning in warnings:
-                suggestion_text += f"• {warning}\n"
+            parts.append("\n⚠️ 风险提示:")
+            parts.extend(f"• {warning}" for warning in warnings)
+
+        suggestion_text = '\n'.join(parts) + '\n'
+        self._set_grid_text(suggestion_text)
+        self._last_sugg_key = key
+
+    def _set_grid_text(self, text):
+        """更新网格建议框: 内容未变时跳过，否则只替换有变化的行"""
+        if text == self._grid_text_shown:
+            return
+
+        self.grid_text.configure(state='normal')
+        old_lines = self._grid_text_shown.split('\n')
+        new_lines = text.split('\n')
+        for i, (old, new) in enumerate(zip(old_lines, new_lines), 1):
+            if old != new:
+                self.grid_text.replace(f"{i}.0", f"{i}.end", new)
+
+        n_old, n_new = len(old_lines), len(new_lines)
+        if n_new > n_old:
+            self.grid_text.insert(f"{n_old}.end", '\n' + '\n'.join(new_lines[n_old:]))
+        elif n_new < n_old:
+            self.grid_text.delete(f"{n_new}.end", f"{n_old}.end")
+        self.grid_text.configure(state='disabled')
 
-        self.grid_text.insert(1.0, suggestion_text)
+        self._grid_text_shown = text
 
     def use_grid_suggestion(self):
         """使用网格建议"""
@@ -171,30 +366,46 @@ class TradeDialog:
             messagebox.showwarning("提示", "请先选择ETF")
             return
 
-        orders = self.etf_data[code].get('orders', [])
-        if not orders:
+        if code != self._orders_code:
+            self._index_orders(code)
+        if not self._orders_by_dir:
             messagebox.showinfo("提示", "暂无网格建议")
             return
 
         direction = self.direction_var.get()
-        matching_orders = [o for o in orders if o.direction == direction]
+        # 使用第一个匹配的订单
+        order = self._orders_by_dir.get(direction)
 
-        if matching_orders:
-            # 使用第一个匹配的订单
-            order = matching_orders[0]
+        if order:
             self.trade_price_var.set(f"{order.price:.3f}")
             self.volume_var.set(str(order.amount))
         else:
             messagebox.showinfo("提示", f"没有找到{direction}方向的网格建议")
 
+    def _index_orders(self, code):
+        """按方向索引该ETF的网格建议 (每个方向保留第一条)"""
+        self._orders_code = code
+        self._orders_by_dir = {}
+        for order in self.etf_data.get(code, {}).get('orders', []):
+            self._orders_by_dir.setdefault(order.direction, order)
+
     def calculate_amount(self, *args):
-        """计算交易金额"""
+        """计算交易金额 (输入连续变化时合并为一次计算)"""
+        if self._calc_after_id is not None:
+            self.dialog.after_cancel(self._calc_after_id)
+        self._calc_after_id = self.dialog.after(50, self._do_calculate_amount)
+
+    def _do_calculate_amount(self):
+        self._calc_after_id = None
+        if not self.dialog.winfo_exists():
+            return
         try:
             price = float(self.trade_price_var.get() or 0)
             volume = int(self.volume_var.get() or 0)
-            amount = price * volume
-            self.amount_var.set(f"¥{amount:,.0f}")
-        except ValueError:
+            # 价格最多3位小数: 按 厘 (1/1000 元) 做整数运算，再四舍五入到元
+            milli = int(round(price * 1000)) * volume
+            self.amount_var.set('¥' + _fmt_cny((milli + 500) // 1000))
+        except (ValueError, OverflowError):
             self.amount_var.set("¥0")
 
     def confirm_trade(self):
@@ -218,17 +429,13 @@ class TradeDialog:
                 return
 
             # 确认对话框
-            confirm_msg = f"""
-确认交易信息：
-
-ETF: {config.ETF_NAMES.get(code, code)} ({code})
-方向: {'买入' if direction == 'BUY' else '卖出'}
-价格: ¥{price:.3f}
-数量: {volume}股
-金额: ¥{price*volume:,.0f}
-
-是否确认下单？
-            """
+            cached_code, name = self._etf_display_name
+            if cached_code != code:
+                name = config.ETF_NAMES.get(code, code)
+            confirm_msg = self._CONFIRM_TEMPLATE % (
+                name, code, '买入' if direction == 'BUY' else '卖出',
+                price, volume, _fmt_cny(round(price * volume))
+            )
 
             if messagebox.askyesno("确认交易", confirm_msg):
                 # 执行交易
@@ -257,23 +464,26 @@ ETF: {config.ETF_NAMES.get(code, code)} ({code})
             if result.success:
                 messagebox.showinfo("成功", f"下单成功！\n订单号: {result.order_id}")
                 self.result = result
-                self.dialog.destroy()
+                self._hide()
             else:
                 messagebox.showerror("失败", f"下单失败: {result.message}")
 
         except Exception as e:
             messagebox.showerror("错误", f"执行交易失败: {e}")
 
-class SettingsDialog:
+class SettingsDialog(_ReusableWindow):
     """设置对话框"""
 
     def __init__(self, parent):
         self.parent = parent
+        # 策略参数输入框 (名称 -> Entry)，保存时再读取；策略页未打开过时为空
+        self.bias_entries = {}
+        self.position_entries = {}
+
         self.dialog = tk.Toplevel(parent)
+        self.dialog.withdraw()  # 组件全部创建完成后再显示，只做一次布局
         self.dialog.title("系统设置")
         self.dialog.geometry("600x500")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
 
         # 创建笔记本组件（标签页）
         self.notebook = ttk.Notebook(self.dialog)
@@ -287,36 +497,55 @@ class SettingsDialog:
 
         ttk.Button(button_frame, text="保存设置", command=self.save_settings).pack(side=tk.RIGHT, padx=5)
         ttk.Button(button_frame, text="重置默认", command=self.reset_settings).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(button_frame, text="取消", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="取消", command=self._hide).pack(side=tk.RIGHT, padx=5)
+
+        self.dialog.protocol("WM_DELETE_WINDOW", self._hide)
+        self._present()
+
+    def _reset(self):
+        """复用前丢弃未保存的修改：重建各标签页，控件恢复默认值"""
+        self._tab_builders = {}  # 先清空，删除标签页触发的切换事件不再构建旧页
+        self.bias_entries = {}
+        self.position_entries = {}
+        for tab in self.notebook.tabs():
+            self.notebook.nametowidget(tab).destroy()
+        self.create_tabs()
 
     def create_tabs(self):
-        """创建设置标签页"""
-        # 基础设置
-        self.create_basic_settings()
+        """创建设置标签页 (只立即构建第一页，其余页首次切换时再构建)"""
+        tabs = [
+            ("基础设置", self.create_basic_settings),
+            ("策略设置", self.create_strategy_settings),
+            ("提醒设置", self.create_alert_settings),
+            ("交易设置", self.create_trade_settings),
+        ]
 
-        # 策略设置
-        self.create_strategy_settings()
+        self._tab_builders = {}
+        for text, builder in tabs:
+            frame = ttk.Frame(self.notebook, padding="20")
+            self.notebook.add(frame, text=text)
+            self._tab_builders[str(frame)] = (builder, frame)
 
-        # 提醒设置
-        self.create_alert_settings()
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self._on_tab_changed()
 
-        # 交易设置
-        self.create_trade_settings()
+    def _on_tab_changed(self, event=None):
+        """切换到尚未构建的标签页时构建其内容"""
+        entry = self._tab_builders.pop(self.notebook.select(), None)
+        if entry:
+            builder, frame = entry
+            builder(frame)
 
-    def create_basic_settings(self):
+    def create_basic_settings(self, basic_frame):
         """创建基础设置页"""
-        basic_frame = ttk.Frame(self.notebook, padding="20")
-        self.notebook.add(basic_frame, text="基础设置")
 
         # 数据源设置
-        ttk.Label(basic_frame, text="数据源设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
+        ttk.Label(basic_frame, text="数据源设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
 
         ttk.Label(basic_frame, text="数据源类型:").pack(anchor=tk.W)
         self.data_source_var = tk.StringVar(value="akshare")
-        data_source_frame = ttk.Frame(basic_frame)
-        data_source_frame.pack(fill=tk.X, pady=(0, 10))
-        ttk.Radiobutton(data_source_frame, text="akshare (推荐)", variable=self.data_source_var, value="akshare").pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Radiobutton(data_source_frame, text="tushare", variable=self.data_source_var, value="tushare").pack(side=tk.LEFT)
+        ttk.Combobox(basic_frame, textvariable=self.data_source_var, values=["akshare", "tushare"],
+                     state='readonly', width=10).pack(anchor=tk.W, pady=(0, 10))
 
         # 刷新间隔
         ttk.Label(basic_frame, text="数据刷新间隔 (秒):").pack(anchor=tk.W, pady=(10, 0))
@@ -325,7 +554,7 @@ class SettingsDialog:
         ttk.Label(basic_frame, textvariable=self.refresh_interval_var).pack(anchor=tk.W)
 
         # 监控设置
-        ttk.Label(basic_frame, text="监控设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
+        ttk.Label(basic_frame, text="监控设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
 
         self.auto_start_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(basic_frame, text="启动时自动开始监控", variable=self.auto_start_var).pack(anchor=tk.W, pady=(0, 5))
@@ -334,25 +563,21 @@ class SettingsDialog:
         ttk.Checkbutton(basic_frame, text="显示系统托盘图标", variable=self.show_system_tray_var).pack(anchor=tk.W, pady=(0, 5))
 
         # 日志设置
-        ttk.Label(basic_frame, text="日志设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
+        ttk.Label(basic_frame, text="日志设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
 
         self.enable_log_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(basic_frame, text="启用日志记录", variable=self.enable_log_var).pack(anchor=tk.W, pady=(0, 5))
 
         ttk.Label(basic_frame, text="日志级别:").pack(anchor=tk.W)
         self.log_level_var = tk.StringVar(value="INFO")
-        log_level_frame = ttk.Frame(basic_frame)
-        log_level_frame.pack(fill=tk.X, pady=(0, 10))
-        for level in ["DEBUG", "INFO", "WARNING", "ERROR"]:
-            ttk.Radiobutton(log_level_frame, text=level, variable=self.log_level_var, value=level).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Combobox(basic_frame, textvariable=self.log_level_var, values=["DEBUG", "INFO", "WARNING", "ERROR"],
+                     state='readonly', width=10).pack(anchor=tk.W, pady=(0, 10))
 
-    def create_strategy_settings(self):
+    def create_strategy_settings(self, strategy_frame):
         """创建策略设置页"""
-        strategy_frame = ttk.Frame(self.notebook, padding="20")
-        self.notebook.add(strategy_frame, text="策略设置")
 
         # 网格策略设置
-        ttk.Label(strategy_frame, text="网格策略设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
+        ttk.Label(strategy_frame, text="网格策略设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
 
         # BIAS阈值设置
         ttk.Label(strategy_frame, text="BIAS阈值设置:").pack(anchor=tk.W, pady=(0, 5))
@@ -367,15 +592,15 @@ class SettingsDialog:
             ("减持区上限", 5)
         ]
 
-        self.bias_vars = {}
         for i, (name, default) in enumerate(thresholds):
             ttk.Label(bias_frame, text=f"{name}:").grid(row=i, column=0, sticky=tk.W, pady=2)
-            var = tk.DoubleVar(value=default)
-            self.bias_vars[name] = var
-            ttk.Entry(bias_frame, textvariable=var, width=10).grid(row=i, column=1, padx=10, pady=2)
+            entry = ttk.Spinbox(bias_frame, from_=-50, to=50, increment=0.5, width=10)
+            entry.insert(0, str(default))
+            entry.grid(row=i, column=1, padx=10, pady=2)
+            self.bias_entries[name] = entry
 
         # 目标仓位设置
-        ttk.Label(strategy_frame, text="目标仓位设置 (%):", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
+        ttk.Label(strategy_frame, text="目标仓位设置 (%):", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
 
         position_frame = ttk.Frame(strategy_frame)
         position_frame.pack(fill=tk.X, pady=(0, 10))
@@ -388,20 +613,18 @@ class SettingsDialog:
             ("逃亡区", 10)
         ]
 
-        self.position_vars = {}
         for i, (name, default) in enumerate(positions):
             ttk.Label(position_frame, text=f"{name}:").grid(row=i, column=0, sticky=tk.W, pady=2)
-            var = tk.IntVar(value=default)
-            self.position_vars[name] = var
-            ttk.Entry(position_frame, textvariable=var, width=10).grid(row=i, column=1, padx=10, pady=2)
+            entry = ttk.Spinbox(position_frame, from_=0, to=100, increment=5, width=10)
+            entry.insert(0, str(default))
+            entry.grid(row=i, column=1, padx=10, pady=2)
+            self.position_entries[name] = entry
 
-    def create_alert_settings(self):
+    def create_alert_settings(self, alert_frame):
         """创建提醒设置页"""
-        alert_frame = ttk.Frame(self.notebook, padding="20")
-        self.notebook.add(alert_frame, text="提醒设置")
 
         # 价格提醒
-        ttk.Label(alert_frame, text="价格提醒设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
+        ttk.Label(alert_frame, text="价格提醒设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
 
         self.enable_price_alert_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(alert_frame, text="启用价格提醒", variable=self.enable_price_alert_var).pack(anchor=tk.W, pady=(0, 5))
@@ -424,7 +647,7 @@ class SettingsDialog:
         ttk.Label(frequency_frame, textvariable=self.alert_interval_var).pack(anchor=tk.W)
 
         # 提醒历史
-        ttk.Label(alert_frame, text="提醒历史设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
+        ttk.Label(alert_frame, text="提醒历史设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
 
         ttk.Label(alert_frame, text="历史记录保留天数:").pack(anchor=tk.W, pady=(0, 5))
         self.history_days_var = tk.IntVar(value=7)
@@ -432,13 +655,11 @@ class SettingsDialog:
 
         ttk.Button(alert_frame, text="清理历史记录", command=self.clear_alert_history).pack(anchor=tk.W)
 
-    def create_trade_settings(self):
+    def create_trade_settings(self, trade_frame):
         """创建交易设置页"""
-        trade_frame = ttk.Frame(self.notebook, padding="20")
-        self.notebook.add(trade_frame, text="交易设置")
 
         # 交易服务设置
-        ttk.Label(trade_frame, text="交易服务设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
+        ttk.Label(trade_frame, text="交易服务设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
 
         self.enable_auto_trade_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(trade_frame, text="启用自动交易 (谨慎使用)", variable=self.enable_auto_trade_var).pack(anchor=tk.W, pady=(0, 5))
@@ -448,7 +669,7 @@ class SettingsDialog:
         ttk.Entry(trade_frame, textvariable=self.account_id_var, width=30).pack(anchor=tk.W, pady=(0, 10))
 
         # 风控设置
-        ttk.Label(trade_frame, text="风控设置", font=('Microsoft YaHei', 12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
+        ttk.Label(trade_frame, text="风控设置", font=_font(12, 'bold')).pack(anchor=tk.W, pady=(20, 10))
 
         self.enable_risk_control_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(trade_frame, text="启用风险控制", variable=self.enable_risk_control_var).pack(anchor=tk.W, pady=(0, 5))
@@ -464,9 +685,16 @@ class SettingsDialog:
     def save_settings(self):
         """保存设置"""
         try:
+            # 只校验策略参数 (Spinbox 只约束上下箭头，手动输入无效时抛出 ValueError)；
+            # 保存逻辑尚未实现，校验后不保留数值
+            for entry in self.bias_entries.values():
+                float(entry.get())
+            for entry in self.position_entries.values():
+                int(entry.get())
+
             # TODO: 实现设置保存逻辑
             messagebox.showinfo("成功", "设置已保存")
-            self.dialog.destroy()
+            self._hide()
         except Exception as e:
             messagebox.showerror("错误", f"保存设置失败: {e}")
 
@@ -485,26 +713,57 @@ class SettingsDialog:
             except Exception as e:
                 messagebox.showerror("错误", f"清理失败: {e}")
 
-class AnalysisWindow:
+class AnalysisWindow(_ReusableWindow):
     """数据分析窗口"""
 
-    def __init__(self, parent):
+    _modal = False
+
+    def __init__(self, parent, etf_data=None):
         self.parent = parent
+        self.etf_data = etf_data or {}
+        self.canvas = None
         self.window = tk.Toplevel(parent)
+        self.window.withdraw()  # 组件全部创建完成后再显示，只做一次布局
         self.window.title("数据分析")
         self.window.geometry("1000x700")
-        self.window.transient(parent)
+
+        # 后台渲染 / 导出进行中再次刷新只做标记，结束后补一次 (不堆积后台线程)
+        self._rendering = False
+        self._refresh_pending = False
 
         self.create_widgets()
 
+        self.window.protocol("WM_DELETE_WINDOW", self._hide)
+        self._present()
+
+    @property
+    def top(self):
+        return self.window
+
+    def _reset(self, etf_data=None):
+        """复用窗口时换上最新数据"""
+        if etf_data is not None:
+            self.etf_data = etf_data
+        self.refresh_data()
+
     def create_widgets(self):
         """创建组件"""
         # 创建主框架
         main_frame = ttk.Frame(self.window, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
 
-        # 创建图表
-        self.create_charts(main_frame)
+        # 图表构建较慢，先显示窗口，空闲时再创建图表
+        self._loading_label = ttk.Label(main_frame, text="图表加载中...")
+        self._loading_label.pack(expand=True)
+        self.window.after_idle(self._build_charts, main_frame)
+
+    def _build_charts(self, parent):
+        """替换加载提示为图表"""
+        if not self.window.winfo_exists():
+            return
+        self._loading_label.destroy()
+        self.create_charts(parent)
+        self.refresh_data()
 
     def create_charts(self, parent):
         """创建图表"""
@@ -537,9 +796,19 @@ class AnalysisWindow:
         self.ax4.set_xlabel('ETF')
         self.ax4.set_ylabel('盈亏 (¥)')
 
-        # 创建canvas
+        for ax in (self.ax1, self.ax2):
+            ax.xaxis_date()
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+
+        # 图元只创建一次，刷新时 set_data / set_height 更新数据
+        self._price_lines = {}  # code -> Line2D
+        self._bias_lines = {}
+        self._bar_codes = None  # None 表示柱子尚未创建 (数据为空时也要先建一次)
+        self._position_bars = None
+        self._pnl_bars = None
+
+        # 创建canvas (首帧由 refresh_data 在后台渲染)
         self.canvas = FigureCanvasTkAgg(self.fig, parent)
-        self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
         # 添加工具栏
@@ -549,17 +818,174 @@ class AnalysisWindow:
         ttk.Button(toolbar_frame, text="刷新数据", command=self.refresh_data).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(toolbar_frame, text="导出图表", command=self.export_chart).pack(side=tk.LEFT, padx=5, pady=5)
 
+        # 导出进度 (导出时才显示)
+        self._export_progress = ttk.Progressbar(toolbar_frame, mode='indeterminate', length=120)
+
     def refresh_data(self):
         """刷新数据"""
-        # TODO: 实现数据刷新逻辑
-        messagebox.showinfo("提示", "数据刷新功能待实现")
+        if self._rendering:
+            # 上一帧还在后台渲染，等渲染完成后再刷新
+            self._refresh_pending = True
+            return
+        if self.canvas is None:
+            return  # 图表尚未创建，创建完成后会刷新
+
+        codes = tuple(code for code, data in self.etf_data.items() if data)
+        self._update_series(codes)
+        self._update_bars(codes)
+
+        for ax in (self.ax1, self.ax2, self.ax3, self.ax4):
+            ax.relim()
+            ax.autoscale_view()
+        self._render_async()
+
+    def _series_line(self, lines, ax, code):
+        """获取 code 对应的曲线 (首次出现时创建)"""
+        line = lines.get(code)
+        if line is None:
+            label = self.etf_data[code].get('name', code)
+            line, = ax.plot([], [], linewidth=1, label=label)
+            lines[code] = line
+            ax.legend(loc='upper left', fontsize=8)
+        return line
+
+    def _update_series(self, codes):
+        """更新价格 / BIAS 走势曲线"""
+        for lines in (self._price_lines, self._bias_lines):
+            for code, line in lines.items():
+                if code not in codes:
+                    line.set_data([], [])
+
+        for code in codes:
+            df = self.etf_data[code].get('df')
+            if df is None or df.empty:
+                continue
+            x = mdates.date2num(df.index)
+            close = df['close'].to_numpy(dtype=float)
+            self._series_line(self._price_lines, self.ax1, code).set_data(x, close)
+            # 指标已算好时直接取用，否则按收盘价现算
+            if 'bias_20' in df.columns:
+                bias = df['bias_20'].to_numpy(dtype=float)
+            else:
+                bias = compute_bias(close, 20)
+            self._series_line(self._bias_lines, self.ax2, code).set_data(x, bias)
+
+    def _update_bars(self, codes):
+        """更新仓位 / 盈亏柱状图"""
+        n = len(codes)
+        holdings = [self.etf_data[code].get('holdings') or {} for code in codes]
+        volume = np.fromiter((h.get('volume', 0) for h in holdings), dtype=float, count=n)
+        avg_cost = np.fromiter((h.get('avg_cost', 0) for h in holdings), dtype=float, count=n)
+        price = np.fromiter((self.etf_data[code].get('price') or 0 for code in codes), dtype=float, count=n)
+
+        value = volume * price
+        total = value.sum()
+        position_pct = value / total * 100 if total > 0 else np.zeros(n)
+        pnl = np.where(volume > 0, (price - avg_cost) * volume, 0.0)
+        pnl_colors = np.where(pnl >= 0, '#ef5350', '#26a69a')  # 红涨绿跌
+
+        if codes != self._bar_codes:
+            # ETF 列表变化时才重建柱子
+            for bars in (self._position_bars, self._pnl_bars):
+                if bars is not None:
+                    bars.remove()
+            x = np.arange(n)
+            names = [self.etf_data[code].get('name', code) for code in codes]
+            self._position_bars = self.ax3.bar(x, position_pct, color='#42a5f5')
+            self._pnl_bars = self.ax4.bar(x, pnl, color=pnl_colors)
+            for ax in (self.ax3, self.ax4):
+                ax.set_xticks(x)
+                ax.set_xticklabels(names, rotation=30, fontsize=8)
+            self._bar_codes = codes
+            return
+
+        for rect, height in zip(self._position_bars, position_pct):
+            rect.set_height(height)
+        for rect, height, color in zip(self._pnl_bars, pnl, pnl_colors):
+            rect.set_height(height)
+            rect.set_color(color)
+
+    def _render_async(self):
+        """在后台线程栅格化图表的副本，完成后回到 Tk 线程贴图"""
+        self._rendering = True
+        # 界面上的 Figure 只在 Tk 线程中使用 (缩放时 Tk 后端会直接重绘它)；
+        # 这里在 Tk 线程序列化当前状态，后台线程渲染反序列化出的独立副本
+        snapshot = pickle.dumps(self.fig)
+        threading.Thread(target=self._render_worker, args=(snapshot,), daemon=True).start()
+
+    def _render_worker(self, snapshot):
+        """把图表副本渲染到自己的 Agg 画布 (不触碰界面上的 Figure 与 Tk 组件)"""
+        buffer = None
+        try:
+            canvas = FigureCanvasAgg(pickle.loads(snapshot))
+            canvas.draw()
+            buffer = canvas.buffer_rgba()
+        finally:
+            self.window.after(0, self._blit_from_agg, buffer)
+
+    def _blit_from_agg(self, buffer):
+        """把渲染好的像素缓冲区拷贝到 Tk 画布"""
+        self._rendering = False
+        if not self.window.winfo_exists():
+            return
+        width, height = self.fig.bbox.size
+        tkphoto = getattr(self.canvas, '_tkphoto', None)
+        if (buffer is None or _backend_tk is None or tkphoto is None
+                or buffer.shape[:2] != (round(height), round(width))):
+            # 渲染失败、渲染期间窗口尺寸已变化或私有贴图接口不可用: 由 Tk 线程直接重绘
+            self.canvas.draw_idle()
+        else:
+            try:
+                _backend_tk.blit(tkphoto, buffer, (0, 1, 2, 3))
+            except (AttributeError, TypeError, tk.TclError):
+                self.canvas.draw_idle()
+        self._flush_pending_refresh()
+
+    def _flush_pending_refresh(self):
+        """补做后台线程占用图表期间被推迟的刷新"""
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self.refresh_data()
 
     def export_chart(self):
-        """导出图表"""
+        """导出图表 (后台线程渲染文件，界面不卡顿)"""
+        if self._rendering:
+            messagebox.showinfo("提示", "图表正在刷新，请稍后再导出")
+            return
+        # 导出的是此刻图表的副本 (在 Tk 线程序列化)，后台线程不接触界面上的 Figure
+        snapshot = pickle.dumps(self.fig)
         filename = filedialog.asksaveasfilename(
             defaultextension=".png",
             filetypes=[("PNG文件", "*.png"), ("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
-        if filename:
-            self.fig.savefig(filename)
-            messagebox.showinfo("成功", f"图表已导出到: {filename}")
\ No newline at end of file
+        if not filename:
+            return
+
+        self._rendering = True
+        self._export_progress.pack(side=tk.LEFT, padx=5, pady=5)
+        self._export_progress.start(10)
+        threading.Thread(target=self._export_worker, args=(snapshot, filename), daemon=True).start()
+
+    def _export_worker(self, snapshot, filename):
+        """后台线程: 在独立的 Agg 画布上渲染图表副本并写出文件"""
+        error = None
+        try:
+            fig = pickle.loads(snapshot)
+            FigureCanvasAgg(fig)
+            fig.savefig(filename, dpi=100, bbox_inches='tight')
+        except Exception as e:
+            error = e
+        self.window.after(0, self._on_export_done, filename, error)
+
+    def _on_export_done(self, filename, error):
+        """导出结束: 收起进度条并提示结果"""
+        self._rendering = False
+        if not self.window.winfo_exists():
+            return
+        self._export_progress.stop()
+        self._export_progress.pack_forget()
+        if error is not None:
+            messagebox.showerror("错误", f"导出失败: {error}")
+        else:
+            messagebox.showinfo("成功", f"图表已导出到: {filename}")
+        self._flush_pending_refresh()
\ No newline at end of file
@@ -11,19 +11,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import queue
 import json
 import os
 
-from data_manager import get_data_manager
-from strategy import GridStrategy
-from indicators import calculate_indicators
 from price_alert import alert_manager
 from trader import get_trader, HAS_TRADER
 import config
 
+# 行情轮询间隔 (秒): 交易时段默认 5 秒；价格连续多轮不变后翻倍退避，
+# 上限与非交易时段间隔均为 MONITOR_CONFIG.REFRESH_INTERVAL_IDLE
+POLL_INTERVAL = 5
+POLL_BACKOFF_ROUNDS = 3
+
 class NotificationQueue:
     """通知队列管理"""
     def __init__(self):
@@ -32,9 +34,10 @@ class NotificationQueue:
     def put(self, message, level="info"):
         self.queue.put((message, level))
 
-    def get(self):
+    def get(self, timeout=None):
+        """阻塞等待下一条通知，超时返回 None"""
         try:
-            return self.queue.get_nowait()
+            return self.queue.get(timeout=timeout)
         except queue.Empty:
             return None
 
@@ -51,13 +54,18 @@ class GridTraderGUI:
         self.setup_styles()
 
         # 核心组件
-        self.data_manager = get_data_manager()
-        self.strategy = GridStrategy()
+        # 行情 / 策略依赖 pandas、numpy，导入较慢，由数据线程创建 (见 _load_engine)，窗口先显示
+        self.data_manager = None
+        self.strategy = None
         self.notif_queue = NotificationQueue()
         self.running = True
+        self._refresh_event = threading.Event()  # 手动刷新 / 退出时唤醒数据线程
+        # 各ETF历史行情并发获取 (网络 I/O 为主，线程即可)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='etf-history')
 
         # 数据存储
         self.etf_data = {}
+        self._indicator_state = {}  # code -> 上一次计算的指标 DataFrame (用于增量计算)
         self.alerts_history = []
         self.last_update = None
 
@@ -211,6 +219,9 @@ class GridTraderGUI:
         # 创建Treeview
         columns = ('code', 'name', 'price', 'bias', 'status', 'position', 'value', 'orders', 'alerts')
         self.etf_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=15)
+        self._tree_iids = {}    # code -> 行 iid (行只创建一次，刷新时原位更新)
+        self._tree_values = {}  # code -> 当前显示的 values
+        self._tree_update_pending = False
 
         # 设置列标题和宽度
         column_configs = {
@@ -283,6 +294,7 @@ class GridTraderGUI:
 
         self.alert_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0), pady=10)
         alert_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 10), pady=10)
+        self._last_alert_hash = None  # 当前显示的提醒内容，未变化时不重绘
 
         # 快速操作面板
         action_frame = ttk.LabelFrame(parent, text="⚡ 快速操作", style='Card.TFrame')
@@ -309,6 +321,7 @@ class GridTraderGUI:
                                          bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
                                          font=('Consolas', 9))
         self.system_status_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self._last_status_text = None
 
     def create_status_bar(self):
         """创建底部状态栏"""
@@ -333,49 +346,123 @@ class GridTraderGUI:
         self.notif_thread = threading.Thread(target=self.notification_loop, daemon=True)
         self.notif_thread.start()
 
+    def _load_engine(self):
+        """导入行情 / 策略模块并创建实例 (在数据线程中执行，不阻塞界面启动)"""
+        from data_manager import get_data_manager
+        from strategy import GridStrategy
+
+        self.data_manager = get_data_manager()
+        self.strategy = GridStrategy()
+
     def data_update_loop(self):
-        """数据更新循环"""
+        """数据更新循环 (非交易时段或价格长时间不变时放慢轮询)"""
+        try:
+            self._load_engine()
+        except Exception as e:
+            # 依赖缺失 (如 cachetools / pyarrow) 等导致无法加载时，在界面上提示而不是让线程静默退出
+            self.notif_queue.put(f"行情 / 策略模块加载失败: {e}", "error")
+            return
+
+        last_prices = None
+        unchanged_rounds = 0
         while self.running:
             try:
                 self.update_data()
-                time.sleep(5)  # 5秒更新一次
+                prices = tuple((code, data['price']) for code, data in self.etf_data.items())
+                unchanged_rounds = unchanged_rounds + 1 if prices == last_prices else 0
+                last_prices = prices
+                delay = self._poll_delay(unchanged_rounds)
             except Exception as e:
                 self.notif_queue.put(f"数据更新失败: {e}", "error")
-                time.sleep(10)
+                delay = 10
+
+            # 等待下一轮；手动刷新时立即开始并恢复正常间隔
+            if self._refresh_event.wait(delay):
+                self._refresh_event.clear()
+                unchanged_rounds = 0
+
+    def _poll_delay(self, unchanged_rounds):
+        """下一轮轮询前的等待秒数"""
+        idle_interval = config.MONITOR_CONFIG.REFRESH_INTERVAL_IDLE
+        if not self._is_trading_time():
+            return idle_interval
+        if unchanged_rounds < POLL_BACKOFF_ROUNDS:
+            return POLL_INTERVAL
+        return min(POLL_INTERVAL * 2 ** (unchanged_rounds - POLL_BACKOFF_ROUNDS + 1), idle_interval)
+
+    @staticmethod
+    def _is_trading_time():
+        """是否在交易时段 (工作日 TRADING_START ~ TRADING_END)"""
+        now = datetime.now()
+        if now.weekday() >= 5:
+            return False
+        current_time = now.strftime("%H:%M")
+        return config.MONITOR_CONFIG.TRADING_START <= current_time <= config.MONITOR_CONFIG.TRADING_END
 
     def notification_loop(self):
         """通知处理循环"""
         while self.running:
-            notif = self.notif_queue.get()
+            # 阻塞等待: 有通知立即处理，空闲时不轮询；超时只为检查 running
+            notif = self.notif_queue.get(timeout=1.0)
             if notif:
                 message, level = notif
                 self.show_notification(message, level)
-            time.sleep(0.5)
 
     def update_data(self):
         """更新数据"""
+        from indicators import calculate_indicators_batch, step_indicators
+
         try:
             total_value = 0
             total_profit = 0
 
-            for code in config.ETF_LIST:
-                # 获取数据
-                df = self.data_manager.get_history(code, count=50)
+            # 循环内反复用到的属性先绑定到局部变量
+            etf_names = config.ETF_NAMES
+            real_holdings = config.REAL_HOLDINGS
+            get_history = self.data_manager.get_history
+            analyze = self.strategy.analyze
+            notif_put = self.notif_queue.put
+
+            # 获取数据 (并发请求，总耗时取决于最慢的一只而不是各只之和)
+            submit = self._fetch_executor.submit
+            futures = {code: submit(get_history, code, count=50) for code in config.ETF_LIST}
+            frames = {}
+            for code, future in futures.items():
+                try:
+                    df = future.result()
+                except Exception as e:
+                    # 单只获取失败只跳过该ETF，不中断本轮更新
+                    notif_put(f"{code} 数据获取失败: {e}", "error")
+                    continue
                 if df is None or df.empty:
                     continue
-
-                # 计算指标
-                df = calculate_indicators(df)
-
+                frames[code] = df
+
+            # 计算指标: 只有最后一根K线变化的增量更新，其余 (首次 / 新K线) 一次批量全量计算
+            stale = {}
+            for code, df in frames.items():
+                result = step_indicators(df, self._indicator_state.get(code))
+                if result is None:
+                    stale[code] = df
+                else:
+                    frames[code] = result
+            frames.update(zip(stale, calculate_indicators_batch(list(stale.values()))))
+            self._indicator_state.update(frames)
+
+            codes = []
+            prices = []
+            orders_matrix = []
+            entries = {}
+            for code, df in frames.items():
                 # 获取持仓
-                holdings = config.REAL_HOLDINGS.get(code, {
+                holdings = real_holdings.get(code, {
                     'volume': 0, 'available': 0, 'avg_cost': 0
                 })
 
                 # 策略分析
-                plan = self.strategy.analyze(code, df, holdings)
+                plan = analyze(code, df, holdings)
 
-                # 检测价格提醒
+                # 收集价格提醒的检测数据 (循环结束后所有ETF一次批量检测)
                 orders_data = [
                     {
                         'direction': o.direction,
@@ -385,19 +472,12 @@ class GridTraderGUI:
                     } for o in plan.suggested_orders
                 ]
 
-                last = df.iloc[-1]
-                current_price = float(last['close'])
+                current_price = float(df['close'].values[-1])
 
-                new_alerts = alert_manager.check_price_alerts(
-                    code=code,
-                    name=config.ETF_NAMES.get(code, code),
-                    current_price=current_price,
-                    suggested_orders=orders_data
-                )
-
-                # 添加提醒到队列
-                for alert in new_alerts:
-                    self.notif_queue.put(alert.message, "info")
+                name = etf_names.get(code, code)
+                codes.append(code)
+                prices.append(current_price)
+                orders_matrix.append(orders_data)
 
                 # 计算市值
                 vol = holdings.get('volume', 0)
@@ -407,19 +487,32 @@ class GridTraderGUI:
                 if cost > 0 and vol > 0:
                     total_profit += (current_price - cost) * vol
 
-                # 更新ETF数据
-                self.etf_data[code] = {
+                # ETF数据 (先放在局部字典里，检测完提醒后再整体替换)
+                entries[code] = {
                     'code': code,
-                    'name': config.ETF_NAMES.get(code, code),
+                    'name': name,
                     'price': current_price,
                     'bias': float(plan.current_bias),
                     'status': plan.market_status,
                     'holdings': holdings,
                     'orders': plan.suggested_orders,
                     'warnings': plan.warnings,
-                    'new_alerts': len(new_alerts)
+                    'new_alerts': 0
                 }
 
+            # 检测价格提醒
+            alerts_by_code = alert_manager.check_price_alerts_bulk(
+                codes, prices, orders_matrix, names=etf_names)
+            for code, new_alerts in alerts_by_code.items():
+                entries[code]['new_alerts'] = len(new_alerts)
+
+                # 添加提醒到队列
+                for alert in new_alerts:
+                    notif_put(alert.message, "info")
+
+            # 更新ETF数据 (每只ETF一次赋值新字典，界面线程不会读到更新一半的记录)
+            self.etf_data.update(entries)
+
             # 更新界面
             self.root.after(0, self.update_ui, total_value, total_profit)
 
@@ -442,7 +535,7 @@ class GridTraderGUI:
             self.summary_vars['position_pct'].set(f"{total_value/config.TOTAL_CAPITAL*100:.1f}%")
 
             # 更新ETF表格
-            self.update_etf_tree()
+            self.schedule_etf_tree_update()
 
             # 更新提醒文本
             self.update_alert_text()
@@ -453,13 +546,26 @@ class GridTraderGUI:
         except Exception as e:
             print(f"UI更新错误: {e}")
 
+    def schedule_etf_tree_update(self):
+        """
+        合并表格刷新: 空闲前的多次刷新请求 (定时更新 + 手动刷新) 只执行一次
+        """
+        if self._tree_update_pending:
+            return
+        self._tree_update_pending = True
+        self.root.after_idle(self._flush_etf_tree_update)
+
+    def _flush_etf_tree_update(self):
+        self._tree_update_pending = False
+        self.update_etf_tree()
+
     def update_etf_tree(self):
-        """更新ETF表格"""
-        # 清空现有数据
-        for item in self.etf_tree.get_children():
-            self.etf_tree.delete(item)
+        """更新ETF表格 (按代码复用已有行，只更新内容变化的行)"""
+        # 移除已不在监控列表中的行
+        for code in self._tree_iids.keys() - self.etf_data.keys():
+            self.etf_tree.delete(self._tree_iids.pop(code))
+            self._tree_values.pop(code, None)
 
-        # 添加新数据
         for code, data in self.etf_data.items():
             holdings = data['holdings']
             orders = data['orders']
@@ -478,8 +584,7 @@ class GridTraderGUI:
             # 提醒信息
             alert_info = f"🔔{data['new_alerts']}" if data['new_alerts'] > 0 else ""
 
-            # 插入数据
-            self.etf_tree.insert('', tk.END, values=(
+            values = (
                 code,
                 data['name'],
                 f"{data['price']:.3f}",
@@ -489,7 +594,15 @@ class GridTraderGUI:
                 f"¥{market_value:,.0f}",
                 ' '.join(order_info),
                 alert_info
-            ))
+            )
+
+            # 新ETF插入一行；已有行内容没变时不调用 item()，每次调用都要走一趟 Tcl
+            iid = self._tree_iids.get(code)
+            if iid is None:
+                self._tree_iids[code] = self.etf_tree.insert('', tk.END, values=values)
+            elif self._tree_values.get(code) != values:
+                self.etf_tree.item(iid, values=values)
+            self._tree_values[code] = values
 
     def update_alert_text(self):
         """更新提醒文本"""
@@ -497,6 +610,12 @@ class GridTraderGUI:
             # 获取最近的提醒
             recent_alerts = alert_manager.get_recent_alerts(hours=24)
 
+            # 最近10条没有变化时不重绘 (避免每次刷新清空重插导致闪烁、滚动位置丢失)
+            h = hash(tuple((a.timestamp, a.message) for a in recent_alerts[-10:]))
+            if h == self._last_alert_hash:
+                return
+            self._last_alert_hash = h
+
             self.alert_text.delete(1.0, tk.END)
 
             if recent_alerts:
@@ -516,7 +635,7 @@ class GridTraderGUI:
             status_info = []
 
             # 数据源状态
-            data_source = self.data_manager.get_data_source()
+            data_source = self.data_manager.get_data_source() if self.data_manager else "未加载"
             status_info.append(f"📊 数据源: {data_source}")
 
             # 策略状态
@@ -537,8 +656,13 @@ class GridTraderGUI:
             # ETF数量
             status_info.append(f"📈 监控ETF: {len(self.etf_data)}只")
 
+            text = '\n'.join(status_info)
+            if text == self._last_status_text:
+                return
+            self._last_status_text = text
+
             self.system_status_text.delete(1.0, tk.END)
-            self.system_status_text.insert(tk.END, '\n'.join(status_info))
+            self.system_status_text.insert(tk.END, text)
 
         except Exception as e:
             print(f"更新系统状态错误: {e}")
@@ -558,9 +682,9 @@ class GridTraderGUI:
         self.root.after(0, update)
 
     def manual_refresh(self):
-        """手动刷新"""
+        """手动刷新 (唤醒数据线程立即更新)"""
         self.status_text.set("正在刷新数据...")
-        threading.Thread(target=self.update_data, daemon=True).start()
+        self._refresh_event.set()
 
     def on_etf_double_click(self, event):
         """ETF双击事件"""
@@ -660,6 +784,8 @@ BIAS-ATR 智能网格交易系统
         """关闭程序"""
         if messagebox.askokcancel("退出", "确定要退出程序吗？"):
             self.running = False
+            self._refresh_event.set()
+            self._fetch_executor.shutdown(wait=False)
             self.root.destroy()
 
     def run(self):
@@ -11,9 +11,21 @@ import os
 from datetime import datetime
 from typing import Dict, Optional
 
+# 尝试导入 orjson (C 实现的 JSON 编解码，读写更快)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    print("[WARN] orjson 未安装，使用标准库 json 读写持仓 (pip install orjson)")
+
 # 持仓数据文件路径
 HOLDINGS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'holdings.json')
 
+# 上次加载时文件的 (mtime, size) 与解析结果，文件未变化时直接复用
+_last_mtime = None
+_cached_holdings: Dict = {}
+
 
 def _ensure_data_dir():
     """确保 data 目录存在"""
@@ -22,6 +34,20 @@ def _ensure_data_dir():
         os.makedirs(data_dir)
 
 
+def _dumps(data: Dict) -> bytes:
+    """序列化为 UTF-8 编码、2 空格缩进的 JSON"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _loads(raw: bytes) -> Dict:
+    """解析 JSON 字节串"""
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_holdings() -> Dict:
     """
     从本地文件加载持仓数据
@@ -29,14 +55,22 @@ def load_holdings() -> Dict:
     Returns:
         持仓字典 {code: {volume, avg_cost, available}}
     """
+    global _last_mtime, _cached_holdings
+
     _ensure_data_dir()
     
     if os.path.exists(HOLDINGS_FILE):
         try:
-            with open(HOLDINGS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"[DATA] 已加载本地持仓数据: {len(data.get('holdings', {}))} 只ETF")
-                return data.get('holdings', {})
+            st = os.stat(HOLDINGS_FILE)
+            mtime = (st.st_mtime_ns, st.st_size)
+            if mtime != _last_mtime:
+                with open(HOLDINGS_FILE, 'rb') as f:
+                    data = _loads(f.read())
+                _cached_holdings = data.get('holdings', {})
+                _last_mtime = mtime
+                print(f"[DATA] 已加载本地持仓数据: {len(_cached_holdings)} 只ETF")
+            # 返回副本，调用方修改结果不会污染缓存
+            return {code: dict(holding) for code, holding in _cached_holdings.items()}
         except Exception as e:
             print(f"[WARN] 加载持仓数据失败: {e}")
     
@@ -60,8 +94,11 @@ def save_holdings(holdings: Dict) -> bool:
             'holdings': holdings,
             'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        with open(HOLDINGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # 先写临时文件再原子替换，写入中途崩溃也不会留下半个文件
+        tmp_file = HOLDINGS_FILE + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(_dumps(data))
+        os.replace(tmp_file, HOLDINGS_FILE)
         print(f"[SAVE] 持仓数据已保存")
         return True
     except Exception as e:
@@ -1,7 +1,30 @@
 # indicators.py
+from typing import List, Optional
+
 import pandas as pd
 import numpy as np
 
+from numba_utils import HAS_NUMBA
+from indicators_numba import compute_indicators, compute_indicators_batch, compute_last_bar
+
+# 尝试导入预编译的 Cython 内核 (需先执行 cythonize -i indicators_cy.pyx；未安装 numba 时使用)
+try:
+    from indicators_cy import compute_indicators as _compute_indicators_cy
+    HAS_CYTHON_KERNEL = True
+except ImportError:
+    HAS_CYTHON_KERNEL = False
+
+# 尝试导入 bottleneck (numba / Cython 内核都不可用时用于加速 pandas 实现中的滑动窗口)
+try:
+    import bottleneck as bn
+    HAS_BOTTLENECK = True
+except ImportError:
+    HAS_BOTTLENECK = False
+    if not HAS_NUMBA and not HAS_CYTHON_KERNEL:
+        print("[WARN] numba / bottleneck 均未安装，指标计算使用 pandas rolling (pip install numba)")
+
+_INDICATOR_COLUMNS = ['ma_5', 'ma_20', 'bias_20', 'atr_14', 'rsi_14', 'kdj_k', 'kdj_d', 'kdj_j']
+
 def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
     计算策略所需的核心指标: MA_5, MA_20, BIAS_20, ATR_14
@@ -12,14 +35,144 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         添加了 'ma_5', 'ma_20', 'bias_20', 'atr_14' 列的 DataFrame
     """
-    # 确保数据按时间升序排列
-    df = df.sort_index()
+    # 确保数据按时间升序排列 (已升序时不复制；各分支都不修改传入的 df)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
+    if HAS_NUMBA:
+        # 已安装 numba: 单次内核调用算出全部指标，免去逐个 rolling / ewm 的 pandas 开销
+        results = compute_indicators(
+            _price_array(df['high']),
+            _price_array(df['low']),
+            _price_array(df['close']),
+        )
+        df = _with_indicators(df, np.column_stack(results))
+    elif HAS_CYTHON_KERNEL:
+        # 预编译内核: 与 numba 内核结果一致，没有 JIT 编译开销 (内核按 float64 读取价格)
+        results = _compute_indicators_cy(
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+        )
+        df = _with_indicators(df, np.column_stack(results))
+    else:
+        df = df.copy()
+        _calculate_indicators_pandas(df)
+        _match_price_dtype(df)
+    
+    return df
+
+def calculate_indicators_batch(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """
+    批量计算多只ETF的指标
+
+    同长度的行情堆叠成二维数组后一次内核调用算完，分摊逐只调用的固定开销；
+    未安装 numba 时逐只调用 calculate_indicators。
+
+    Args:
+        dfs: 各ETF的行情 DataFrame
+
+    Returns:
+        与输入顺序一致的、添加了指标列的 DataFrame 列表
+    """
+    if not HAS_NUMBA:
+        return [calculate_indicators(df) for df in dfs]
+
+    dfs = [df if df.index.is_monotonic_increasing else df.sort_index() for df in dfs]
+
+    # 按长度分组 (新上市等历史较短的ETF单独成组)
+    groups = {}
+    for i, df in enumerate(dfs):
+        groups.setdefault(len(df), []).append(i)
+
+    for idx in groups.values():
+        def stack(col):
+            return np.stack([_price_array(dfs[i][col]) for i in idx])
+
+        results = compute_indicators_batch(stack('high'), stack('low'), stack('close'))
+        for row, i in enumerate(idx):
+            dfs[i] = _with_indicators(dfs[i], results[row])
+    
+    return dfs
+
+def step_indicators(df: pd.DataFrame, prev: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    增量计算指标: 与上一次的结果相比只有最后一根K线变化时 (盘中刷新)，只重算最后一行
+
+    Args:
+        df: 最新行情 (升序)
+        prev: 上一次 calculate_indicators / step_indicators 的结果
+
+    Returns:
+        添加了指标列的 DataFrame；无法增量计算 (首次、出现新K线、历史数据被修正等) 时返回 None，
+        由调用方改为全量计算
+    """
+    if prev is None or len(df) != len(prev) or len(df) < 20:
+        return None
+    if not df.index.equals(prev.index):
+        return None
+
+    arrays = []
+    for col in ('high', 'low', 'close'):
+        values = df[col].to_numpy(dtype=np.float64)
+        if not np.array_equal(values[:-1], prev[col].to_numpy(dtype=np.float64)[:-1]):
+            return None
+        arrays.append(values)
+
+    values = prev[_INDICATOR_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+    ok, last = compute_last_bar(*arrays, values[-2, 5], values[-2, 6])
+    if not ok:
+        return None
+    values[-1] = last
+    return _with_indicators(df, values)
+
+def _price_array(s: pd.Series) -> np.ndarray:
+    """
+    取价格列的数组交给内核: float32 行情保持 float32 (不做整列升格复制)，
+    内核内部的累加与输出仍按 float64 进行
+    """
+    if s.dtype == np.float32 or s.dtype == np.float64:
+        return s.to_numpy()
+    return s.to_numpy(dtype=np.float64)
 
+def _with_indicators(df: pd.DataFrame, values: np.ndarray) -> pd.DataFrame:
+    """
+    把内核输出的 (n, 8) 指标数组拼到行情后面
+
+    整块 concat 比逐列 / 多列赋值快一个数量级 (小表上赋值的索引对齐开销远大于计算本身)
+    """
+    if df['close'].dtype == np.float32:
+        values = values.astype(np.float32)
+    if df.columns.isin(_INDICATOR_COLUMNS).any():
+        # 行情里已带有旧指标列时在副本上覆盖，避免重复列
+        df = df.copy()
+        df[_INDICATOR_COLUMNS] = values
+        return df
+    indicators = pd.DataFrame(values, index=df.index, columns=_INDICATOR_COLUMNS)
+    return pd.concat([df, indicators], axis=1)
+
+def _match_price_dtype(df: pd.DataFrame) -> None:
+    """
+    指标列与价格列保持同一精度
+    指标内部按 float64 计算，float32 行情输入时需转回，避免悄悄升格
+    """
+    if df['close'].dtype == np.float32:
+        df[_INDICATOR_COLUMNS] = df[_INDICATOR_COLUMNS].astype(np.float32)
+
+def _rolling(s: pd.Series, window: int, how: str) -> pd.Series:
+    """滑动窗口 mean / min / max (等价于 s.rolling(window).how()，有 bottleneck 时直接在数组上算)"""
+    if HAS_BOTTLENECK and len(s) >= window:
+        move = getattr(bn, 'move_' + how)
+        return pd.Series(move(s.to_numpy(dtype=np.float64), window), index=s.index)
+    return getattr(s.rolling(window=window), how)()
+
+def _calculate_indicators_pandas(df: pd.DataFrame) -> None:
+    """calculate_indicators 的 pandas 实现 (未安装 numba 时使用，原地添加指标列)"""
     # 1. 计算 MA_5 (用于网格基准价锚定)
-    df['ma_5'] = df['close'].rolling(window=5).mean()
+    df['ma_5'] = _rolling(df['close'], 5, 'mean')
 
     # 2. 计算 MA_20
-    df['ma_20'] = df['close'].rolling(window=20).mean()
+    df['ma_20'] = _rolling(df['close'], 20, 'mean')
     
     # 3. 计算 BIAS_20
     # BIAS = (收盘价 - 均线) / 均线 * 100
@@ -31,26 +184,23 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     high = df['high']
     low = df['low']
     close = df['close']
-    pre_close = df['close'].shift(1)
     
-    tr1 = high - low
-    tr2 = (high - pre_close).abs()
-    tr3 = (low - pre_close).abs()
+    h = high.to_numpy()
+    l = low.to_numpy()
+    pc = close.shift(1).to_numpy()
     
-    # TR 取三者最大值
-    df['tr'] = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    # TR 取三者最大值 (fmax 忽略 NaN: 首根K线没有昨收，TR 取 High-Low)
+    # 只作中间变量，不写入 df
+    tr = pd.Series(np.fmax.reduce([h - l, np.abs(h - pc), np.abs(l - pc)]), index=df.index)
     
     # ATR 一般使用 Wilder's Smoothing (RM = Rolling Mean for simplicity here or ewm)
     # 标准定义常用 SMA(TR, 14) 或者 RMA(TR, 14)。这里使用简单移动平均 SMA，足够稳健。
-    df['atr_14'] = df['tr'].rolling(window=14).mean()
-    
-    # 清理中间变量
-    df.drop(columns=['tr'], inplace=True)
+    df['atr_14'] = _rolling(tr, 14, 'mean')
     
     # 5. 计算 RSI_14
     delta = close.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    gain = _rolling(delta.where(delta > 0, 0), 14, 'mean')
+    loss = _rolling(-delta.where(delta < 0, 0), 14, 'mean')
     rs = gain / loss
     df['rsi_14'] = 100 - (100 / (1 + rs))
     # 处理除以0的情况 (loss为0)
@@ -58,8 +208,8 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     
     # 6. 计算 KDJ (9,3,3)
     # RSV = (Close - MinLow_9) / (MaxHigh_9 - MinLow_9) * 100
-    low_9 = low.rolling(window=9).min()
-    high_9 = high.rolling(window=9).max()
+    low_9 = _rolling(low, 9, 'min')
+    high_9 = _rolling(high, 9, 'max')
     rsv = (close - low_9) / (high_9 - low_9) * 100
     # K = 2/3*PrevK + 1/3*RSV
     # D = 2/3*PrevD + 1/3*K
@@ -67,6 +217,4 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     # Pandas ewm adjust=False mimics the recurrence relation nicely
     df['kdj_k'] = rsv.ewm(com=2, adjust=False).mean()
     df['kdj_d'] = df['kdj_k'].ewm(com=2, adjust=False).mean()
-    df['kdj_j'] = 3 * df['kdj_k'] - 2 * df['kdj_d']
-    
-    return df
\ No newline at end of file
+    df['kdj_j'] = 3 * df['kdj_k'] - 2 * df['kdj_d']
\ No newline at end of file
@@ -0,0 +1,155 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+# indicators_cy.pyx - 指标计算 Cython 内核
+"""
+compute_indicators 的预编译版本 (与 indicators_numba.py 的内核逐点一致)：
+- 提前编译为扩展模块，没有 numba 的导入与 JIT 编译开销，适合未安装 numba 的环境 (如打包后的程序)
+- 编译: pip install cython && cythonize -i indicators_cy.pyx
+- 未编译时 indicators.py 自动跳过本模块
+"""
+
+import numpy as np
+
+from libc.math cimport NAN, INFINITY, fabs
+
+
+cdef void _rolling_mean(const double[:] values, Py_ssize_t window, double[:] out) noexcept nogil:
+    """滑动均值 (等价于 rolling(window).mean()，窗口内有 NaN 时为 NaN)"""
+    cdef Py_ssize_t n = values.shape[0]
+    cdef Py_ssize_t i
+    cdef Py_ssize_t nobs = 0
+    cdef double total = 0.0
+    cdef double v, old
+    for i in range(n):
+        v = values[i]
+        if v == v:
+            total += v
+            nobs += 1
+        if i >= window:
+            old = values[i - window]
+            if old == old:
+                total -= old
+                nobs -= 1
+        out[i] = total / nobs if nobs >= window else NAN
+
+
+cdef void _rolling_extreme(const double[:] values, Py_ssize_t window, bint is_max,
+                           double[:] out) noexcept nogil:
+    """滑动最大 / 最小值 (等价于 rolling(window).max() / .min())"""
+    cdef Py_ssize_t n = values.shape[0]
+    cdef Py_ssize_t i, j
+    cdef double best, v
+    for i in range(n):
+        out[i] = NAN
+    for i in range(window - 1, n):
+        best = NAN
+        for j in range(i - window + 1, i + 1):
+            v = values[j]
+            if v != v:
+                best = NAN
+                break
+            if best != best or (v > best if is_max else v < best):
+                best = v
+        out[i] = best
+
+
+cdef void _ewm_mean(const double[:] values, double alpha, double[:] out) noexcept nogil:
+    """指数加权均值 (等价于 ewm(alpha=alpha, adjust=False).mean())"""
+    cdef Py_ssize_t n = values.shape[0]
+    cdef Py_ssize_t i
+    cdef double weighted, cur
+    cdef double old_wt = 1.0
+    cdef bint is_observation
+    if n == 0:
+        return
+    weighted = values[0]
+    out[0] = weighted
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = cur == cur
+        if weighted == weighted:
+            old_wt *= 1.0 - alpha
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted
+
+
+def compute_indicators(const double[:] high, const double[:] low, const double[:] close):
+    """
+    计算 MA_5, MA_20, BIAS_20, ATR_14, RSI_14, KDJ(9,3,3)
+
+    Returns:
+        (ma_5, ma_20, bias_20, atr_14, rsi_14, kdj_k, kdj_d, kdj_j)
+    """
+    cdef Py_ssize_t n = close.shape[0]
+    cdef Py_ssize_t i
+    cdef double best, pre_close, delta, v1, v2, span, diff
+
+    out = np.empty((8, n))
+    tmp = np.zeros((5, n))
+    cdef double[:, :] o = out
+    cdef double[:, :] t = tmp
+    cdef double[:] tr = t[0]
+    cdef double[:] gain = t[1]
+    cdef double[:] loss = t[2]
+    cdef double[:] low_9 = t[3]
+    cdef double[:] high_9 = t[4]
+    cdef double[:] rsv = t[0]   # TR 用完后复用其缓冲区
+
+    with nogil:
+        _rolling_mean(close, 5, o[0])
+        _rolling_mean(close, 20, o[1])
+        for i in range(n):
+            o[2, i] = (close[i] - o[1, i]) / o[1, i] * 100
+
+        # TR 取三者最大值，忽略 NaN (首根K线没有昨收，TR 取 High-Low)
+        for i in range(n):
+            best = high[i] - low[i]
+            if i > 0:
+                pre_close = close[i - 1]
+                v1 = fabs(high[i] - pre_close)
+                v2 = fabs(low[i] - pre_close)
+                if best != best or v1 > best:
+                    best = v1
+                if best != best or v2 > best:
+                    best = v2
+                delta = close[i] - pre_close
+                if delta > 0:
+                    gain[i] = delta
+                elif delta < 0:
+                    loss[i] = -delta
+            tr[i] = best
+        _rolling_mean(tr, 14, o[3])
+
+        # RSI: 均损为 0 (含不足14根的 NaN 段) 时记为 100
+        _rolling_mean(gain, 14, o[4])
+        _rolling_mean(loss, 14, o[5])
+        for i in range(n):
+            v1 = o[4, i]
+            v2 = o[5, i]
+            if v2 != 0 and v1 == v1 and v2 == v2:
+                o[4, i] = 100 - 100 / (1 + v1 / v2)
+            else:
+                o[4, i] = 100.0
+
+        # KDJ: RSV 的分母为 0 时与 pandas 一致得到 inf / NaN
+        _rolling_extreme(low, 9, False, low_9)
+        _rolling_extreme(high, 9, True, high_9)
+        for i in range(n):
+            span = high_9[i] - low_9[i]
+            diff = close[i] - low_9[i]
+            if span != 0:
+                rsv[i] = diff / span * 100
+            elif diff == 0 or diff != diff:
+                rsv[i] = NAN
+            else:
+                rsv[i] = INFINITY if diff > 0 else -INFINITY
+        _ewm_mean(rsv, 1.0 / 3.0, o[5])
+        _ewm_mean(o[5], 1.0 / 3.0, o[6])
+        for i in range(n):
+            o[7, i] = 3 * o[5, i] - 2 * o[6, i]
+
+    return tuple(out)
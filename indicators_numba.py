@@ -0,0 +1,229 @@
+# indicators_numba.py - 指标计算 Numba 内核
+"""
+calculate_indicators 的数组版本：
+- 输入 high / low / close 的 float64 数组，一次调用算出全部指标
+- 结果与 pandas rolling / ewm 实现逐点一致 (NaN 前缀、除零处理相同)
+- 未安装 numba 时由 indicators.py 继续使用 pandas 实现
+"""
+
+import numpy as np
+
+from numba_utils import njit
+
+
+@njit(cache=True)
+def _rolling_mean(values, window):
+    """滑动均值 (等价于 rolling(window).mean()，窗口内有 NaN 时为 NaN)"""
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nobs = 0
+    for i in range(n):
+        v = values[i]
+        if v == v:
+            total += v
+            nobs += 1
+        if i >= window:
+            old = values[i - window]
+            if old == old:
+                total -= old
+                nobs -= 1
+        if nobs >= window:
+            out[i] = total / nobs
+    return out
+
+
+@njit(cache=True)
+def _rolling_extreme(values, window, is_max):
+    """滑动最大 / 最小值 (等价于 rolling(window).max() / .min())"""
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    for i in range(window - 1, n):
+        best = np.nan
+        for j in range(i - window + 1, i + 1):
+            v = values[j]
+            if v != v:
+                best = np.nan
+                break
+            if best != best or (v > best if is_max else v < best):
+                best = v
+        out[i] = best
+    return out
+
+
+@njit(cache=True)
+def _ewm_mean(values, alpha):
+    """指数加权均值 (等价于 ewm(alpha=alpha, adjust=False).mean())"""
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    weighted = values[0]
+    out[0] = weighted
+    old_wt = 1.0
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = cur == cur
+        if weighted == weighted:
+            old_wt *= 1.0 - alpha
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True)
+def compute_indicators(high, low, close):
+    """
+    计算 MA_5, MA_20, BIAS_20, ATR_14, RSI_14, KDJ(9,3,3)
+
+    Returns:
+        (ma_5, ma_20, bias_20, atr_14, rsi_14, kdj_k, kdj_d, kdj_j)
+    """
+    n = close.shape[0]
+
+    ma_5 = _rolling_mean(close, 5)
+    ma_20 = _rolling_mean(close, 20)
+    bias_20 = (close - ma_20) / ma_20 * 100
+
+    # TR 取三者最大值，忽略 NaN (首根K线没有昨收，TR 取 High-Low)
+    tr = np.empty(n)
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+    for i in range(n):
+        best = high[i] - low[i]
+        if i > 0:
+            pre_close = close[i - 1]
+            for v in (abs(high[i] - pre_close), abs(low[i] - pre_close)):
+                if best != best or v > best:
+                    best = v
+            delta = close[i] - pre_close
+            if delta > 0:
+                gain[i] = delta
+            elif delta < 0:
+                loss[i] = -delta
+        tr[i] = best
+    atr_14 = _rolling_mean(tr, 14)
+
+    # RSI: 均损为 0 (含不足14根的 NaN 段) 时记为 100
+    avg_gain = _rolling_mean(gain, 14)
+    avg_loss = _rolling_mean(loss, 14)
+    rsi_14 = np.full(n, 100.0)
+    for i in range(n):
+        if avg_loss[i] != 0 and avg_gain[i] == avg_gain[i] and avg_loss[i] == avg_loss[i]:
+            rsi_14[i] = 100 - 100 / (1 + avg_gain[i] / avg_loss[i])
+
+    # KDJ: RSV 的分母为 0 时与 pandas 一致得到 inf / NaN
+    low_9 = _rolling_extreme(low, 9, False)
+    high_9 = _rolling_extreme(high, 9, True)
+    rsv = np.empty(n)
+    for i in range(n):
+        span = high_9[i] - low_9[i]
+        diff = close[i] - low_9[i]
+        if span != 0:
+            rsv[i] = diff / span * 100
+        elif diff == 0 or diff != diff:
+            rsv[i] = np.nan
+        else:
+            rsv[i] = np.inf if diff > 0 else -np.inf
+    kdj_k = _ewm_mean(rsv, 1.0 / 3.0)
+    kdj_d = _ewm_mean(kdj_k, 1.0 / 3.0)
+    kdj_j = 3 * kdj_k - 2 * kdj_d
+
+    return ma_5, ma_20, bias_20, atr_14, rsi_14, kdj_k, kdj_d, kdj_j
+
+
+@njit(cache=True)
+def compute_indicators_batch(high, low, close):
+    """
+    多只ETF批量计算 (每行一只，各行长度相同)
+
+    Returns:
+        (m, n, 8) 数组，最后一维按 compute_indicators 的返回顺序排列
+    """
+    m, n = close.shape
+    out = np.empty((m, n, 8))
+    for r in range(m):
+        ma_5, ma_20, bias_20, atr_14, rsi_14, kdj_k, kdj_d, kdj_j = compute_indicators(
+            high[r], low[r], close[r])
+        out[r, :, 0] = ma_5
+        out[r, :, 1] = ma_20
+        out[r, :, 2] = bias_20
+        out[r, :, 3] = atr_14
+        out[r, :, 4] = rsi_14
+        out[r, :, 5] = kdj_k
+        out[r, :, 6] = kdj_d
+        out[r, :, 7] = kdj_j
+    return out
+
+
+@njit(cache=True, error_model='numpy')
+def compute_last_bar(high, low, close, prev_k, prev_d):
+    """
+    只重算最后一根K线的指标 (前面各K线不变，盘中最新价刷新时使用)
+
+    Args:
+        prev_k, prev_d: 倒数第二根K线的 KDJ K / D 值
+
+    Returns:
+        (ok, values) values 按 compute_indicators 的返回顺序排列；
+        ok 为 False 表示 KDJ 递推的前提不满足 (RSV 或上一根的 K/D 无效)，需全量重算
+    """
+    n = close.shape[0]
+    i = n - 1
+    values = np.full(8, np.nan)
+    alpha = 1.0 / 3.0
+
+    # 上一根的 RSV 必须有效，ewm 的权重才是常规递推状态
+    prev_low_9 = low[i - 9:i].min()
+    prev_span = high[i - 9:i].max() - prev_low_9
+    if not (prev_span != 0 and np.isfinite(prev_span) and np.isfinite(close[i - 1] - prev_low_9)
+            and np.isfinite(prev_k) and np.isfinite(prev_d)):
+        return False, values
+
+    low_9 = low[n - 9:].min()
+    span = high[n - 9:].max() - low_9
+    if not (span != 0 and np.isfinite(span) and np.isfinite(close[i])):
+        return False, values
+    rsv = (close[i] - low_9) / span * 100
+
+    ma_5 = close[n - 5:].sum() / 5
+    ma_20 = close[n - 20:].sum() / 20
+
+    tr_sum = 0.0
+    gain_sum = 0.0
+    loss_sum = 0.0
+    for j in range(n - 14, n):
+        pre_close = close[j - 1]
+        best = high[j] - low[j]
+        for v in (abs(high[j] - pre_close), abs(low[j] - pre_close)):
+            if best != best or v > best:
+                best = v
+        tr_sum += best
+        delta = close[j] - pre_close
+        if delta > 0:
+            gain_sum += delta
+        elif delta < 0:
+            loss_sum -= delta
+    avg_gain = gain_sum / 14
+    avg_loss = loss_sum / 14
+
+    old_wt = 1.0 - alpha
+    kdj_k = rsv if rsv == prev_k else (old_wt * prev_k + alpha * rsv) / (old_wt + alpha)
+    kdj_d = kdj_k if kdj_k == prev_d else (old_wt * prev_d + alpha * kdj_k) / (old_wt + alpha)
+
+    values[0] = ma_5
+    values[1] = ma_20
+    values[2] = (close[i] - ma_20) / ma_20 * 100
+    values[3] = tr_sum / 14
+    values[4] = 100.0
+    if avg_loss != 0 and avg_gain == avg_gain and avg_loss == avg_loss:
+        values[4] = 100 - 100 / (1 + avg_gain / avg_loss)
+    values[5] = kdj_k
+    values[6] = kdj_d
+    values[7] = 3 * kdj_k - 2 * kdj_d
+    return True, values
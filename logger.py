@@ -6,13 +6,126 @@
 - 按级别分类日志
 """
 
+import atexit
+import copy
 import logging
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
 
+# HH:MM:SS 格式化 (比 strftime 少一次格式串解析)；同一秒内直接复用上次的字符串
+_HMS_FMT = "{:02d}:{:02d}:{:02d}".format
+_hms_cache = (-1, '')
+
+
+def format_hms(ts: float = None) -> str:
+    """
+    时间戳转 HH:MM:SS (本地时间)
+
+    Args:
+        ts: Unix 时间戳，默认当前时间
+    """
+    global _hms_cache
+    sec = int(time.time() if ts is None else ts)
+    cached = _hms_cache
+    if cached[0] != sec:
+        t = time.localtime(sec)
+        cached = _hms_cache = (sec, _HMS_FMT(t.tm_hour, t.tm_min, t.tm_sec))
+    return cached[1]
+
+
+# 日志队列容量 (后台线程来不及写盘时，超出的记录直接丢弃，不阻塞交易线程)
+LOG_QUEUE_SIZE = 10000
+LOG_FILE_BUFFER = 64 * 1024
+# 内存日志条数 (Web 展示用)
+LOG_BUFFER_SIZE = 200
+
+
+class CachingFormatter(logging.Formatter):
+    """
+    缓存格式化结果的 Formatter:
+    - 结果按 (格式串, 时间格式) 存在 record 上，同一条记录经过格式相同的多个 Handler 时只格式化一次
+    - 指定 datefmt (精度到秒) 时，asctime 在同一秒内复用上次的字符串
+    """
+
+    def __init__(self, fmt=None, datefmt=None, style='%', **kwargs):
+        super().__init__(fmt, datefmt, style, **kwargs)
+        self._cache_key = (self._fmt, self.datefmt)
+        self._time_cache = (-1, '')
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt is None:
+            # 默认格式带毫秒，不能按秒复用
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        cached = self._time_cache
+        if cached[0] != sec:
+            cached = self._time_cache = (sec, super().formatTime(record, datefmt))
+        return cached[1]
+
+    def format(self, record):
+        cache = record.__dict__.get('_fmt_cache')
+        if cache is None:
+            cache = record._fmt_cache = {}
+        s = cache.get(self._cache_key)
+        if s is None:
+            s = cache[self._cache_key] = super().format(record)
+        return s
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """队列满时丢弃记录 (默认实现会对每条记录打印异常堆栈)"""
+
+    def prepare(self, record):
+        # 只在调用线程里完成 msg % args；异常堆栈存入 exc_text，由各 Handler 的 Formatter 照常附加在消息后
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """带写缓冲的文件 Handler: 逐条只写入缓冲区，由 _BatchingQueueListener 批量 flush"""
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, encoding=self.encoding,
+                    errors=self.errors, buffering=LOG_FILE_BUFFER)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchingQueueListener(QueueListener):
+    """后台写日志: 队列清空 (一批记录处理完) 后才 flush 一次，连续日志合并为一次写盘"""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
 class TradingLogger:
     """交易日志管理器"""
     
@@ -44,55 +157,74 @@ class TradingLogger:
         log_file = self.log_dir / f"trading_{today}.log"
         
         # 文件 Handler
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = _BufferedFileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.INFO)
-        file_formatter = logging.Formatter(
+        file_formatter = CachingFormatter(
             '%(asctime)s | %(levelname)-7s | %(name)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
         
         # 控制台 Handler (仅 WARNING 及以上)
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.WARNING)
-        console_formatter = logging.Formatter(
+        console_formatter = CachingFormatter(
             '%(levelname)s | %(message)s'
         )
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-        
-        # 写入启动日志
-        self.logger.info("=" * 60)
-        self.logger.info("交易系统日志启动")
-        self.logger.info("=" * 60)
         
         # [NEW] 内存日志缓存 (用于Web展示)
-        from collections import deque
-        self.log_buffer = deque(maxlen=200)
+        # 固定容量的环形缓冲: 槽位预先分配，写入时原地改写，不再逐条创建字典
+        self._ring = [{'time': '', 'level': '', 'message': ''} for _ in range(LOG_BUFFER_SIZE)]
+        self._ring_idx = 0  # 累计写入条数
+        self._ring_lock = threading.Lock()
         
-        # 自定义 Handler 用于捕获日志到 deque
+        # 自定义 Handler 用于捕获日志到环形缓冲
         class MemoryListHandler(logging.Handler):
-            def __init__(self, buffer):
+            def __init__(self, owner):
                 super().__init__()
-                self.buffer = buffer
+                self.owner = owner
                 
             def emit(self, record):
-                msg = self.format(record)
-                # 简单存储字典
-                self.buffer.append({
-                    'time': datetime.now().strftime('%H:%M:%S'),
-                    'level': record.levelname,
-                    'message': record.getMessage() # 不含时间前缀
-                })
+                # 文件 Handler 格式化时已把 msg % args 的结果存到 record.message，直接复用
+                msg = getattr(record, 'message', None)
+                if msg is None:
+                    msg = record.message = record.getMessage()
+                ts = format_hms(record.created)
+                owner = self.owner
+                with owner._ring_lock:
+                    slot = owner._ring[owner._ring_idx % LOG_BUFFER_SIZE]
+                    slot['time'] = ts
+                    slot['level'] = record.levelname
+                    slot['message'] = msg # 不含时间前缀
+                    owner._ring_idx += 1
         
-        mem_handler = MemoryListHandler(self.log_buffer)
+        mem_handler = MemoryListHandler(self)
         mem_handler.setLevel(logging.INFO)
-        self.logger.addHandler(mem_handler)
+        
+        # 调用线程只把记录放入队列，写文件 / 控制台 / 内存由后台线程完成
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.logger.addHandler(_DroppingQueueHandler(log_queue))
+        self._listener = _BatchingQueueListener(
+            log_queue, file_handler, console_handler, mem_handler,
+            respect_handler_level=True
+        )
+        self._listener.start()
+        # 退出时先处理完队列中剩余的记录
+        atexit.register(self._listener.stop)
+        
+        # 写入启动日志
+        self.logger.info("=" * 60)
+        self.logger.info("交易系统日志启动")
+        self.logger.info("=" * 60)
 
     def get_recent_logs(self, limit=50):
-        """获取最近日志"""
-        return list(self.log_buffer)[-limit:]
+        """获取最近日志 (按时间顺序；返回槽位的副本，不受之后写入的影响)"""
+        with self._ring_lock:
+            idx = self._ring_idx
+            count = min(idx, LOG_BUFFER_SIZE)
+            start = idx - count
+            return [dict(self._ring[(start + k) % LOG_BUFFER_SIZE]) for k in range(count)[-limit:]]
     
     def get_logger(self, name: str = None) -> logging.Logger:
         """获取子日志器"""
@@ -100,47 +232,49 @@ class TradingLogger:
             return self.logger.getChild(name)
         return self.logger
     
-    # 便捷方法
+    # 便捷方法 (参数交给 logging 延迟格式化: 级别被过滤时不拼接字符串)
     def info(self, message: str, module: str = "System"):
-        self.logger.info(f"[{module}] {message}")
+        self.logger.info("[%s] %s", module, message)
     
     def warning(self, message: str, module: str = "System"):
-        self.logger.warning(f"[{module}] {message}")
+        self.logger.warning("[%s] %s", module, message)
     
     def error(self, message: str, module: str = "System", exc: Exception = None):
         if exc:
-            self.logger.error(f"[{module}] {message}: {exc}", exc_info=True)
+            self.logger.error("[%s] %s: %s", module, message, exc, exc_info=True)
         else:
-            self.logger.error(f"[{module}] {message}")
+            self.logger.error("[%s] %s", module, message)
     
     def debug(self, message: str, module: str = "System"):
-        self.logger.debug(f"[{module}] {message}")
+        self.logger.debug("[%s] %s", module, message)
     
-    # 交易专用日志
+    # 交易专用日志 (级别被关闭时直接返回，省去打包参数和进入 logging 的调用开销)
     def log_signal(self, code: str, direction: str, price: float, reason: str):
         """记录交易信号"""
-        self.logger.info(
-            f"[信号] {code} | {direction} | 价格:{price:.3f} | {reason}"
-        )
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("[信号] %s | %s | 价格:%.3f | %s", code, direction, price, reason)
     
     def log_order(self, code: str, direction: str, price: float, volume: int, status: str):
         """记录订单"""
-        self.logger.info(
-            f"[订单] {code} | {direction} | {volume}股 @ {price:.3f} | {status}"
-        )
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("[订单] %s | %s | %s股 @ %.3f | %s", code, direction, volume, price, status)
     
     def log_trade(self, code: str, direction: str, price: float, volume: int, profit: float = None):
         """记录成交"""
-        profit_str = f" | 盈亏:{profit:+.2f}" if profit else ""
-        self.logger.info(
-            f"[成交] {code} | {direction} | {volume}股 @ {price:.3f}{profit_str}"
-        )
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        if profit:
+            self.logger.info("[成交] %s | %s | %s股 @ %.3f | 盈亏:%+.2f", code, direction, volume, price, profit)
+        else:
+            self.logger.info("[成交] %s | %s | %s股 @ %.3f", code, direction, volume, price)
     
     def log_risk(self, code: str, risk_type: str, message: str):
         """记录风控事件"""
-        self.logger.warning(
-            f"[风控] {code} | 类型:{risk_type} | {message}"
-        )
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
+        self.logger.warning("[风控] %s | 类型:%s | %s", code, risk_type, message)
 
 
 # 全局日志器
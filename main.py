@@ -1,4 +1,5 @@
 # main.py - 交易计划生成器
+import os
 import pandas as pd
 import datetime
 import config
@@ -26,6 +27,10 @@ def run():
     
     report_lines = [f"# 交易计划日报 {today_str}", "", "| 代码 | 现价 | BIAS | 状态 | 目标仓位 | 建议操作 | 风险提示 |", "|---|---|---|---|---|---|---|"]
     
+    # 使用真实持仓数据
+    # 从config.REAL_HOLDINGS读取实际持仓信息
+    real_holdings = getattr(config, 'REAL_HOLDINGS', {})
+    
     for code in config.ETF_LIST:
         try:
             df = get_data(code)
@@ -33,9 +38,6 @@ def run():
                 print(f"Error: No data for {code}")
                 continue
             
-            # 使用真实持仓数据
-            # 从config.REAL_HOLDINGS读取实际持仓信息
-            real_holdings = getattr(config, 'REAL_HOLDINGS', {})
             holdings = real_holdings.get(code, {
                 'volume': 0, 
                 'available': 0, 
@@ -64,9 +66,11 @@ def run():
             import traceback
             traceback.print_exc()
 
-    # 保存报告
-    with open(report_file, "w", encoding="utf-8") as f:
+    # 保存报告 (先写临时文件再整体替换，中途出错不会留下半截报告)
+    tmp_file = report_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8", buffering=1 << 16) as f:
         f.write("\n".join(report_lines))
+    os.replace(tmp_file, report_file)
     
     print(f"\nReport saved to {report_file}")
     # 同时输出到控制台
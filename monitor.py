@@ -1,21 +1,52 @@
 # monitor.py - 实时监控主模块
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 import config
 from strategy import GridStrategy, TradePlan, TradeOrder
 from notifier import get_notifier
 from trader import get_trader
 from data_manager import get_data_manager
-from logger import get_logger
+from logger import get_logger, format_hms
 from persistence import grid_state_manager
 
 # 初始化数据管理器和日志
 data_manager = get_data_manager()
 logger = get_logger()
 
+# print_status 的表格行格式 (预先绑定 format，逐行调用时不再解析格式串)
+ROW_FMT = "{:<10} {:<6} {:>6.3f} {:>6} {:>6.2f} {:>8,.0f} {:>8} {:>8} {:>8} {:>4.0f}%".format
+GRID_FMT = "{:<10} {:>6} {:>10} {:>6.3f} {:>10} {:>6} {:>8}".format
+
+class _KeyDefaultDict(dict):
+    """缺失的键按 default(key) 生成并缓存 (类似 defaultdict，但默认值依赖键本身)"""
+
+    def __init__(self, default, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._default = default
+
+    def __missing__(self, key):
+        value = self[key] = self._default(key)
+        return value
+
+
+# 状态中文映射 (未知状态显示为 ⚪ + 前4个字符)
+_STATUS_CN = _KeyDefaultDict(lambda key: f"⚪{key[:4]}", {
+    "DEEP_DIP": "🟢深坑",
+    "GOLD_ZONE": "🟡黄金", 
+    "OSCILLATION": "🔵震荡",
+    "REDUCE_ZONE": "🟠减持",
+    "ESCAPE_ZONE": "🔴逃顶",
+    "ESCAPE_CRAZY": "🔴疯狂",
+    "ESCAPE_HIGH": "🔴逃顶",
+    "ESCAPE_DIVERGENCE": "🔴背离"
+})
+
 
 class GridMonitor:
     """网格监控器"""
@@ -31,12 +62,43 @@ class GridMonitor:
         self.last_prices: Dict[str, float] = {}
         self.pending_orders: Dict[str, List[TradeOrder]] = {}  # 待触发订单
         self.triggered_orders: Dict[str, set] = {}  # 已触发的价格点
+        self._cached_plans: List[TradePlan] = []  # 最近一次策略分析的结果
+        self._plan_text: Dict[str, tuple] = {}  # code -> (plan, 该 plan 的展示字符串)
+        
+        # 当日已触发网格的内存副本: (code, direction) -> [price, ...]
+        # 策略刷新时从数据库整体重载一次，check_triggers 不再逐个订单查询数据库
+        self._triggered_today: Dict[tuple, List[float]] = {}
+        self._triggered_date: Optional[str] = None
+        
+        # print_status 的持仓指标计算缓冲 (每只ETF一个元素，按列存放后整体计算)
+        n = len(config.ETF_LIST)
+        self._prices = np.zeros(n)
+        self._costs = np.zeros(n)
+        self._vols = np.zeros(n)
+        self._last_status_fp: Optional[int] = None  # 上一次完整打印的状态指纹
+        
+        # ETF池代码格式预计算: sh510050 -> 510050.SH
+        self._code_map: Dict[str, str] = {c: c[2:] + '.' + c[:2].upper() for c in config.ETF_LIST}
+        # ETF 显示名称 (未配置名称的用代码后6位)
+        etf_names = getattr(self.conf, 'ETF_NAMES', {})
+        self._etf_names: Dict[str, str] = _KeyDefaultDict(
+            lambda c: etf_names.get(c, c[-6:]),
+            {c: etf_names.get(c, c[-6:]) for c in config.ETF_LIST}
+        )
+        
+        # 各ETF历史行情并发获取 (网络 I/O 为主，线程即可)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(8, len(config.ETF_LIST))),
+                                        thread_name_prefix='etf-history')
         
         self._running = False
+        self._stop_event = threading.Event()  # stop() 置位后，等待中的循环立即醒来退出
     
     def _convert_code(self, code: str) -> str:
-        """转换代码格式: sh510050 -> 510050.SH"""
-        return code[2:] + '.' + code[:2].upper()
+        """转换代码格式: sh510050 -> 510050.SH (ETF池内查表，池外代码现场转换)"""
+        symbol = self._code_map.get(code)
+        if symbol is None:
+            symbol = code[2:] + '.' + code[:2].upper()
+        return symbol
     
     def _is_trading_time(self) -> bool:
         """判断是否在交易时间"""
@@ -67,14 +129,32 @@ class GridMonitor:
         """获取历史数据 (使用统一数据管理器)"""
         return data_manager.get_history(code, count)
     
+    def _load_triggered(self, date: str):
+        """从数据库重载指定日期已触发的网格"""
+        triggered = {}
+        for code, price, direction in grid_state_manager.get_all_triggered(date):
+            triggered.setdefault((code, direction), []).append(price)
+        self._triggered_today = triggered
+        self._triggered_date = date
+    
+    def _is_triggered(self, code: str, price: float, direction: str) -> bool:
+        """是否已触发 (价格匹配规则与 GridStateManager.is_grid_triggered 相同)"""
+        return any(abs(p - price) < 0.0001 for p in self._triggered_today.get((code, direction), ()))
+    
     def analyze_all(self) -> List[TradePlan]:
         """分析所有ETF"""
         plans = []
         
-        for code in self.conf.ETF_LIST:
+        # 策略刷新时同步一次当日已触发网格 (其他进程写入的记录也在此时生效)
+        self._load_triggered(datetime.now().strftime('%Y-%m-%d'))
+        
+        # 获取历史数据 (并发请求，总耗时取决于最慢的一只而不是各只之和)
+        # 分析仍在当前线程按 ETF_LIST 顺序进行: 策略会访问 SQLite 持久化
+        futures = [(code, self._pool.submit(self.get_hist_data, code)) for code in self.conf.ETF_LIST]
+        
+        for code, future in futures:
             try:
-                # 获取历史数据
-                df = self.get_hist_data(code)
+                df = future.result()
                 if df.empty:
                     continue
                 
@@ -100,6 +180,11 @@ class GridMonitor:
         triggered = []
         alert_pct = self.monitor_conf.PRICE_ALERT_PCT
         
+        # 跨日后重新加载 (新的一天尚无触发记录)
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        if today_str != self._triggered_date:
+            self._load_triggered(today_str)
+        
         for code, pending in self.pending_orders.items():
             if code not in realtime_data:
                 continue
@@ -116,9 +201,8 @@ class GridMonitor:
                 # 生成唯一标识
                 # order_key = f"{order.direction}_{order.price:.3f}"
                 
-                # [PERSISTENCE UPDATE] 检查是否已从数据库触发
-                today_str = datetime.now().strftime('%Y-%m-%d')
-                if grid_state_manager.is_grid_triggered(today_str, code, order.price, order.direction):
+                # [PERSISTENCE UPDATE] 检查是否已触发 (查内存副本，数据库仍是持久化来源)
+                if self._is_triggered(code, order.price, order.direction):
                     continue
                 
                 # 计算偏离度
@@ -134,79 +218,127 @@ class GridMonitor:
                     })
                     
                     # [PERSISTENCE UPDATE] 标记为已触发
+                    self._triggered_today.setdefault((code, order.direction), []).append(order.price)
                     grid_state_manager.mark_grid_triggered(today_str, code, order.price, order.direction)
-                    
-                    # 发送通知
-                    self.notifier.signal_alert(
-                        code, 
-                        order.direction, 
-                        current_price,
-                        f"{order.desc} (目标价 {order.price:.3f})"
-                    )
-                    
-                    # 尝试自动下单
-                    if self.conf.TRADE_CONFIG.AUTO_TRADE_ENABLED:
-                        result = self.trader.place_order(
-                            code, 
-                            order.direction, 
-                            order.price,  # 用网格价格
-                            order.amount
-                        )
-                        print(f"自动下单结果: {result.message}")
+        
+        if not triggered:
+            return triggered
+        
+        # 发送通知 (本轮触发的信号合并为一条推送)
+        self.notifier.signal_batch([
+            (t['code'], t['order'].direction, t['current_price'],
+             f"{t['order'].desc} (目标价 {t['order'].price:.3f})")
+            for t in triggered
+        ])
+        
+        # 尝试自动下单
+        if self.conf.TRADE_CONFIG.AUTO_TRADE_ENABLED:
+            for t in triggered:
+                order = t['order']
+                result = self.trader.place_order(
+                    t['code'], 
+                    order.direction, 
+                    order.price,  # 用网格价格
+                    order.amount
+                )
+                print(f"自动下单结果: {result.message}")
         
         return triggered
     
-    def print_status(self, plans: List[TradePlan], realtime_data: Dict):
-        """打印当前状态 - 分屏版"""
-        now = datetime.now().strftime("%H:%M:%S")
-        
-        # 状态中文映射
-        status_cn = {
-            "DEEP_DIP": "🟢深坑",
-            "GOLD_ZONE": "🟡黄金", 
-            "OSCILLATION": "🔵震荡",
-            "REDUCE_ZONE": "🟠减持",
-            "ESCAPE_ZONE": "🔴逃顶",
-            "ESCAPE_CRAZY": "🔴疯狂",
-            "ESCAPE_HIGH": "🔴逃顶",
-            "ESCAPE_DIVERGENCE": "🔴背离"
-        }
+    def _plan_strings(self, plan: TradePlan) -> tuple:
+        """
+        plan 的展示字符串 (BIAS、支撑、阻力、状态)
+        只随策略分析变化，同一个 plan 只格式化一次，之后的刷新直接复用
+        """
+        cached = self._plan_text.get(plan.code)
+        if cached is None or cached[0] is not plan:
+            bias_sign = "+" if plan.current_bias >= 0 else ""
+            bias_str = f"{bias_sign}{plan.current_bias:.2f}%"
+            support_str = f"{plan.support:.2f}" if plan.support > 0 else "-"
+            resist_str = f"{plan.resistance:.2f}" if plan.resistance > 0 else "-"
+            status_key = plan.market_status.split()[0] if plan.market_status else "UNKNOWN"
+            status_str = _STATUS_CN[status_key]
+            cached = (plan, (bias_str, support_str, resist_str, status_str))
+            self._plan_text[plan.code] = cached
+        return cached[1]
+    
+    def print_status(self, plans: List[TradePlan], realtime_data: Dict, force: bool = False):
+        """
+        打印当前状态 - 分屏版
+        
+        Args:
+            force: 始终完整打印 (有触发时)，否则内容与上次相同时只刷新时间行
+        """
+        # 各行先收集起来，最后一次写入 stdout
+        lines = []
+        out = lines.append
+        
+        now = format_hms()
         
         auto_trade_icon = "✅" if self.conf.TRADE_CONFIG.AUTO_TRADE_ENABLED else "❌"
         
-        print(f"\n📊 BIAS-ATR 监控 | {now} | 刷新: {self.monitor_conf.REFRESH_INTERVAL}s | 自动下单: {auto_trade_icon}")
-        print(f"{'='*85}")
+        out(f"\n📊 BIAS-ATR 监控 | {now} | 刷新: {self.monitor_conf.REFRESH_INTERVAL}s | 自动下单: {auto_trade_icon}")
+        out(f"{'='*85}")
         
         # ========== 持仓概览区 ==========
-        print(f"\n🏷️  持仓概览")
-        print(f"{'代码':<10} {'名称':<6} {'现价':>6} {'持仓':>6} {'成本':>6} {'市值':>8} {'盈亏':>8} {'涨跌':>8} {'BIAS':>8} {'目标':>5}")
-        print(f"{'-'*90}")
+        out(f"\n🏷️  持仓概览")
+        out(f"{'代码':<10} {'名称':<6} {'现价':>6} {'持仓':>6} {'成本':>6} {'市值':>8} {'盈亏':>8} {'涨跌':>8} {'BIAS':>8} {'目标':>5}")
+        out(f"{'-'*90}")
         
-        total_value = 0
-        total_profit = 0
         grid_data = []  # 收集网格数据用于第二个表
         
-        for plan in plans:
-            code = plan.code
-            name = getattr(self.conf, 'ETF_NAMES', {}).get(code, code[-6:])
-            rt = realtime_data.get(code, {})
+        # 先收集各ETF的现价与持仓，再整体计算涨跌 / 盈亏 / 市值
+        n = len(plans)
+        if self._prices.shape[0] < n:
+            self._prices, self._costs, self._vols = np.zeros(n), np.zeros(n), np.zeros(n)
+        prices, costs, vols = self._prices[:n], self._costs[:n], self._vols[:n]
+        rows = []
+        for i, plan in enumerate(plans):
+            rt = realtime_data.get(plan.code, {})
             price = rt.get('price', plan.current_price)
             
             # 持仓信息
-            holdings = self.conf.REAL_HOLDINGS.get(code, {})
+            holdings = self.conf.REAL_HOLDINGS.get(plan.code, {})
             hold_vol = holdings.get('volume', 0)
             avg_cost = holdings.get('avg_cost', 0)
             
-            # 计算
-            change_pct = 0
-            profit = 0
-            if avg_cost > 0 and hold_vol > 0:
-                change_pct = (price - avg_cost) / avg_cost * 100
-                profit = (price - avg_cost) * hold_vol
-            
-            market_value = price * hold_vol
-            total_value += market_value
-            total_profit += profit
+            prices[i] = price
+            costs[i] = avg_cost
+            vols[i] = hold_vol
+            rows.append((plan, price, hold_vol, avg_cost))
+        
+        # 计算 (无持仓或成本无效的ETF涨跌、盈亏记为 0)
+        held = (costs > 0) & (vols > 0)
+        diff = prices - costs
+        change_pcts = np.divide(diff, costs, out=np.zeros(n), where=held) * 100
+        profits = np.where(held, diff * vols, 0.0)
+        market_values = prices * vols
+        # 合计按顺序逐项累加，与逐行计算时的结果一致
+        total_value = sum(market_values.tolist())
+        total_profit = sum(profits.tolist())
+        
+        # 行情、持仓与策略结果都没变 (非交易时段、成交清淡的ETF) 时不重画整张表，只刷新时间行
+        # 指纹只取表中展示的内容，策略重新分析但结果相同时同样视为无变化
+        pending_orders = self.pending_orders
+        fp = hash((
+            tuple(
+                (plan.code, round(price, 3), plan.current_bias, plan.market_status, plan.target_pos_pct,
+                 tuple(plan.warnings),
+                 tuple((o.direction, o.price, o.amount) for o in pending_orders.get(plan.code, ())))
+                for plan, price, _, _ in rows
+            ),
+            total_value, total_profit
+        ))
+        if fp == self._last_status_fp and not force:
+            sys.stdout.write(f"\r📊 [{now}] 行情无变化 (按 Ctrl+C 退出)")
+            sys.stdout.flush()
+            return
+        self._last_status_fp = fp
+        
+        for (plan, price, hold_vol, avg_cost), change_pct, profit, market_value in zip(
+                rows, change_pcts.tolist(), profits.tolist(), market_values.tolist()):
+            code = plan.code
+            name = self._etf_names[code]
             
             # 格式化持仓数
             if hold_vol >= 10000:
@@ -222,33 +354,30 @@ class GridMonitor:
             profit_sign = "+" if profit >= 0 else ""
             profit_str = f"{profit_sign}{profit:,.0f}"
             
-            # BIAS 字符串
-            bias_sign = "+" if plan.current_bias >= 0 else ""
-            bias_str = f"{bias_sign}{plan.current_bias:.2f}%"
+            # BIAS / 支撑 / 阻力 / 状态字符串 (随策略分析更新)
+            bias_str, support_str, resist_str, status_str = self._plan_strings(plan)
             
-            print(f"{code:<10} {name:<6} {price:>6.3f} {vol_str:>6} {avg_cost:>6.2f} {market_value:>8,.0f} {profit_str:>8} {change_str:>8} {bias_str:>8} {plan.target_pos_pct*100:>4.0f}%")
+            out(ROW_FMT(code, name, price, vol_str, avg_cost, market_value, profit_str, change_str, bias_str, plan.target_pos_pct*100))
             
             # 收集网格数据
             pending = self.pending_orders.get(code, [])
             buy_orders = [o for o in pending if o.direction == 'BUY']
             sell_orders = [o for o in pending if o.direction == 'SELL']
-            status_key = plan.market_status.split()[0] if plan.market_status else "UNKNOWN"
-            status_str = status_cn.get(status_key, f"⚪{status_key[:4]}")
             grid_data.append({
                 'code': code,
                 'name': name,
                 'buy': buy_orders,
                 'sell': sell_orders,
                 'status': status_str,
-                'support': plan.support,
-                'resistance': plan.resistance,
+                'support': support_str,
+                'resistance': resist_str,
                 'price': price
             })
         
         # ========== 网格挂单区 ==========
-        print(f"\n📈 网格挂单 (支撑/阻力位参考)")
-        print(f"{'代码':<10} {'支撑':>6} {'买单':>10} {'现价':>6} {'卖单':>10} {'阻力':>6} {'状态':>8}")
-        print(f"{'-'*75}")
+        out(f"\n📈 网格挂单 (支撑/阻力位参考)")
+        out(f"{'代码':<10} {'支撑':>6} {'买单':>10} {'现价':>6} {'卖单':>10} {'阻力':>6} {'状态':>8}")
+        out(f"{'-'*75}")
         
         total_buy = 0
         total_sell = 0
@@ -272,14 +401,10 @@ class GridMonitor:
             else:
                 sell_str = "-"
             
-            # 支撑/阻力位
-            support_str = f"{g['support']:.2f}" if g['support'] > 0 else "-"
-            resist_str = f"{g['resistance']:.2f}" if g['resistance'] > 0 else "-"
-            
-            print(f"{g['code']:<10} {support_str:>6} {buy_str:>10} {g['price']:>6.3f} {sell_str:>10} {resist_str:>6} {g['status']:>8}")
+            out(GRID_FMT(g['code'], g['support'], buy_str, g['price'], sell_str, g['resistance'], g['status']))
         
         # ========== 汇总区 ==========
-        print(f"\n📊 资金状况")
+        out(f"\n📊 资金状况")
         
         # 计算资金利用率
         total_capital = self.conf.TOTAL_CAPITAL
@@ -303,16 +428,18 @@ class GridMonitor:
         profit_icon = "📈" if total_profit > 0 else ("📉" if total_profit < 0 else "➖")
         profit_sign = "+" if total_profit >= 0 else ""
         
-        print(f"💰 资产净值: ¥{total_capital:,.0f} (持仓: {position_pct:.0f}% | 现金: {cash_pct:.0f}%)")
-        print(f"{profit_icon} 累计盈亏: {profit_sign}{profit_pct:.2f}% ({profit_sign}¥{total_profit:,.0f})")
-        print(f"⚡ 挂单: {total_buy}买待命 (需¥{buy_capital_needed/1000:.1f}k) | {total_sell}卖待命 (可释放¥{sell_capital_release/1000:.1f}k)")
+        out(f"💰 资产净值: ¥{total_capital:,.0f} (持仓: {position_pct:.0f}% | 现金: {cash_pct:.0f}%)")
+        out(f"{profit_icon} 累计盈亏: {profit_sign}{profit_pct:.2f}% ({profit_sign}¥{total_profit:,.0f})")
+        out(f"⚡ 挂单: {total_buy}买待命 (需¥{buy_capital_needed/1000:.1f}k) | {total_sell}卖待命 (可释放¥{sell_capital_release/1000:.1f}k)")
         
         # 风险警告
         warnings = [(plan.code, warn) for plan in plans for warn in plan.warnings]
         if warnings:
-            print(f"\n⚠️  风险提示:")
+            out(f"\n⚠️  风险提示:")
             for code, warn in warnings[:3]:
-                print(f"   [{code}] {warn}")
+                out(f"   [{code}] {warn}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def run(self):
         """运行监控循环"""
@@ -336,26 +463,29 @@ class GridMonitor:
         logger.info("监控系统启动", "Monitor")
         
         self._running = True
+        self._stop_event.clear()
+        stop_event = self._stop_event
         loop_count = 0
         
         try:
             while self._running:
+                t0 = time.perf_counter()
                 loop_count += 1
                 
                 # 检查交易时间
                 if not self._is_trading_time():
-                    now = datetime.now().strftime("%H:%M:%S")
+                    now = format_hms()
                     print(f"\r⏰ [{now}] 非交易时间，等待中... (按 Ctrl+C 退出)", end="")
-                    time.sleep(30)
+                    if stop_event.wait(30):
+                        break
                     continue
                 
                 # 1. 分析策略 (每5分钟更新一次)
                 if loop_count % 5 == 1:
                     print("\n📊 更新策略分析...")
-                    plans = self.analyze_all()
-                else:
-                    plans = list(self.pending_orders.keys())
-                    plans = [p for p in self.analyze_all() if p]
+                    self._cached_plans = self.analyze_all()
+                # 其余轮次沿用上次的分析结果，只刷新实时行情与触发检查
+                plans = self._cached_plans
                 
                 # 2. 获取实时行情
                 realtime_data = self.get_realtime_data(self.conf.ETF_LIST)
@@ -365,13 +495,15 @@ class GridMonitor:
                 
                 # 4. 显示状态
                 if loop_count % 5 == 1 or triggered:
-                    self.print_status(plans, realtime_data)
+                    self.print_status(plans, realtime_data, force=bool(triggered))
                 else:
-                    now = datetime.now().strftime("%H:%M:%S")
+                    now = format_hms()
                     print(f"\r⏳ [{now}] 监控中... 触发:{len(triggered)} (按 Ctrl+C 退出)", end="")
                 
-                # 等待下一次刷新
-                time.sleep(self.monitor_conf.REFRESH_INTERVAL)
+                # 等待下一次刷新 (扣除本轮耗时，刷新节奏不随处理时间漂移)
+                elapsed = time.perf_counter() - t0
+                if stop_event.wait(max(0.0, self.monitor_conf.REFRESH_INTERVAL - elapsed)):
+                    break
                 
         except KeyboardInterrupt:
             print("\n\n🛑 监控已停止")
@@ -380,8 +512,9 @@ class GridMonitor:
             self.trader.disconnect()
     
     def stop(self):
-        """停止监控"""
+        """停止监控 (可从其他线程调用，正在等待的循环会立即退出)"""
         self._running = False
+        self._stop_event.set()
 
 
 def main():
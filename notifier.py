@@ -1,8 +1,12 @@
 # notifier.py - 通知推送模块
+import atexit
 import json
-from datetime import datetime
-from typing import Optional
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
 import config
+from logger import format_hms
 
 # 尝试导入 requests
 try:
@@ -12,6 +16,20 @@ except ImportError:
     HAS_REQUESTS = False
     print("⚠️ requests 未安装，微信通知不可用")
 
+# 尝试导入 orjson (C 实现的 JSON 序列化，缺失时用标准库 json，安装提示见 holdings_storage)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# PushPlus 待发送队列容量 (满了直接丢弃，不阻塞调用方)
+PUSH_QUEUE_SIZE = 256
+# 退出时等待队列发送完毕的最长时间 (秒)
+PUSH_DRAIN_TIMEOUT = 10
+PUSHPLUS_URL = "http://www.pushplus.plus/send"
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
 
 class Notifier:
     """统一通知管理器"""
@@ -19,6 +37,13 @@ class Notifier:
     def __init__(self):
         self.conf = config.NOTIFY_CONFIG
         self._last_notify_time = {}  # 防止重复通知
+        
+        # PushPlus 由后台线程发送 (首次推送时启动)，监控循环只负责入队
+        self._push_queue = queue.Queue(maxsize=PUSH_QUEUE_SIZE)
+        self._push_thread = None
+        self._push_lock = threading.Lock()
+        self._session = None
+        self._url = PUSHPLUS_URL
     
     def notify(self, title: str, content: str, level: str = "INFO"):
         """
@@ -29,7 +54,7 @@ class Notifier:
             content: 通知内容
             level: 级别 INFO/WARNING/ERROR/TRADE
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = format_hms()
         
         # 1. 控制台通知 (始终输出)
         if self.conf.CONSOLE_ENABLED:
@@ -57,12 +82,11 @@ class Notifier:
         print()
     
     def _pushplus_notify(self, title: str, content: str):
-        """PushPlus 微信通知"""
+        """PushPlus 微信通知 (放入发送队列后立即返回)"""
         token = self.conf.PUSHPLUS_TOKEN
         if not token:
             return
         
-        url = "http://www.pushplus.plus/send"
         data = {
             "token": token,
             "title": title,
@@ -75,14 +99,58 @@ class Notifier:
         if topic:
             data["topic"] = topic
         
+        self._ensure_push_worker()
+        try:
+            self._push_queue.put_nowait(data)
+        except queue.Full:
+            print(f"PushPlus 发送队列已满，丢弃通知: {title}")
+    
+    def _ensure_push_worker(self):
+        """启动 PushPlus 发送线程 (只启动一次)"""
+        if self._push_thread is not None:
+            return
+        with self._push_lock:
+            if self._push_thread is None:
+                # 复用同一个 Session (保持连接，省去每条通知的 TCP 握手)
+                self._session = requests.Session()
+                self._push_thread = threading.Thread(target=self._push_worker, name='pushplus', daemon=True)
+                self._push_thread.start()
+                atexit.register(self._drain_push_queue)
+    
+    def _push_worker(self):
+        """后台逐条发送队列中的 PushPlus 通知"""
+        while True:
+            data = self._push_queue.get()
+            try:
+                self._post_pushplus(data)
+            finally:
+                self._push_queue.task_done()
+    
+    def _post_pushplus(self, data: dict):
+        """发送一条 PushPlus 通知"""
         try:
-            resp = requests.post(url, json=data, timeout=5)
+            if HAS_ORJSON:
+                payload = orjson.dumps(data)
+            else:
+                payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            resp = self._session.post(self._url, data=payload, headers=_JSON_HEADERS, timeout=5)
             result = resp.json()
             if result.get("code") != 200:
                 print(f"PushPlus 通知失败: {result.get('msg')}")
         except Exception as e:
             print(f"PushPlus 通知异常: {e}")
     
+    def _drain_push_queue(self):
+        """退出前等待队列中的通知发送完 (最多 PUSH_DRAIN_TIMEOUT 秒)"""
+        q = self._push_queue
+        deadline = time.monotonic() + PUSH_DRAIN_TIMEOUT
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                q.all_tasks_done.wait(remaining)
+    
     # ========== 便捷方法 ==========
     
     def signal_alert(self, code: str, signal_type: str, price: float, reason: str):
@@ -100,6 +168,27 @@ class Notifier:
 """
         self.notify(title, content, "SIGNAL")
     
+    def signal_batch(self, items: List[Tuple[str, str, float, str]]):
+        """
+        批量信号提醒: 同一轮刷新触发的多个信号合并为一条通知 (一次推送)
+        
+        Args:
+            items: [(code, signal_type, price, reason), ...]，参数含义同 signal_alert
+        """
+        if not self.conf.NOTIFY_ON_SIGNAL or not items:
+            return
+        if len(items) == 1:
+            self.signal_alert(*items[0])
+            return
+        
+        title = f"🔔 {len(items)}个网格信号"
+        rows = [
+            f"| {'🟢' if signal_type == 'BUY' else '🔴'} {code} | {signal_type} | {price:.3f} | {reason} |"
+            for code, signal_type, price, reason in items
+        ]
+        content = "| 代码 | 方向 | 价格 | 原因 |\n|---|---|---|---|\n" + "\n".join(rows) + "\n"
+        self.notify(title, content, "SIGNAL")
+    
     def trade_alert(self, code: str, direction: str, price: float, volume: int, status: str):
         """交易提醒"""
         if not self.conf.NOTIFY_ON_TRADE:
@@ -0,0 +1,27 @@
+# numba_utils.py - Numba 可选加速
+"""
+Numba JIT 的可选封装：
+- 已安装 numba 时使用 njit / prange 编译数值内核
+- 未安装时退化为普通 Python 函数，调用方无需区分
+"""
+
+try:
+    from numba import njit as _njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+
+def njit(*args, **kwargs):
+    """
+    numba.njit 的兼容封装
+
+    支持 @njit 与 @njit(cache=True) 两种写法；
+    未安装 numba 时原样返回被装饰的函数。
+    """
+    if HAS_NUMBA:
+        return _njit(*args, **kwargs)
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
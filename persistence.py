@@ -81,6 +81,24 @@ class GridStateManager:
             logger.error(f"查询网格状态失败: {e}", "Persistence")
             return False
 
+    def get_all_triggered(self, date: str) -> list:
+        """
+        查询某日所有已触发的网格 (供调用方缓存在内存中，代替逐个 is_grid_triggered 查询)
+        
+        Returns:
+            [(code, price, direction), ...]
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT code, price, direction FROM triggered_grids WHERE date=?', (date,))
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"查询网格状态失败: {e}", "Persistence")
+            return []
+
     def mark_grid_triggered(self, date: str, code: str, price: float, direction: str):
         """标记网格为已触发"""
         try:
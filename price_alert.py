@@ -8,7 +8,7 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional
 import json
 import os
 
@@ -120,69 +120,16 @@ class AlertManager:
         for order in suggested_orders:
             direction = order.get('direction')
             target_price = order.get('price', 0)
-            desc = order.get('desc', '')
-            amount = order.get('amount', 0)  # 获取订单数量
 
             if not target_price or target_price <= 0:
                 continue
 
-            # 检测是否触及买价（当前价格 <= 目标买价）
-            if direction == 'BUY' and current_price <= target_price:
-                alert_key = f"{code}_BUY_{target_price:.3f}"
-                if alert_key not in today_alerted:
-                    # 提取网格层级
-                    grid_level = 1
-                    if '买2' in desc:
-                        grid_level = 2
-                    elif '买3' in desc:
-                        grid_level = 3
-
-                    alert = PriceAlert(
-                        id=self.generate_alert_id(),
-                        code=code,
-                        name=name,
-                        alert_type='BUY_TOUCH',
-                        price=current_price,
-                        target_price=target_price,
-                        direction='BUY',
-                        grid_level=grid_level,
-                        timestamp=datetime.now(),
-                        message=f"🔥 {name} 触及买{grid_level}价位！当前价: {current_price:.3f}, 目标价: {target_price:.3f}",
-                        amount=amount  # 添加订单数量
-                    )
-
-                    new_alerts.append(alert)
-                    self.alerts.append(alert)
-                    today_alerted.add(alert_key)
-
-            # 检测是否触及卖价（当前价格 >= 目标卖价）
-            elif direction == 'SELL' and current_price >= target_price:
-                alert_key = f"{code}_SELL_{target_price:.3f}"
-                if alert_key not in today_alerted:
-                    # 提取网格层级
-                    grid_level = 1
-                    if '卖2' in desc:
-                        grid_level = 2
-                    elif '卖3' in desc:
-                        grid_level = 3
-
-                    alert = PriceAlert(
-                        id=self.generate_alert_id(),
-                        code=code,
-                        name=name,
-                        alert_type='SELL_TOUCH',
-                        price=current_price,
-                        target_price=target_price,
-                        direction='SELL',
-                        grid_level=grid_level,
-                        timestamp=datetime.now(),
-                        message=f"💰 {name} 触及卖{grid_level}价位！当前价: {current_price:.3f}, 目标价: {target_price:.3f}",
-                        amount=amount  # 添加订单数量
-                    )
-
+            # 检测是否触及买价（当前价格 <= 目标买价）/ 卖价（当前价格 >= 目标卖价）
+            if (direction == 'BUY' and current_price <= target_price) or \
+                    (direction == 'SELL' and current_price >= target_price):
+                alert = self._make_touch_alert(code, name, current_price, order, today_alerted)
+                if alert is not None:
                     new_alerts.append(alert)
-                    self.alerts.append(alert)
-                    today_alerted.add(alert_key)
 
         # 保存更新
         if new_alerts:
@@ -190,6 +137,102 @@ class AlertManager:
 
         return new_alerts
 
+    def check_price_alerts_bulk(self, codes: List[str], current_prices: List[float],
+                                orders_matrix: List[List[Dict]],
+                                names: Optional[Dict[str, str]] = None) -> Dict[str, List[PriceAlert]]:
+        """
+        批量检测所有ETF的价格提醒 (判定规则与 check_price_alerts 相同)
+
+        各ETF的挂单价补齐成二维数组，一次数组比较找出触价的 (ETF, 订单) 位置，
+        只对命中的少数订单创建提醒
+
+        Args:
+            codes: ETF代码列表
+            current_prices: 与 codes 对应的当前价
+            orders_matrix: 与 codes 对应的建议订单列表 (格式同 check_price_alerts 的 suggested_orders)
+            names: 代码 -> 名称，缺省时用代码
+
+        Returns:
+            代码 -> 新提醒列表 (没有新提醒的代码为空列表)
+        """
+        import numpy as np  # 只在数据线程里用到，不拖慢界面启动时的导入
+
+        result = {code: [] for code in codes}
+        if not codes:
+            return result
+
+        width = max((len(orders) for orders in orders_matrix), default=0)
+        order_prices = np.full((len(codes), width), np.nan)
+        is_buy = np.zeros((len(codes), width), dtype=bool)
+        is_sell = np.zeros((len(codes), width), dtype=bool)
+        for i, orders in enumerate(orders_matrix):
+            for j, order in enumerate(orders):
+                order_prices[i, j] = order.get('price') or np.nan
+                direction = order.get('direction')
+                is_buy[i, j] = direction == 'BUY'
+                is_sell[i, j] = direction == 'SELL'
+
+        # 买单: 当前价 <= 目标价；卖单: 当前价 >= 目标价 (补齐位和无效价为 NaN，比较结果为 False)
+        prices = np.asarray(current_prices, dtype=np.float64)[:, None]
+        valid = order_prices > 0
+        hits = valid & ((is_buy & (prices <= order_prices)) | (is_sell & (prices >= order_prices)))
+        if not hits.any():
+            return result
+
+        today_key = datetime.now().strftime('%Y-%m-%d')
+        today_alerted = self.alerted_prices.setdefault(today_key, set())
+        names = names or {}
+
+        for i, j in zip(*np.nonzero(hits)):
+            code = codes[i]
+            alert = self._make_touch_alert(code, names.get(code, code), float(current_prices[i]),
+                                           orders_matrix[i][j], today_alerted)
+            if alert is not None:
+                result[code].append(alert)
+
+        if any(result.values()):
+            self._save_alerts()
+
+        return result
+
+    def _make_touch_alert(self, code: str, name: str, current_price: float, order: Dict,
+                          today_alerted: Set[str]) -> Optional[PriceAlert]:
+        """为已触价的订单创建提醒 (当天已提醒过同一价位时返回 None)"""
+        direction = order.get('direction')
+        target_price = order.get('price', 0)
+        desc = order.get('desc', '')
+
+        alert_key = f"{code}_{direction}_{target_price:.3f}"
+        if alert_key in today_alerted:
+            return None
+
+        # 提取网格层级
+        label = '买' if direction == 'BUY' else '卖'
+        grid_level = 1
+        if f'{label}2' in desc:
+            grid_level = 2
+        elif f'{label}3' in desc:
+            grid_level = 3
+
+        icon = '🔥' if direction == 'BUY' else '💰'
+        alert = PriceAlert(
+            id=self.generate_alert_id(),
+            code=code,
+            name=name,
+            alert_type=f'{direction}_TOUCH',
+            price=current_price,
+            target_price=target_price,
+            direction=direction,
+            grid_level=grid_level,
+            timestamp=datetime.now(),
+            message=f"{icon} {name} 触及{label}{grid_level}价位！当前价: {current_price:.3f}, 目标价: {target_price:.3f}",
+            amount=order.get('amount', 0)
+        )
+
+        self.alerts.append(alert)
+        today_alerted.add(alert_key)
+        return alert
+
     def get_recent_alerts(self, hours: int = 24) -> List[PriceAlert]:
         """获取最近的提醒记录"""
         cutoff_time = datetime.now() - timedelta(hours=hours)
@@ -839,7 +839,7 @@ class GridTraderGUI:
                 return
             
             # 打开交易对话框
-            TradeDialog(self.root, self.etf_data)
+            TradeDialog.show(self.root, self.etf_data)
             
         except Exception as e:
             self.logger.error(f"打开交易对话框失败: {e}", "GUI")
@@ -1,12 +1,40 @@
 # strategy.py
 import pandas as pd
 import math
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional
 import config
 from indicators import calculate_indicators
 from persistence import grid_state_manager
 
+# BIAS 区间 (按阈值从低到高排列，下标即区间编号)
+ZONE_NAMES = ('DEEP_DIP', 'GOLD_ZONE', 'OSCILLATION', 'REDUCE_ZONE', 'ESCAPE_ZONE')
+ZONE_LABELS = {
+    'DEEP_DIP': "DEEP_DIP (深坑)",
+    'GOLD_ZONE': "GOLD_ZONE (黄金)",
+    'OSCILLATION': "OSCILLATION (震荡)",
+    'REDUCE_ZONE': "REDUCE_ZONE (减持)",
+    'ESCAPE_ZONE': "ESCAPE_ZONE (逃亡)",
+}
+
+class BarView(NamedTuple):
+    """单根K线的预计算指标 (analyze_bar 的全部行情输入)"""
+    close: float
+    bias: float
+    prev_bias: float
+    atr: float
+    rsi: float
+    kdj_j: float
+    ma_5: float
+    zone: int             # ZONE_NAMES 下标
+    support: float        # 近20日最低价
+    resistance: float     # 近20日最高价
+    recent_high: float    # 20日滚动最高价 (不足20日为 NaN)，ATR 移动止损用
+    is_uptrend: bool = False
+    is_downtrend: bool = False
+    trend_desc: str = ""
+
 @dataclass
 class TradeOrder:
     direction: str  # 'BUY' or 'SELL'
@@ -31,6 +59,8 @@ class TradePlan:
 class GridStrategy:
     def __init__(self):
         self.conf = config
+        th = self.conf.BIAS_THRESHOLDS
+        self._zone_edges = (th.DEEP_DIP, th.GOLD_ZONE_UPPER, th.OSCILLATION_UPPER, th.REDUCE_ZONE_UPPER)
 
     def _round_to_lot(self, amount: float) -> int:
         """向下取整到最近的 100 股"""
@@ -156,6 +186,39 @@ class GridStrategy:
         
         return None, 1.0  # 不调整
 
+    def classify_zone(self, bias: float) -> int:
+        """BIAS 区间编号 (ZONE_NAMES 下标)，等价于逐级 `bias < 阈值` 判断"""
+        return bisect_right(self._zone_edges, bias)
+
+    def bar_view(self, df: pd.DataFrame) -> BarView:
+        """从已计算指标的 DataFrame 提取最后一根K线的 BarView"""
+        # 逐列取数组末尾值 (df.iloc[-1] 要先构造整行 Series，开销大得多)
+        # 统一转为 Python float: 行情列可能是 float32, 避免 numpy 标量流入 JSON / 订单价格
+        def last(col, default=None):
+            if default is not None and col not in df.columns:
+                return default
+            return float(df[col].values[-1])
+
+        bias = last('bias_20')
+        support, resistance, _ = self._calc_support_resistance(df)
+        is_uptrend, is_downtrend, trend_desc = self._detect_trend(df)
+        return BarView(
+            close=last('close'),
+            bias=bias,
+            prev_bias=float(df['bias_20'].values[-2]),
+            atr=last('atr_14'),
+            rsi=last('rsi_14', 50.0),
+            kdj_j=last('kdj_j', 50.0),
+            ma_5=last('ma_5'),
+            zone=self.classify_zone(bias),
+            support=float(support),
+            resistance=float(resistance),
+            recent_high=float(df['high'].iloc[-20:].max()) if len(df) >= 20 else float('nan'),
+            is_uptrend=is_uptrend,
+            is_downtrend=is_downtrend,
+            trend_desc=trend_desc
+        )
+
     def analyze(self, code: str, df: pd.DataFrame, current_holdings: Dict) -> TradePlan:
         """
         核心分析函数
@@ -169,21 +232,24 @@ class GridStrategy:
             plan.warnings.append("数据不足")
             return plan
 
-        current_data = df.iloc[-1]
-        prev_data = df.iloc[-2]
-        
-        if pd.isna(current_data['bias_20']) or pd.isna(current_data['atr_14']):
-            plan = TradePlan(code=code, current_price=current_data['close'], current_bias=0, market_status="INSUFFICIENT_INDICATORS", target_pos_pct=0.0)
+        if pd.isna(df['bias_20'].values[-1]) or pd.isna(df['atr_14'].values[-1]):
+            plan = TradePlan(code=code, current_price=float(df['close'].values[-1]), current_bias=0, market_status="INSUFFICIENT_INDICATORS", target_pos_pct=0.0)
             return plan
 
-        bias = current_data['bias_20']
-        prev_bias = prev_data['bias_20']
-        price = current_data['close']
-        atr = current_data['atr_14']
+        return self.analyze_bar(code, self.bar_view(df), current_holdings)
+
+    def analyze_bar(self, code: str, bar: BarView, current_holdings: Dict) -> TradePlan:
+        """
+        基于单根K线的预计算指标生成交易计划 (不依赖 DataFrame)
+        """
+        bias = bar.bias
+        prev_bias = bar.prev_bias
+        price = bar.close
+        atr = bar.atr
         
         # [NEW] 获取新指标
-        rsi = current_data.get('rsi_14', 50)
-        kdj_j = current_data.get('kdj_j', 50)
+        rsi = bar.rsi
+        kdj_j = bar.kdj_j
         
         # 3. 状态判定 (提前到锚定之前，因为锚定依赖状态)
         # 3.1 模式切换: BIAS 从上方跌破 3 (+3)
@@ -191,28 +257,15 @@ class GridStrategy:
                             (bias <= self.conf.BIAS_THRESHOLDS.TREND_REVERSAL)
         
         # 标准分区判断
-        if bias < self.conf.BIAS_THRESHOLDS.DEEP_DIP:
-            zone = 'DEEP_DIP'
-            market_status = "DEEP_DIP (深坑)"
-        elif bias < self.conf.BIAS_THRESHOLDS.GOLD_ZONE_UPPER:
-            zone = 'GOLD_ZONE'
-            market_status = "GOLD_ZONE (黄金)"
-        elif bias < self.conf.BIAS_THRESHOLDS.OSCILLATION_UPPER:
-            zone = 'OSCILLATION'
-            market_status = "OSCILLATION (震荡)"
-        elif bias < self.conf.BIAS_THRESHOLDS.REDUCE_ZONE_UPPER:
-            zone = 'REDUCE_ZONE'
-            market_status = "REDUCE_ZONE (减持)"
-        else:
-            zone = 'ESCAPE_ZONE'
-            market_status = "ESCAPE_ZONE (逃亡)"
+        zone = ZONE_NAMES[bar.zone]
+        market_status = ZONE_LABELS[zone]
 
         if bias_cross_down_3 and zone != 'DEEP_DIP':
              market_status = "OSCILLATION (SWITCH)"
              zone = 'OSCILLATION'
         
-        # 计算支撑/阻力位
-        support, resistance, _ = self._calc_support_resistance(df)
+        # 支撑/阻力位
+        support, resistance = bar.support, bar.resistance
 
         # 初始计划
         plan = TradePlan(
@@ -249,11 +302,11 @@ class GridStrategy:
             anchor_source = "当前价格 (深坑动态)"
         else:
             # 正常模式：锚定5日线，平滑波动
-            if pd.isna(current_data['ma_5']):
+            if pd.isna(bar.ma_5):
                 anchor_price = price
                 anchor_source = "当前价格 (无MA5)"
             else:
-                anchor_price = current_data['ma_5']
+                anchor_price = bar.ma_5
                 anchor_source = "5日均线"
 
         # -----------------------------------------------------------
@@ -271,7 +324,7 @@ class GridStrategy:
                 plan.risk_triggered = True
 
         # 趋势追踪
-        is_uptrend, is_downtrend, trend_desc = self._detect_trend(df)
+        is_uptrend, is_downtrend, trend_desc = bar.is_uptrend, bar.is_downtrend, bar.trend_desc
         if is_uptrend: plan.warnings.append(f"{trend_desc}. 暂停买入.")
         if is_downtrend: plan.warnings.append(f"{trend_desc}. 暂停卖出.")
         
@@ -285,7 +338,7 @@ class GridStrategy:
         # [NEW] ATR 移动止损 (ATR Trailing Stop)
         # -----------------------------------------------------------
         # 计算近期高点 (20日)
-        recent_high = df['high'].rolling(window=20).max().iloc[-1]
+        recent_high = bar.recent_high
         retracement = recent_high - price
         
         # 只有在非下跌趋势中才主要考虑这个，或者作为强制风控
@@ -0,0 +1,60 @@
+# test_analysis_window.py - 测试数据分析窗口的图表刷新
+import tkinter as tk
+
+import numpy as np
+import pandas as pd
+
+
+def _sample_etf_data():
+    """两只ETF的行情与持仓"""
+    index = pd.date_range("2024-01-01", periods=30, freq="D")
+    close = np.linspace(3.0, 3.3, 30)
+    df = pd.DataFrame({'close': close}, index=index)
+    return {
+        'sh510050': {'name': '50ETF', 'df': df, 'price': 3.3,
+                     'holdings': {'volume': 1000, 'avg_cost': 3.1}},
+        'sz159915': {'name': '创业板', 'df': df * 0.7, 'price': 2.31,
+                     'holdings': {'volume': 0, 'avg_cost': 0}},
+    }
+
+
+def _wait_render(root, window):
+    """处理 Tk 事件直到后台渲染 / 贴图完成"""
+    while window._rendering or window._refresh_pending:
+        root.update()
+    root.update()
+
+
+def test_analysis_window_refresh():
+    """空数据、有数据、再次清空三种情况下刷新图表都不报错"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("⚠️ 无图形界面，跳过数据分析窗口测试")
+        return
+    root.withdraw()
+
+    from gui_dialogs import AnalysisWindow
+
+    try:
+        window = AnalysisWindow(root, {})
+        root.update()  # 空闲时创建图表并首次刷新 (空数据)
+        _wait_render(root, window)
+        assert len(window._position_bars) == 0
+
+        window._reset(_sample_etf_data())
+        _wait_render(root, window)
+        assert len(window._position_bars) == 2
+        heights = [rect.get_height() for rect in window._position_bars]
+        assert abs(heights[0] - 100.0) < 1e-9 and heights[1] == 0
+
+        window._reset({})
+        _wait_render(root, window)
+        assert len(window._position_bars) == 0
+        print("✅ 数据分析窗口刷新正常")
+    finally:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    test_analysis_window_refresh()
@@ -0,0 +1,117 @@
+# test_indicators.py - 测试各指标计算实现与 pandas 基准结果一致
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from indicators import calculate_indicators, calculate_indicators_batch, step_indicators
+
+INDICATOR_COLUMNS = ['ma_5', 'ma_20', 'bias_20', 'atr_14', 'rsi_14', 'kdj_k', 'kdj_d', 'kdj_j']
+
+
+def _make_frame(n=120, seed=0, start="2024-01-01"):
+    """固定的模拟行情 (含一段横盘，覆盖 RSI 均损为 0、KDJ 分母为 0 等分支)"""
+    rng = np.random.default_rng(seed)
+    close = 3 + np.cumsum(rng.standard_normal(n)) * 0.02
+    close[40:55] = close[40]
+    spread = rng.random(n) * 0.03
+    spread[40:55] = 0
+    index = pd.date_range(start, periods=n, freq="D")
+    return pd.DataFrame({
+        'open': close,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': 1000,
+    }, index=index)
+
+
+@contextmanager
+def _backend(numba=False, cython=False, bottleneck=False):
+    """临时切换 indicators 使用的实现 (numba 内核未安装 numba 时按普通 Python 执行)"""
+    saved = (indicators.HAS_NUMBA, indicators.HAS_CYTHON_KERNEL, indicators.HAS_BOTTLENECK)
+    indicators.HAS_NUMBA = numba
+    indicators.HAS_CYTHON_KERNEL = cython
+    indicators.HAS_BOTTLENECK = bottleneck
+    try:
+        yield
+    finally:
+        indicators.HAS_NUMBA, indicators.HAS_CYTHON_KERNEL, indicators.HAS_BOTTLENECK = saved
+
+
+def _baseline(df):
+    """pandas rolling / ewm 实现的结果 (基准)"""
+    with _backend():
+        return calculate_indicators(df)
+
+
+def _assert_same(result, expected):
+    pd.testing.assert_frame_equal(result[INDICATOR_COLUMNS], expected[INDICATOR_COLUMNS],
+                                  rtol=1e-6, atol=1e-9)
+
+
+def test_numba_kernel():
+    """numba 内核与 pandas 基准一致"""
+    df = _make_frame()
+    with _backend(numba=True):
+        _assert_same(calculate_indicators(df), _baseline(df))
+    print("✅ numba 内核结果一致")
+
+
+def test_cython_kernel():
+    """Cython 内核 (已编译时) 与 pandas 基准一致"""
+    if not indicators.HAS_CYTHON_KERNEL:
+        print("⚠️ indicators_cy 未编译，跳过 Cython 内核测试")
+        return
+    df = _make_frame()
+    with _backend(cython=True):
+        _assert_same(calculate_indicators(df), _baseline(df))
+    print("✅ Cython 内核结果一致")
+
+
+def test_bottleneck_path():
+    """bottleneck 滑动窗口 (已安装时) 与 pandas 基准一致"""
+    if not indicators.HAS_BOTTLENECK:
+        print("⚠️ bottleneck 未安装，跳过 bottleneck 测试")
+        return
+    df = _make_frame()
+    with _backend(bottleneck=True):
+        _assert_same(calculate_indicators(df), _baseline(df))
+    print("✅ bottleneck 结果一致")
+
+
+def test_batch():
+    """批量计算 (含不同长度的分组) 与逐只的 pandas 基准一致"""
+    dfs = [_make_frame(seed=1), _make_frame(seed=2), _make_frame(n=60, seed=3)]
+    with _backend(numba=True):
+        results = calculate_indicators_batch(dfs)
+    assert len(results) == len(dfs)
+    for result, df in zip(results, dfs):
+        _assert_same(result, _baseline(df))
+    print("✅ 批量计算结果一致")
+
+
+def test_step():
+    """增量计算最后一根K线与全量 pandas 基准一致；出现新K线时返回 None"""
+    df = _make_frame()
+    prev = _baseline(df)
+
+    updated = df.copy()
+    updated.iloc[-1, updated.columns.get_loc('close')] += 0.05
+    updated.iloc[-1, updated.columns.get_loc('high')] += 0.08
+    result = step_indicators(updated, prev)
+    assert result is not None
+    _assert_same(result, _baseline(updated))
+
+    next_bar = _make_frame(n=121)
+    assert step_indicators(next_bar, prev) is None
+    print("✅ 增量计算结果一致")
+
+
+if __name__ == "__main__":
+    test_numba_kernel()
+    test_cython_kernel()
+    test_bottleneck_path()
+    test_batch()
+    test_step()
@@ -0,0 +1,44 @@
+# test_logger.py - 测试内存日志环形缓冲
+import logging
+
+from logger import LOG_BUFFER_SIZE, get_logger
+
+
+def _memory_handler(trading_logger):
+    """后台监听器中写环形缓冲的 Handler"""
+    return next(h for h in trading_logger._listener.handlers if hasattr(h, 'owner'))
+
+
+def _emit(handler, text, level=logging.INFO):
+    record = logging.LogRecord("BIAS-ATR-Trader", level, __file__, 0, text, None, None)
+    handler.handle(record)
+
+
+def test_ring_buffer():
+    """写满并回绕后，get_recent_logs 按时间顺序返回最近的记录副本"""
+    trading_logger = get_logger()
+    handler = _memory_handler(trading_logger)
+    trading_logger._listener.queue.join()  # 等启动日志等已排队的记录写完，避免与测试记录交错
+
+    total = LOG_BUFFER_SIZE + 37
+    for i in range(total):
+        _emit(handler, f"ring-{i}", logging.WARNING if i % 2 else logging.INFO)
+
+    recent = trading_logger.get_recent_logs(limit=50)
+    assert [r['message'] for r in recent] == [f"ring-{i}" for i in range(total - 50, total)]
+    assert recent[-1]['level'] == ('WARNING' if (total - 1) % 2 else 'INFO')
+
+    everything = trading_logger.get_recent_logs(limit=LOG_BUFFER_SIZE * 2)
+    assert len(everything) == LOG_BUFFER_SIZE
+    assert everything[0]['message'] == f"ring-{total - LOG_BUFFER_SIZE}"
+
+    # 返回的是副本，修改不影响缓冲区；之后的写入也不改变已返回的结果
+    recent[-1]['message'] = "changed"
+    _emit(handler, "ring-next")
+    assert trading_logger.get_recent_logs(limit=2)[0]['message'] == f"ring-{total - 1}"
+    assert recent[0]['message'] == f"ring-{total - 50}"
+    print("✅ 内存日志环形缓冲正常")
+
+
+if __name__ == "__main__":
+    test_ring_buffer()
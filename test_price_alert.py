@@ -0,0 +1,49 @@
+# test_price_alert.py - 测试批量价格提醒与逐只检测结果一致
+import os
+import tempfile
+
+from price_alert import AlertManager
+
+CODES = ['sh510050', 'sz159915', 'sh512880', 'sh588000']
+PRICES = [2.95, 2.10, 1.05, 0.80]
+ORDERS = [
+    # 买单触价 + 卖单未触价
+    [{'direction': 'BUY', 'price': 3.00, 'amount': 1000, 'desc': '网格买1'},
+     {'direction': 'SELL', 'price': 3.20, 'amount': 1000, 'desc': '网格卖1'}],
+    # 卖单触价 + 无效价格
+    [{'direction': 'SELL', 'price': 2.05, 'amount': 500, 'desc': '网格卖1'},
+     {'direction': 'BUY', 'price': 0, 'amount': 500, 'desc': '无效'}],
+    # 没有挂单
+    [],
+    # 恰好等于目标价 + 未知方向
+    [{'direction': 'BUY', 'price': 0.80, 'amount': 2000, 'desc': '网格买2'},
+     {'direction': 'HOLD', 'price': 0.70, 'amount': 100, 'desc': ''}],
+]
+
+
+def _summary(alerts):
+    return [(a.message, a.grid_level, a.alert_type, a.amount) for a in alerts]
+
+
+def test_bulk_matches_single():
+    """check_price_alerts_bulk 与逐只 check_price_alerts 产生相同的提醒"""
+    with tempfile.TemporaryDirectory() as tmp:
+        single = AlertManager(os.path.join(tmp, 'single.json'))
+        bulk = AlertManager(os.path.join(tmp, 'bulk.json'))
+
+        expected = {code: _summary(single.check_price_alerts(code, code, price, orders))
+                    for code, price, orders in zip(CODES, PRICES, ORDERS)}
+        result = bulk.check_price_alerts_bulk(CODES, PRICES, ORDERS)
+        got = {code: _summary(alerts) for code, alerts in result.items()}
+
+        assert got == expected, (got, expected)
+        assert sum(len(v) for v in got.values()) == 3
+
+        # 同一天同一价位只提醒一次
+        again = bulk.check_price_alerts_bulk(CODES, PRICES, ORDERS)
+        assert not any(again.values())
+    print("✅ 批量价格提醒结果一致")
+
+
+if __name__ == "__main__":
+    test_bulk_matches_single()
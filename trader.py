@@ -78,6 +78,10 @@ class Trader:
         self.trader = None
         self.account = None
         self._connected = False
+        
+        # ETF池代码格式预计算 (下单 / 同步持仓时查表，池外代码现场转换)
+        self._code_map = {c: c[2:] + '.' + c[:2].upper() for c in config.ETF_LIST}
+        self._symbol_map = {s: c for c, s in self._code_map.items()}
     
     def connect(self) -> bool:
         """连接交易服务"""
@@ -132,7 +136,10 @@ class Trader:
     
     def _convert_code(self, code: str) -> str:
         """转换代码格式: sh510050 -> 510050.SH"""
-        return code[2:] + '.' + code[:2].upper()
+        symbol = self._code_map.get(code)
+        if symbol is None:
+            symbol = code[2:] + '.' + code[:2].upper()
+        return symbol
     
     def get_positions(self) -> List[Dict]:
         """查询持仓"""
@@ -157,6 +164,9 @@ class Trader:
     
     def _reverse_convert_code(self, symbol: str) -> str:
         """反向转换代码格式: 510050.SH -> sh510050"""
+        code = self._symbol_map.get(symbol)
+        if code:
+            return code
         parts = symbol.split('.')
         if len(parts) == 2:
             return parts[1].lower() + parts[0]